@@ -1,19 +1,25 @@
 from collections import deque
 from typing import Callable, List, Tuple
 
+from domain_store import DomainStore, DomainView
+from network import Network
+
 
 class CSP(object):
     """
     Represents a Constraint Satisfaction Problem (CSP).
     Attributes:
-        variables (dict): A dictionary that maps variables to their domains.
+        variables (DomainView): A mapping from variables to their current domains.
+        domains (DomainStore): The bitmask store that holds the domains of the variables.
         constraints (list): A list of constraints in the form of [constraint_func, variables].
         unassigned_var (list): A list of unassigned variables.
         var_constraints (dict): A dictionary that maps variables to their associated constraints.
+        network (Network): The constraint network compiled to integer indices, used by is_consistent.
 
     Methods:
         add_constraint(constraint_func, variables): Adds a constraint to the CSP.
         add_variable(variable, domain): Adds a variable to the CSP with its domain.
+        compile(): Compiles the constraint network.
     """
 
     def __init__(self, *args, **kwargs) -> None:
@@ -25,18 +31,32 @@ class CSP(object):
             **kwargs: Arbitrary keyword arguments.
 
         Attributes:
-            variables (dict): A dictionary to store the variables of the CSP.
+            domains (DomainStore): A bitmask store with a trail for the domains of the variables.
+            variables (DomainView): A read-only mapping from each variable to its current domain.
             constraints (list): A list to store the constraints of the CSP.
             unassigned_var (list): A list to store the unassigned variables of the CSP.
             var_constraints (dict): A dictionary to store the constraints associated with each variable.
+            var_constraint_ids (dict): A dictionary to store the index in `constraints` of each entry of `var_constraints`.
+            conflict (int): The index of the constraint that made the last is_consistent call fail.
             assignments (dict): A dictionary to store the assignments of the CSP.
-        """
-        self.variables = {}
+            assignments_number (int): The number of assignments made so far.
+            checks_number (int): The number of constraint evaluations made by is_consistent so far.
+            network (Network): The compiled constraint network, built by compile (or by the first
+                               is_consistent call) and dropped whenever a variable or constraint is added.
+            values (list): The assigned values by variable index of `network`, None for unassigned variables.
+        """
+        self.domains = DomainStore()
+        self.variables = DomainView(self.domains)
         self.constraints = []
         self.unassigned_var = []
         self.var_constraints = {}
+        self.var_constraint_ids = {}
+        self.conflict = None
         self.assignments = {}
         self.assignments_number = 0
+        self.checks_number = 0
+        self.network = None
+        self.values = []
 
     def add_constraint(self, constraint_func: Callable, variables: List) -> None:
         """
@@ -50,14 +70,18 @@ class CSP(object):
             None
         """
         """ You Should Code Here """
+        index = len(self.constraints)
         self.constraints.append([constraint_func, variables])
+        self.network = None
 
         i = 0
         while i < len(variables):
             var = variables[i]
             if var not in self.var_constraints:
                 self.var_constraints[var] = []
+                self.var_constraint_ids[var] = []
             self.var_constraints[var].append((constraint_func, variables))
+            self.var_constraint_ids[var].append(index)
             i += 1
 
 
@@ -73,9 +97,24 @@ class CSP(object):
             None
         """
         """ You Should Code Here """
-        self.variables[variable] = list(domain)
+        self.domains.add(variable, domain)
         self.unassigned_var.append(variable)
         self.assignments[variable] = None
+        self.network = None
+
+    def compile(self) -> Network:
+        """
+        Compiles the constraint network to integer indices (see Network).
+
+        It must be compiled again after the constraints are replaced, which
+        instrumentation does by dropping `network`.
+
+        Returns:
+            Network: The compiled network.
+        """
+        self.network = Network(self.assignments, self.constraints)
+        self.values = [self.assignments[var] for var in self.network.variables]
+        return self.network
 
     def assign(self, variable: any, value: any) -> None:
         """
@@ -92,6 +131,8 @@ class CSP(object):
         """ You Should Code Here """
         self.assignments[variable] = value
         self.assignments_number += 1
+        if self.network is not None:
+            self.values[self.network.index[variable]] = value
         if variable in self.unassigned_var:
             self.unassigned_var.remove(variable)
 
@@ -100,6 +141,11 @@ class CSP(object):
         """
         Checks if assigning a value to a variable violates any constraints.
 
+        Constraints that provide a `check_partial(values)` method are checked on
+        partial assignments too (with None for unassigned variables), the others
+        only once all of their variables are assigned. The checks run on the
+        compiled network, which is compiled on the first call.
+
         Args:
             variable (any): The variable to be assigned.
             value (any): The value to be assigned to the variable.
@@ -109,34 +155,17 @@ class CSP(object):
         """
 
         """ You Should Code Here """
-        constraints = self.var_constraints.get(variable, [])
-        i = 0
-        while i < len(constraints):
-            constraint_func, vars_in_constraint = constraints[i]
-
-            if constraint_func.__name__ == 'distinction_constraint':
-                j = 0
-                while j < len(vars_in_constraint):
-                    var = vars_in_constraint[j]
-                    if var != variable and self.assignments.get(var) == value:
-                        print(f"distinction_constraint violated: {var} = {value}")
-                        return False
-                    j += 1
-            else:
-                all_assigned = True
-                k = 0
-                while k < len(vars_in_constraint):
-                    if self.assignments.get(vars_in_constraint[k]) is None:
-                        all_assigned = False
-                        break
-                    k += 1
-
-                if all_assigned:
-                    values = [self.assignments[var] for var in vars_in_constraint]
-                    if not constraint_func(*values):
-                        print(f"visibility constraint violated for variables {vars_in_constraint} with values {values}")
-                        return False
-            i += 1
+        network = self.network
+        if network is None:
+            network = self.compile()
+        values = self.values
+        constraints = network.constraints
+        i = network.index[variable]
+        for k in network.incidence[network.offsets[i]:network.offsets[i + 1]]:
+            self.checks_number += 1
+            if not constraints[k].check(values, i):
+                self.conflict = k
+                return False
 
         return True
 
@@ -152,6 +181,18 @@ class CSP(object):
         """
         return len(self.unassigned_var) == 0
     
+    def givens(self) -> dict:
+        """
+        Returns the variables whose domain holds a single value, with that value.
+
+        Called before the search, these are the pre-filled cells of the puzzle.
+
+        Returns:
+            dict: A dictionary from variable to its only value.
+        """
+        domains = self.domains
+        return {var: domains.min(var) for var in domains.masks if domains.size(var) == 1}
+
     def is_assigned(self, variable: any) -> bool:
         """
         Checks if a variable has been assigned a value.
@@ -178,13 +219,29 @@ class CSP(object):
         """ You Should Code Here """
 
         self.assignments[variable] = None
+        if self.network is not None:
+            self.values[self.network.index[variable]] = None
         if variable not in self.unassigned_var:
             self.unassigned_var.append(variable)
 
+        i = 0
+        while i < len(removed_values_from_domain):
+            var_name, removed_value = removed_values_from_domain[i]
+            self.domains.restore(var_name, removed_value)
+            i += 1
+
     def remove_from_domain(self, removed: List[tuple]) -> None:
+        """
+        Removes values from the domains of variables.
+
+        Args:
+            removed (list): A list of (variable, value) pairs to remove.
+
+        Returns:
+            None
+        """
         i = 0
         while i < len(removed):
             var_name, removed_value = removed[i]
-            if removed_value in self.variables[var_name]:
-                self.variables[var_name].remove(removed_value)
+            self.domains.remove(var_name, removed_value)
             i += 1
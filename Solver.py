@@ -1,12 +1,40 @@
+import random
+import time
 from collections import deque
-from typing import Callable, List, Tuple, Any
+from typing import Any, Callable, Iterator, List, Tuple
 from CSP import CSP
+from limits import CancellationToken, LimitReached
+from line_solver import LineSolver
+from nogoods import NogoodStore
+from instrumentation import SolverHook, SolverStats, instrument
+from tracing import Tracer
 
 
+def luby(i: int) -> int:
+    """Returns the i-th term (starting at 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, ..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    if (1 << k) - 1 == i:
+        return 1 << (k - 1)
+    return luby(i - (1 << (k - 1)) + 1)
+
 
 class Solver(object):
 
-    def __init__(self, csp: CSP, domain_heuristics: bool = False, variable_heuristics: bool = False, MAC: bool = False) -> None:
+    # The number of failures allowed in the first run, for both restart policies.
+    restart_unit = 32
+    geometric_factor = 1.5
+
+    def __init__(self, csp: CSP, domain_heuristics: bool = False, variable_heuristics: bool = False, MAC: bool = False,
+                 line_search: bool = False, clues: Tuple[List[int], List[int], List[int], List[int]] | None = None,
+                 forward_checking: bool = False, dom_wdeg: bool = False, restarts: str | None = None,
+                 seed: int | None = None, backjumping: bool = False, nogood_capacity: int = 10000,
+                 instrumented: bool = False, constraint_timing: bool = False,
+                 hooks: List[SolverHook] | None = None, trace: str | None = None,
+                 trace_capacity: int = 65536, trace_file: str | None = None, node_limit: int | None = None,
+                 assignment_limit: int | None = None, time_limit: float | None = None,
+                 cancel_token: CancellationToken | None = None) -> None:
         """
         Initializes a Solver object.
 
@@ -14,60 +42,686 @@ class Solver(object):
             csp (CSP): The Constraint Satisfaction Problem to be solved.
             domain_heuristics (bool, optional): Flag indicating whether to use domain heuristics. Defaults to False.
             variable_heuristics (bool, optional): Flag indicating whether to use variable heuristics. Defaults to False.
-            AC_3 (bool, optional): Flag indicating whether to use the AC-3 algorithm. Defaults to False.
             MAC (bool, optional): Flag indicating whether to use the MAC algorithm. Defaults to False.
+            line_search (bool, optional): Flag indicating whether to search over whole rows and columns. Defaults to False.
+            clues (tuple, optional): The clues of the puzzle as (top, bottom, left, right), needed by the line search.
+            forward_checking (bool, optional): Flag indicating whether to use forward checking. Ignored with MAC. Defaults to False.
+            dom_wdeg (bool, optional): Flag indicating whether to order variables by domain size over constraint weight. Defaults to False.
+            restarts (str, optional): The restart policy, 'luby' or 'geometric'. Defaults to None (no restarts).
+            seed (int, optional): The seed of the random tie-breaking between equally good variables.
+                                  Ties are broken by list order when neither a seed nor restarts are given.
+            backjumping (bool, optional): Flag indicating whether to use conflict-directed backjumping with nogood
+                                          recording instead of chronological backtracking. It cannot be combined
+                                          with forward_checking or MAC. Defaults to False.
+            nogood_capacity (int, optional): The maximum number of nogoods kept by backjumping. Defaults to 10000.
+            instrumented (bool, optional): Flag indicating whether to collect the counters of `stats`. Defaults to False.
+            constraint_timing (bool, optional): Flag indicating whether to also time every constraint. Defaults to False.
+            hooks (List[SolverHook], optional): Custom profilers notified of search events. Defaults to None.
+            trace (str, optional): The level of the search trace kept in `tracer`, 'failures', 'decisions' or 'all'.
+                                   Defaults to None (no trace).
+            trace_capacity (int, optional): The number of most recent events kept by the trace. Defaults to 65536.
+            trace_file (str, optional): A file the whole trace is written to as the search goes, instead of only
+                                        keeping the last events. It is complete once `tracer.close()` is called.
+            node_limit (int, optional): The maximum number of search nodes (variables branched on, or lines with
+                                        the line search) of a solve. Defaults to None (no limit).
+            assignment_limit (int, optional): The maximum number of assignments of a solve. Defaults to None.
+            time_limit (float, optional): The maximum wall time of a solve in seconds. Defaults to None.
+            cancel_token (CancellationToken, optional): A token that stops the search when it is cancelled.
+                                                        Defaults to None.
+
+        When a limit is reached, solve() returns None with `status` set to
+        'unknown' and `limit_reason` to the limit, and the CSP is reset to its
+        state before the solve. The limits are checked at every search node.
+
+        Combining backjumping with forward checking or MAC raises a ValueError
+        (see backjump_solver).
         """
+        if backjumping and (MAC or forward_checking):
+            raise ValueError("Backjumping cannot be combined with forward checking or MAC")
         self.domain_heuristic = domain_heuristics
         self.variable_heuristic = variable_heuristics
         self.MAC = MAC
+        self.forward_checking = forward_checking
+        self.dom_wdeg = dom_wdeg
+        self.restarts = restarts
+        self.random = random.Random(seed)
+        self.randomize = seed is not None or restarts is not None
+        self.backjumping = backjumping
+        self.nogoods = NogoodStore(nogood_capacity)
+        self.line_search = line_search
+        self.clues = clues
         self.csp = csp
 
         self.board_size = int(len(self.csp.variables) ** 0.5)
 
+        # The constraints of each variable by index, and the residual supports of each constraint.
+        self.var_constraint_ids = {var: self.csp.var_constraint_ids.get(var, []) for var in self.csp.variables}
+        self.residues = [dict() for _ in self.csp.constraints]
+
+        # Constraints that come with a dedicated propagator (such as AllDifferent) use it instead of
+        # the generic support search.
+        self.propagators = [
+            constraint.propagator(vars_in_constraint) if hasattr(constraint, 'propagator') else None
+            for constraint, vars_in_constraint in self.csp.constraints
+        ]
+
+        # Constraint weights for dom/wdeg, bumped each time a constraint causes a failure. They are
+        # kept across restarts.
+        self.weights = [1] * len(self.csp.constraints)
+        self.conflict = None
+        self.failures = 0
+        self.failure_limit = None
+        self.restart_pending = False
+        self.restarts_number = 0
+        # Values tried first, by variable, such as the cells of an earlier solution: the search goes
+        # straight back to it where it still fits (phase saving). None tries the values in order.
+        self.phase = None
+
+        # Search limits, checked at every node when one of them is set.
+        self.node_limit = node_limit
+        self.assignment_limit = assignment_limit
+        self.time_limit = time_limit
+        self.cancel_token = cancel_token
+        self.limited = node_limit is not None or assignment_limit is not None or time_limit is not None \
+            or cancel_token is not None
+        self.nodes = 0
+        self.deadline = None
+        self.assignments_end = None
+        # The outcome of the last solve: 'solved', 'unsolvable' or 'unknown' (a limit was reached first).
+        self.status = None
+        self.limit_reason = None
+        # The LineSolver of the line search, once it has started.
+        self.engine = None
+
+        # The counters are only collected by instrumented solvers, the others run the plain methods.
+        self.stats = SolverStats([f"{constraint!r} {variables[0]}-{variables[-1]}"
+                                  for constraint, variables in self.csp.constraints])
+        # The search trace is a hook like the others, so a solver without one does not pay for it either.
+        self.tracer = Tracer(list(self.csp.variables), trace, trace_capacity, trace_file) if trace else None
+        if self.tracer is not None:
+            hooks = list(hooks or ()) + [self.tracer]
+        if instrumented or constraint_timing or hooks:
+            instrument(self, constraint_timing, hooks)
+
+
+    def solve(self, propagate: bool = True) -> None | dict:
+        """
+        Solves the CSP with the search mode selected when the solver was created.
+
+        `status` tells a puzzle without solution ('unsolvable') from a search
+        stopped by one of the limits ('unknown', with the limit in `limit_reason`).
+
+        Args:
+            propagate (bool, optional): Whether MAC makes the domains arc consistent before the search.
+                                        False when the caller already did. Defaults to True.
+
+        Returns:
+            dict{any : any}: A list of variable-value assignments that satisfy all constraints.
+        """
+        self.start_limits()
+        checkpoint = self.csp.domains.checkpoint()
+        try:
+            solution = self.search(propagate)
+        except LimitReached as limit:
+            self.stop(limit, checkpoint)
+            return None
+        self.status = 'unsolvable' if solution is None else 'solved'
+        return solution
+
+    def search(self, propagate: bool = True) -> None | dict:
+        """Runs the search mode selected when the solver was created (see solve)."""
+        if self.line_search:
+            return self.line_solver()
+        if self.backjumping:
+            return self.backjump_solver()
+        if self.MAC and propagate and self.apply_MAC() is None:
+            return None
+        if self.restarts is not None:
+            return self.restart_solver()
+        return self.backtrack_solver()
+
+    def solutions(self) -> Iterator[dict]:
+        """
+        Yields every solution of the CSP, one at a time.
+
+        The search is a generator: it stops at each solution with its state
+        (assignments, domain trail) intact and goes on from there when the next
+        solution is asked for, so enumerating k solutions costs one search, not k.
+        Variable and value ordering and look-ahead (FC or MAC) are used as usual,
+        restarts and backjumping are not. Once the generator is exhausted, the
+        CSP is back in its initial state. The search limits apply to the whole
+        enumeration: when one is reached, the generator stops with `status` set to 'unknown'.
+
+        Returns:
+            Iterator: A dictionary of variable-value assignments for each solution.
+        """
+        self.start_limits()
+        checkpoint = self.csp.domains.checkpoint()
+        found = 0
+        try:
+            if self.line_search:
+                source = self.line_solutions()
+            elif self.MAC and self.apply_MAC() is None:
+                source = iter(())
+            else:
+                source = self.enumerate_solutions(True)
+            for solution in source:
+                found += 1
+                yield solution
+        except LimitReached as limit:
+            self.stop(limit, checkpoint)
+            return
+        self.csp.domains.rewind(checkpoint)
+        self.status = 'solved' if found else 'unsolvable'
+
+    def count_solutions(self, limit: int | None = None) -> int:
+        """
+        Counts the solutions of the CSP, stopping at `limit` (for example 2 to check uniqueness).
+
+        No solution dictionary is built. With MAC, a branch where every
+        unassigned variable is left with a single value is counted as one
+        solution without assigning them, since arc consistency guarantees it.
+
+        Args:
+            limit (int, optional): The number of solutions after which counting stops. Defaults to no limit.
+
+        Returns:
+            int: The number of solutions, at most `limit`. When a search limit stops the count first,
+                 `status` is 'unknown' and the count is only a lower bound.
+        """
+        if limit is not None and limit <= 0:
+            return 0
+        self.start_limits()
+        checkpoint = self.csp.domains.checkpoint()
+        count = 0
+        try:
+            if self.line_search:
+                found = self.line_solutions()
+            elif self.MAC and self.apply_MAC() is None:
+                found = iter(())
+            else:
+                found = self.enumerate_solutions(False)
+            for _ in found:
+                count += 1
+                if count == limit:
+                    break
+        except LimitReached as limit_reached:
+            self.stop(limit_reached, checkpoint)
+            return count
+        if hasattr(found, 'close'):
+            found.close()
+        self.csp.domains.rewind(checkpoint)
+        self.status = 'solved' if count else 'unsolvable'
+        return count
+
+    def line_solutions(self) -> Iterator[dict]:
+        """Yields the solutions of the line search one at a time (see LineSolver.solutions)."""
+        return self.line_engine().solutions()
+
+    def enumerate_solutions(self, materialize: bool) -> Iterator[None | dict]:
+        """
+        Backtracking search that yields at every solution instead of returning at the first one.
+
+        It keeps the same stack of [variable, values, next value, checkpoint]
+        nodes as backtrack_solver, and stays on it between two solutions.
+
+        Args:
+            materialize (bool): Whether to yield a copy of the assignments, or just None, for each solution.
+
+        Returns:
+            Iterator: The solutions (or None for each of them) below the current assignments.
+        """
+        csp = self.csp
+        domains = csp.domains
+        stack = []
+        try:
+            while True:
+                if csp.is_complete():
+                    yield csp.assignments.copy() if materialize else None
+                else:
+                    self.check_limits()
+                    if not materialize and self.MAC and all(domains.size(var) == 1 for var in csp.unassigned_var):
+                        yield None
+                    else:
+                        var = self.select_unassigned_variable()
+                        stack.append([var, self.ordered_domain_value(var), 0, None])
+
+                # Move to the next consistent value of the deepest node, backtracking when it has none left.
+                while stack:
+                    node = stack[-1]
+                    var, domain, index, checkpoint = node
+                    if checkpoint is not None:
+                        domains.rewind(checkpoint)
+                        csp.un_assign([], var)
+                        node[3] = None
+                    if index == len(domain):
+                        stack.pop()
+                        continue
+
+                    value = domain[index]
+                    node[2] = index + 1
+                    checkpoint = domains.checkpoint()
+                    csp.assign(var, value)
+                    self.conflict = None
+                    consistent = csp.is_consistent(var, value)
+                    if not consistent:
+                        self.conflict = csp.conflict
+                    if consistent and self.look_ahead(var, value):
+                        node[3] = checkpoint
+                        break
+                    domains.rewind(checkpoint)
+                    csp.un_assign([], var)
+                    self.record_failure(self.conflict)
+                else:
+                    return
+        finally:
+            # Also runs when the caller stops the enumeration, so the CSP is left as it was.
+            self.unwind(stack)
+
+    def start_limits(self) -> None:
+        """Starts the node, assignment and time budgets of a new solve."""
+        self.status = None
+        self.limit_reason = None
+        self.nodes = 0
+        self.deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        self.assignments_end = None if self.assignment_limit is None \
+            else self.csp.assignments_number + self.assignment_limit
+
+    def check_limits(self) -> None:
+        """
+        Counts a search node and raises LimitReached if one of the limits of the solver is reached.
+
+        Returns:
+            None
+        """
+        self.nodes += 1
+        if not self.limited:
+            return
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise LimitReached('nodes')
+        if self.assignments_end is not None and self.csp.assignments_number >= self.assignments_end:
+            raise LimitReached('assignments')
+        self.check_interrupt()
+
+    def check_interrupt(self) -> None:
+        """
+        Raises LimitReached if the time limit is reached or the search was cancelled, without counting a node.
+
+        Returns:
+            None
+        """
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise LimitReached('time')
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            raise LimitReached('cancelled')
+
+    def stop(self, limit: LimitReached, checkpoint: int) -> None:
+        """Records a search stopped by a limit and puts the CSP back in its state at the checkpoint."""
+        self.status = 'unknown'
+        self.limit_reason = limit.reason
+        self.failure_limit = None
+        self.restart_pending = False
+        csp = self.csp
+        for var in list(csp.assignments):
+            if csp.assignments[var] is not None:
+                csp.un_assign([], var)
+        csp.domains.rewind(checkpoint)
+
+    def restart_solver(self) -> None | dict:
+        """
+        Runs the backtracking search again and again with a growing failure limit.
+
+        The limit follows the Luby sequence or a geometric progression. Constraint
+        weights learned by dom/wdeg and the random tie-breaking carry over from one
+        run to the next, so each run explores a different part of the tree.
+
+        Returns:
+            dict{any : any}: A list of variable-value assignments that satisfy all constraints.
+        """
+        if self.restarts not in ('luby', 'geometric'):
+            raise ValueError(f"Unknown restart policy: {self.restarts}")
+
+        run = 1
+        while True:
+            if self.restarts == 'luby':
+                cutoff = self.restart_unit * luby(run)
+            else:
+                cutoff = int(self.restart_unit * self.geometric_factor ** (run - 1))
+            self.failure_limit = self.failures + cutoff
+            self.restart_pending = False
+
+            solution = self.backtrack_solver()
+            if not self.restart_pending:
+                self.failure_limit = None
+                return solution
+            self.restarts_number += 1
+            run += 1
+
+    def record_failure(self, conflict: int | None) -> None:
+        """
+        Records a failed assignment, bumps the weight of the constraint behind it and
+        asks for a restart when the failure limit of the current run is reached.
+
+        Args:
+            conflict (int): The index of the constraint that caused the failure, if known.
+
+        Returns:
+            None
+        """
+        self.failures += 1
+        if conflict is not None:
+            self.weights[conflict] += 1
+        if self.failure_limit is not None and self.failures >= self.failure_limit:
+            self.restart_pending = True
+
+    def line_solver(self) -> None | dict:
+        """
+        Solves the puzzle over whole rows and columns instead of single cells.
+
+        Each line takes one of the permutations allowed by its clue pair, and rows
+        and columns are filtered against each other where they intersect.
+
+        Returns:
+            dict{any : any}: A list of variable-value assignments that satisfy all constraints.
+        """
+        engine = self.line_engine()
+        engine.prefer = self.phase
+        solution = engine.solve()
+        if solution is None:
+            return None
+
+        # The solution goes through csp.assign like the cell searches, so the compiled values and the
+        # domains agree with it, but its assignments were already counted by the line search.
+        csp = self.csp
+        counted = csp.assignments_number
+        for var, value in solution.items():
+            csp.assign(var, value)
+            csp.domains.assign(var, value)
+        csp.assignments_number = counted
+        return solution
+
+    def line_engine(self) -> LineSolver:
+        """
+        Returns a LineSolver for the puzzle, kept in `engine` while it searches.
+
+        Every line assignment counts as an assignment of the CSP as soon as it
+        is made, so the progress of the search can be followed, and goes
+        through the search limits. The filtering of the lines, which takes
+        most of the time of the line search on large boards, stops too when the
+        time limit is reached or the search is cancelled.
+
+        Returns:
+            LineSolver: The line search of the clues and the givens of the CSP.
+        """
+        if self.clues is None:
+            raise ValueError("The line search needs the clues of the puzzle")
+        csp = self.csp
+        check_limits = self.check_limits
+
+        def check():
+            check_limits()
+            csp.assignments_number += 1
+
+        engine = LineSolver(self.clues, csp.givens())
+        engine.check = check
+        if self.time_limit is not None or self.cancel_token is not None:
+            engine.interrupt = self.check_interrupt
+        self.engine = engine
+        return engine
 
     def backtrack_solver(self) -> None | dict:
         """
         Backtracking algorithm to solve the constraint satisfaction problem (CSP).
 
+        The search keeps its own stack of nodes instead of recursing, so the
+        size of the board is not bounded by the recursion limit of Python.
+        Every node holds the variable branched on, its values, the next value
+        to try and the domain checkpoint of the value being explored below it.
+
         Returns:
             dict{any : any}: A list of variable-value assignments that satisfy all constraints.
         """
 
         """ You Should Code Here """
 
-        if self.csp.is_complete():
-            print("Solution Assignments:")
-            for key, value in self.csp.assignments.items():
-                print(f"{key} = {value}")
-            solution = self.csp.assignments.copy()
-            return solution
+        csp = self.csp
+        stack = []
+        while True:
+            if csp.is_complete():
+                return csp.assignments.copy()
+
+            # Expand a new node.
+            self.check_limits()
+            var = self.select_unassigned_variable()
+            stack.append([var, self.ordered_domain_value(var), 0, None])
+
+            # Move to the next consistent value of the deepest node, backtracking when it has none left.
+            while stack:
+                node = stack[-1]
+                var, domain, index, checkpoint = node
+                if checkpoint is not None:
+                    # The branch below the current value failed.
+                    csp.domains.rewind(checkpoint)
+                    csp.un_assign([], var)
+                    node[3] = None
+                if self.restart_pending:
+                    self.unwind(stack)
+                    return None
+                if index == len(domain):
+                    stack.pop()
+                    continue
+
+                value = domain[index]
+                node[2] = index + 1
+                checkpoint = csp.domains.checkpoint()
+                csp.assign(var, value)
+                self.conflict = None
+                consistent = csp.is_consistent(var, value)
+                if not consistent:
+                    self.conflict = csp.conflict
+                if consistent and self.look_ahead(var, value):
+                    node[3] = checkpoint
+                    break
+                csp.domains.rewind(checkpoint)
+                csp.un_assign([], var)
+                self.record_failure(self.conflict)
+            else:
+                return None
 
-        
-            
-        
-        var = self.select_unassigned_variable()
-        domain = self.ordered_domain_value(var)
-
-        for value in domain:
-            print(f"Assuming {var} = {value}")
-            removes_to_reverse_in_unassign = list()
-            self.csp.assign(var, value)
-            print(f"    {var} = {value} assigned")
-            if self.csp.is_consistent(var, value):
-                solution = self.backtrack_solver()
-                if solution != None:
-                    return solution
-                removes_to_reverse_in_unassign.append((var, value))
-                self.csp.un_assign(removes_to_reverse_in_unassign, var)
-                print(f"    {var} = {value} unassigned")
-                print(f"We conclude {var} != {value}")
+    def unwind(self, stack: List[list]) -> None:
+        """Undoes the assignments of the nodes of a search stack, from the deepest one."""
+        while stack:
+            var, _, _, checkpoint = stack.pop()
+            if checkpoint is not None:
+                self.csp.domains.rewind(checkpoint)
+                self.csp.un_assign([], var)
+
+    def backjump_solver(self) -> None | dict:
+        """
+        Conflict-directed backjumping (CBJ) to solve the constraint satisfaction problem (CSP).
+
+        Every variable collects the earlier variables responsible for the failures
+        of its values. When all of its values fail, the search jumps straight back
+        to the deepest of them, skipping the variables in between, and the
+        assignments of the conflict set are stored as a nogood that prunes later
+        branches.
+
+        A value that breaks a constraint blames the assigned variables of that
+        constraint which the check still needs to fail (see conflict_culprits). A
+        value that completes a stored nogood blames the other variables of the
+        nogood. A value whose subtree fails blames the conflict set returned by
+        the subtree, minus the variable itself. The nogood store keeps the 10000
+        (nogood_capacity) most recently used nogoods and evicts the least
+        recently used one when full.
+
+        The conflict sets only blame assignments, so the values tried must come
+        from domains that no assignment has pruned: the solver rejects
+        backjumping combined with look-ahead (FC and MAC), whose prunings would
+        leave the conflict sets incomplete and make the search jump over
+        solutions. Restarts are not used in this mode either, since a restart
+        would throw away the conflict sets of the current branch.
+
+        The search keeps its own stack of [variable, values, next value,
+        checkpoint, conflict set] nodes instead of recursing. A failed subtree
+        hands its conflict set to the node above it, which skips its remaining
+        values and fails in turn when it is not in that set.
+
+        Returns:
+            dict{any : any}: A list of variable-value assignments that satisfy all constraints.
+        """
+        csp = self.csp
+        assignments = csp.assignments
+        stack = []
+        while True:
+            if csp.is_complete():
+                return assignments.copy()
+
+            self.check_limits()
+            var = self.select_unassigned_variable()
+            stack.append([var, self.ordered_domain_value(var), 0, None, set()])
+            # The conflict set of the subtree that failed last.
+            failed = set()
+
+            while stack:
+                node = stack[-1]
+                var, domain, index, checkpoint, conflict_set = node
+                if checkpoint is not None:
+                    # The subtree below the current value failed.
+                    csp.domains.rewind(checkpoint)
+                    csp.un_assign([], var)
+                    node[3] = None
+                    if var not in failed:
+                        # This variable played no part in the failure below, so trying its other values is pointless.
+                        stack.pop()
+                        continue
+                    conflict_set |= failed - {var}
+                if index == len(domain):
+                    self.nogoods.add((other, assignments[other]) for other in conflict_set)
+                    failed = conflict_set
+                    stack.pop()
+                    continue
+
+                value = domain[index]
+                node[2] = index + 1
+                checkpoint = csp.domains.checkpoint()
+                csp.assign(var, value)
+
+                nogood = self.nogoods.violated(var, value, assignments)
+                if nogood is not None:
+                    conflict_set |= {other for other, _ in nogood if other != var}
+                    csp.un_assign([], var)
+                    continue
+
+                if not csp.is_consistent(var, value):
+                    conflict_set |= self.conflict_culprits(csp.conflict, var)
+                    csp.un_assign([], var)
+                    self.record_failure(csp.conflict)
+                    continue
+
+                node[3] = checkpoint
+                break
             else:
-                removes_to_reverse_in_unassign.append((var, value))
-                self.csp.un_assign(removes_to_reverse_in_unassign, var)
-                print(f"    {var} = {value} unassigned")
-                print(f"{var} != {value} because of inconsistency")
+                return None
 
-        return None
+    def conflict_culprits(self, k: int, variable: Any) -> set:
+        """
+        Finds the earlier variables to blame for constraint k rejecting the assignment of variable.
+
+        For constraints with check_partial, assigned variables are dropped one at a
+        time as long as the rest still fails the check, which keeps conflict sets
+        small (for a row, usually just the cell holding the same value).
+
+        Args:
+            k (int): The index of the violated constraint.
+            variable (Any): The variable whose assignment was rejected.
+
+        Returns:
+            set: The assigned variables of the constraint that cause the failure.
+        """
+        constraint, vars_in_constraint = self.csp.constraints[k]
+        assignments = self.csp.assignments
+        check_partial = getattr(constraint, 'check_partial', None)
+        if check_partial is None:
+            return {other for other in vars_in_constraint if other != variable and assignments[other] is not None}
+
+        values = [assignments[var] for var in vars_in_constraint]
+        culprits = set()
+        for i, other in enumerate(vars_in_constraint):
+            if other == variable or values[i] is None:
+                continue
+            value = values[i]
+            values[i] = None
+            if check_partial(values):
+                values[i] = value
+                culprits.add(other)
+        return culprits
+
+    def look_ahead(self, variable: Any, value: Any) -> bool:
+        """
+        Propagates a new assignment to the domains of the other variables.
+
+        With MAC or forward checking the domain of the variable is reduced to the
+        assigned value. MAC then restores arc consistency from its constraints,
+        forward checking only prunes its direct neighbours. The changes are
+        recorded on the domain trail, so backtracking rewinds exactly them.
+
+        Args:
+            variable (Any): The variable that was just assigned.
+            value (Any): The value assigned to it.
+
+        Returns:
+            bool: False if a domain was wiped out, True otherwise.
+        """
+        if self.MAC:
+            self.csp.domains.assign(variable, value)
+            return self.apply_MAC([variable]) is not None
+        if self.forward_checking:
+            self.csp.domains.assign(variable, value)
+            return self.forward_check(variable)
+        return True
+
+    def forward_check(self, variable: Any) -> bool:
+        """
+        Removes the values of unassigned neighbours that conflict with the current assignment.
+
+        For every constraint of the variable, each value of each unassigned
+        variable in it is tested against the assigned ones, with the constraint's
+        check_partial if it has one, or with the full constraint when it is the
+        last unassigned variable.
+
+        Args:
+            variable (Any): The variable that was just assigned.
+
+        Returns:
+            bool: False if the domain of a neighbour was wiped out, True otherwise.
+        """
+        domains = self.csp.domains
+        assignments = self.csp.assignments
+
+        constraint_ids = self.var_constraint_ids[variable]
+        for index, (constraint, vars_in_constraint) in enumerate(self.csp.var_constraints.get(variable, [])):
+            check_partial = getattr(constraint, 'check_partial', None)
+            values = [assignments[var] for var in vars_in_constraint]
+            unassigned = [i for i, value in enumerate(values) if value is None]
+            if check_partial is None and len(unassigned) != 1:
+                continue
+
+            for i in unassigned:
+                neighbour = vars_in_constraint[i]
+                for candidate in domains.values(neighbour):
+                    values[i] = candidate
+                    if check_partial is not None:
+                        supported = check_partial(values)
+                    else:
+                        supported = constraint(*values)
+                    if not supported:
+                        domains.remove(neighbour, candidate)
+                values[i] = None
+
+                if domains.is_empty(neighbour):
+                    self.conflict = constraint_ids[index]
+                    return False
+        return True
 
     def select_unassigned_variable(self) -> any:
         """
@@ -78,6 +732,9 @@ class Solver(object):
         """
 
         """ You Should Code Here """
+        if self.dom_wdeg:
+            return self.dom_wdeg_variable(self.csp.unassigned_var)
+
         if self.variable_heuristic:
             return self.MRV(self.csp.unassigned_var)
 
@@ -95,76 +752,161 @@ class Solver(object):
         """
         """ You Should Code Here """
         if self.domain_heuristic:
-            return self.LCV(variable)
-        
-        return self.csp.variables[variable]
+            values = self.LCV(variable)
+        else:
+            values = self.csp.variables[variable]
+
+        if self.phase is not None:
+            preferred = self.phase.get(variable)
+            if preferred is not None and values and values[0] != preferred and preferred in values:
+                values = [preferred] + [value for value in values if value != preferred]
+        return values
 
 
 
 
-    def apply_MAC(self) -> List[Any]:
+    def apply_MAC(self, variables: List[Any] | None = None, constraints: List[int] | None = None,
+                  removals: List[Tuple[int, List[Tuple[Any, Any]]]] | None = None) -> None | List[Tuple[Any, Any]]:
         """
         Applies the Maintaining Arc Consistency (MAC) algorithm to the CSP.
 
-        This function processes all constraints in the CSP to remove values
-        from the domains of variables that are inconsistent with the constraints.
+        This function processes the constraints of the given variables (or all
+        constraints) to remove values from the domains of variables that are
+        inconsistent with the constraints, and requeues the constraints of every
+        variable whose domain shrank until nothing changes.
+
+        Args:
+            variables (List[Any], optional): The variables whose constraints are processed first. Defaults to all.
+            constraints (List[int], optional): Indices of constraints also processed first.
+            removals (list, optional): A list that receives the constraint index and the removed values of
+                                       every step that pruned something, in order. Defaults to None.
 
         Returns:
-            List[Any]: A list of values that were removed from the domains of variables.
+            List[Tuple[Any, Any]]: A list of (variable, value) pairs that were removed from the domains,
+                                   or None if the domain of a variable was wiped out.
         """
 
         """ You Should Code Here """
-        constraint_arcs = deque(self.csp.constraints)
-        
+        if variables is None and constraints is None:
+            constraint_arcs = deque(range(len(self.csp.constraints)))
+        elif constraints is None:
+            constraint_arcs = deque(dict.fromkeys(k for var in variables for k in self.var_constraint_ids[var]))
+        else:
+            constraint_arcs = deque(dict.fromkeys(
+                [k for var in variables or () for k in self.var_constraint_ids[var]] + list(constraints)))
+        queued = set(constraint_arcs)
+
         values_to_remove = []
         while constraint_arcs:
-            constraint, variables = constraint_arcs.popleft()
-            removed_values = self.multi_arc_reduce(variables, constraint)
+            k = constraint_arcs.popleft()
+            queued.discard(k)
+            constraint, vars_in_constraint = self.csp.constraints[k]
+            if self.propagators[k] is not None:
+                removed_values = self.propagators[k].filter(self.csp.domains)
+                if removed_values is None:
+                    self.conflict = k
+                    return None
+            else:
+                removed_values = self.multi_arc_reduce(constraint, vars_in_constraint, self.residues[k])
             if removed_values:
                 values_to_remove.extend(removed_values)
-
-                for var in variables:
-                    for con, vars_in_con in self.csp.var_constraints[var]:
-                        if con != constraint:
-                            constraint_arcs.append([con, vars_in_con])
+                if removals is not None:
+                    removals.append((k, removed_values))
+
+                for var in dict.fromkeys(var for var, _ in removed_values):
+                    if self.csp.domains.is_empty(var):
+                        self.conflict = k
+                        return None
+                    for other in self.var_constraint_ids[var]:
+                        if other != k and other not in queued:
+                            constraint_arcs.append(other)
+                            queued.add(other)
         return values_to_remove
-    
-    def combinations(self, variables: List[str], value_x: Any) -> List[tuple]:
-        combinations = []
-        domains = [self.csp.variables[var] for var in variables]
-
-        stack = [(0, [])]  
-
-        while stack:
-            index, current_combination = stack.pop()
-
-            if index == len(domains):
-                combinations.append((value_x, *current_combination))
-                continue
 
-            i = len(domains[index]) - 1
-            while i >= 0:  
-                value = domains[index][i]
-                stack.append((index + 1, current_combination + [value]))
-                i -= 1
-
-        return combinations
+    def find_support(self, constraint_func: Callable, variables: List[Any], position: int, value: Any,
+                     residues: dict | None = None, domain_values: List[List[Any]] | None = None) -> None | tuple:
+        """
+        Looks for one tuple of the current domains that satisfies the constraint
+        with variables[position] = value.
 
+        The residue (the last support found for this variable and value) is tried
+        first. Otherwise the tuple is built one variable at a time, and constraints
+        that provide `check_partial` prune a prefix as soon as it cannot be completed.
 
+        Args:
+            constraint_func (Callable): The constraint function.
+            variables (List[Any]): The variables of the constraint.
+            position (int): The index of the variable being supported.
+            value (Any): The value being supported.
+            residues (dict, optional): A cache from (variable, value) to the last support found.
+            domain_values (List[List[Any]], optional): The current domains of the variables, if already at hand.
 
-    def multi_arc_reduce(self, constraint_func: callable, variables: List[Any]) -> List[Tuple[Any, Any]]:
+        Returns:
+            tuple: The values of a supporting tuple, in constraint order, or None if there is none.
+        """
+        domains = self.csp.domains
+
+        if residues is not None:
+            support = residues.get((variables[position], value))
+            if support is not None:
+                masks = domains.masks
+                bit = domains.bit
+                i = 0
+                while i < len(variables) and masks[variables[i]] & bit(support[i]):
+                    i += 1
+                if i == len(variables):
+                    return support
+
+        check_partial = getattr(constraint_func, 'check_partial', None)
+        search_order = getattr(constraint_func, 'search_order', None)
+        order = search_order(len(variables)) if search_order is not None else range(len(variables))
+        order = [i for i in order if i != position]
+        if domain_values is None:
+            domain_values = [domains.values(var) for var in variables]
+
+        values = [None] * len(variables)
+        values[position] = value
+        if check_partial is not None and not check_partial(values):
+            return None
+
+        def extend(depth):
+            if depth == len(order):
+                return constraint_func(*values)
+            i = order[depth]
+            for candidate in domain_values[i]:
+                values[i] = candidate
+                if check_partial is None or check_partial(values):
+                    if extend(depth + 1):
+                        return True
+            values[i] = None
+            return False
+
+        if not extend(0):
+            return None
+
+        support = tuple(values)
+        if residues is not None:
+            # A support of one (variable, value) pair supports every pair it contains.
+            for var, supported_value in zip(variables, support):
+                residues[(var, supported_value)] = support
+        return support
+
+    def multi_arc_reduce(self, constraint_func: Callable, variables: List[Any],
+                         residues: dict | None = None) -> List[Tuple[Any, Any]]:
         """
         Reduces the domains of variables based on the specified constraint.
 
-        This function examines the current assignments of the given variables
-        and removes values from their domains that are inconsistent with the
-        provided constraints, specifically in relation to clues and prefixes.
+        This function makes the constraint generalized arc consistent: every value
+        left in the domain of one of its variables takes part in at least one tuple
+        of the current domains that satisfies the constraint. Supports are searched
+        lazily, one per (variable, value), starting from the cached residue.
 
         Args:
             constraint_func (Callable): The constraint function that defines the
                                          relationship between the variables.
             variables (List[Any]): A list of variable names whose domains are
                                    to be reduced.
+            residues (dict, optional): A cache of the last support found per (variable, value).
 
         Returns:
             List[Tuple[Any, Any]]: A list of tuples where each tuple contains
@@ -178,33 +920,17 @@ class Solver(object):
         i = 0
         while i < len(variables):
             x = variables[i]
-            ys = [v for v in variables if v != x]
-
-            j = 0
-            while j < len(self.csp.variables[x]):
-                value = self.csp.variables[x][j]
-                satisfied = False
-
-                combinations = self.combinations(ys, value)
-                k = 0
-                while k < len(combinations):
-                    if constraint_func(*combinations[k]) == True:
-                        satisfied = True
-                        break
-                    k += 1
-
-            if not satisfied:
-                self.csp.variables[x].remove(value)
-                removed_values.append((x, value))
-            else:
-                j += 1
-
-        if removed_values:
-            return removed_values
+            domain_values = [self.csp.domains.values(var) for var in variables]
+            for value in domain_values[i]:
+                if self.find_support(constraint_func, variables, i, value, residues, domain_values) is None:
+                    self.csp.domains.remove(x, value)
+                    removed_values.append((x, value))
+
+            if self.csp.domains.is_empty(x):
+                break
+            i += 1
 
-        i += 1
-
-        return None
+        return removed_values
 
 
     def binary_arc_reduce(self, x: Any, y: Any, constraint_func: callable) -> list[Any] | None:
@@ -239,20 +965,64 @@ class Solver(object):
         """
         """ You Should Code Here """
 
-        mrv_variable = variables[0]
-        mrv_variable_domain_length = len(self.csp.variables[mrv_variable])
+        domains = self.csp.domains
+        mrv_variables = []
+        mrv_variable_domain_length = None
 
         i = 0
         while i < len(variables):
             variable = variables[i]
-            if len(self.csp.variables[variable]) < mrv_variable_domain_length:
-                mrv_variable = variable
-                mrv_variable_domain_length = len(self.csp.variables[variable])
+            domain_length = domains.size(variable)
+            if mrv_variable_domain_length is None or domain_length < mrv_variable_domain_length:
+                mrv_variables = [variable]
+                mrv_variable_domain_length = domain_length
+            elif domain_length == mrv_variable_domain_length:
+                mrv_variables.append(variable)
             i += 1
 
+        mrv_variable = self.break_tie(mrv_variables)
         return mrv_variable
 
 
+    def dom_wdeg_variable(self, variables) -> Any:
+        """
+        Selects the variable with the smallest ratio of domain size to weighted degree (dom/wdeg).
+
+        The weighted degree of a variable is the sum of the weights of its
+        constraints that still have another unassigned variable.
+
+        Returns:
+            Any: The variable with the smallest dom/wdeg ratio.
+        """
+        domains = self.csp.domains
+        assignments = self.csp.assignments
+        constraints = self.csp.constraints
+
+        best_variables = []
+        best_ratio = None
+        for variable in variables:
+            weighted_degree = 0
+            for k in self.var_constraint_ids[variable]:
+                for other in constraints[k][1]:
+                    if other != variable and assignments[other] is None:
+                        weighted_degree += self.weights[k]
+                        break
+
+            ratio = domains.size(variable) / max(weighted_degree, 1)
+            if best_ratio is None or ratio < best_ratio:
+                best_variables = [variable]
+                best_ratio = ratio
+            elif ratio == best_ratio:
+                best_variables.append(variable)
+
+        return self.break_tie(best_variables)
+
+    def break_tie(self, variables: List[Any]) -> Any:
+        """Picks one of equally good variables, at random when randomization is enabled."""
+        if self.randomize and len(variables) > 1:
+            return self.random.choice(variables)
+        return variables[0]
+
     def LCV(self, variable: Any) -> List[any]:
         """
         Orders the values of a variable based on the Least Constraining Value (LCV) heuristic.
@@ -264,14 +1034,17 @@ class Solver(object):
             List[Any]: A list of values sorted based on the number of constraints they impose.
         """
         """ You Should Code Here """
+        domains = self.csp.domains
+
         def count_constraints(value):
             constraining_effect = 0
+            bit = domains.bit(value)
 
             for _, vars_in_constraint in self.csp.var_constraints.get(variable, []):
                 for var in vars_in_constraint:
                         if var != variable:
                             
-                            if value in self.csp.variables[var]:
+                            if domains.mask(var) & bit:
                                 constraining_effect += 1
             
             return constraining_effect
@@ -0,0 +1,158 @@
+from typing import Any, Dict, List, Tuple
+
+from domain_store import DomainStore
+
+
+class AllDifferentPropagator(object):
+    """
+    Régin's filtering for one AllDifferent constraint.
+
+    A value is kept in the domain of a variable only if the pair belongs to some
+    maximum matching between the variables and the values. The matching is
+    kept between calls: after backtracking, the matched pairs that are still in
+    the domains are reused and only the broken ones are repaired with
+    augmenting paths, instead of rebuilding the matching from scratch.
+
+    Attributes:
+        variables (list): The variables of the constraint.
+        match (list): The bit position of the value matched to each variable, or -1.
+    """
+
+    def __init__(self, variables: List[Any]) -> None:
+        self.variables = list(variables)
+        self.match = [-1] * len(self.variables)
+
+    def filter(self, domains: DomainStore) -> None | List[Tuple[Any, Any]]:
+        """
+        Removes every value that cannot be part of a solution of the constraint.
+
+        Args:
+            domains (DomainStore): The domains of the variables, changed in place.
+
+        Returns:
+            List[Tuple[Any, Any]]: The (variable, value) pairs that were removed, or None if
+                                   the variables cannot all take different values.
+        """
+        masks = [domains.masks[var] for var in self.variables]
+        if not self.repair_matching(masks):
+            return None
+
+        n = len(masks)
+        match = self.match
+        owner = {bit: x for x, bit in enumerate(match)}
+
+        # Value nodes are numbered n + bit. Matched edges go from variable to value,
+        # the other edges from value to variable.
+        value_edges: Dict[int, List[int]] = {}
+        for x, mask in enumerate(masks):
+            while mask:
+                low = mask & -mask
+                bit = low.bit_length() - 1
+                if bit != match[x]:
+                    value_edges.setdefault(bit, []).append(x)
+                mask ^= low
+
+        # Any edge on an alternating path that starts at a free value belongs to a maximum matching.
+        reachable = set()
+        stack = [bit for bit in value_edges if bit not in owner]
+        while stack:
+            bit = stack.pop()
+            if bit in reachable:
+                continue
+            reachable.add(bit)
+            for x in value_edges.get(bit, ()):
+                if match[x] not in reachable:
+                    stack.append(match[x])
+
+        component = self.components(n, match, value_edges)
+
+        removed = []
+        for bit, xs in value_edges.items():
+            if bit in reachable:
+                continue
+            for x in xs:
+                # An edge inside a strongly connected component lies on an even alternating cycle.
+                if component[x] != component[n + bit]:
+                    variable = self.variables[x]
+                    domains.set_mask(variable, domains.masks[variable] & ~(1 << bit))
+                    removed.append((variable, domains.value_of(1 << bit)))
+        return removed
+
+    def repair_matching(self, masks: List[int]) -> bool:
+        """
+        Drops the matched pairs that left the domains and re-matches the free variables.
+
+        Returns:
+            bool: True if every variable is matched to a different value, False otherwise.
+        """
+        match = self.match
+        owner = {}
+        for x, bit in enumerate(match):
+            if bit >= 0 and masks[x] >> bit & 1:
+                owner[bit] = x
+            else:
+                match[x] = -1
+
+        for x in range(len(masks)):
+            if match[x] < 0 and not self.augment(x, masks, owner, set()):
+                return False
+        return True
+
+    def augment(self, x: int, masks: List[int], owner: Dict[int, int], visited: set) -> bool:
+        """Looks for an augmenting path from the free variable x (Kuhn's algorithm)."""
+        mask = masks[x]
+        while mask:
+            low = mask & -mask
+            bit = low.bit_length() - 1
+            mask ^= low
+            if bit in visited:
+                continue
+            visited.add(bit)
+            other = owner.get(bit)
+            if other is None or self.augment(other, masks, owner, visited):
+                owner[bit] = x
+                self.match[x] = bit
+                return True
+        return False
+
+    @staticmethod
+    def components(n: int, match: List[int], value_edges: Dict[int, List[int]]) -> Dict[int, int]:
+        """Labels the strongly connected components of the matching graph (Tarjan's algorithm)."""
+        def successors(node):
+            if node < n:
+                return (n + match[node],)
+            return value_edges.get(node - n, ())
+
+        index = {}
+        low = {}
+        component = {}
+        on_stack = set()
+        stack = []
+        counter = [0]
+
+        def visit(node):
+            index[node] = low[node] = counter[0]
+            counter[0] += 1
+            stack.append(node)
+            on_stack.add(node)
+            for nxt in successors(node):
+                if nxt not in index:
+                    visit(nxt)
+                    low[node] = min(low[node], low[nxt])
+                elif nxt in on_stack:
+                    low[node] = min(low[node], index[nxt])
+            if low[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component[member] = node
+                    if member == node:
+                        break
+
+        for x in range(n):
+            if x not in index:
+                visit(x)
+        for bit in value_edges:
+            if n + bit not in index:
+                visit(n + bit)
+        return component
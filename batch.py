@@ -0,0 +1,307 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+from map_reader import read_puzzle
+from puzzle_store import PuzzleStore
+from skyscraper import add_solver_arguments, build_csp, solver_options
+from solution_cache import SolutionCache
+from Solver import Solver
+
+
+class PuzzleTimeout(Exception):
+    """Raised inside a worker when a puzzle runs past its time limit."""
+
+
+def _on_timeout(signum, frame) -> None:
+    raise PuzzleTimeout()
+
+
+# The solver options, time limit and solution count limit of a worker process, set once by _init_worker.
+_options = {}
+_timeout = None
+_count = None
+
+
+def _init_worker(options: Dict[str, Any], timeout: float | None, count: int | None = None) -> None:
+    """Configures a worker process."""
+    global _options, _timeout, _count
+    _options = options
+    _timeout = timeout
+    _count = count
+    if timeout is not None:
+        signal.signal(signal.SIGALRM, _on_timeout)
+
+
+def read_puzzles(paths: List[str]) -> Iterator[Tuple[str, Any, Dict[Tuple[int, int], int]]]:
+    """
+    Yields the puzzles found in map files, directories of map files, JSONL files and puzzle stores.
+
+    A directory contributes its `*.txt` files in name order. Every line of a
+    `.jsonl` file (or of the standard input, given as '-') is an object with the
+    clues as "clues": [top, bottom, left, right], or as separate "top", "bottom",
+    "left" and "right" keys, an optional "id" and optional "givens" as a list of
+    [row, column, height]. A `.skyb` file is a binary store written by
+    puzzle_store.py. Puzzles that cannot be read are yielded with the error
+    message instead of the clues, so that they show up in the results.
+
+    Args:
+        paths (list): The files and directories to read.
+
+    Returns:
+        Iterator: (id, clues, givens) triples, where clues is (top, bottom, left, right) or an error message.
+    """
+    for path in paths:
+        if path.endswith('.skyb'):
+            try:
+                store = PuzzleStore(path)
+            except (OSError, ValueError) as error:
+                yield path, f"unreadable puzzle store: {error!r}", {}
+                continue
+            with store:
+                for index, (clues, givens) in enumerate(store):
+                    yield f"{path}:{index}", clues, givens
+        elif path == '-' or path.endswith('.jsonl'):
+            stream = sys.stdin if path == '-' else open(path, 'r')
+            try:
+                for number, line in enumerate(stream, 1):
+                    if not line.strip():
+                        continue
+                    default_id = f"{path}:{number}"
+                    try:
+                        puzzle = json.loads(line)
+                        if 'clues' in puzzle:
+                            clues = tuple(list(map(int, side)) for side in puzzle['clues'])
+                        else:
+                            clues = tuple(list(map(int, puzzle[side])) for side in ('top', 'bottom', 'left', 'right'))
+                        givens = {(int(i), int(j)): int(height) for i, j, height in puzzle.get('givens', ())}
+                        yield str(puzzle.get('id', default_id)), clues, givens
+                    except (ValueError, KeyError, TypeError) as error:
+                        yield default_id, f"unreadable puzzle: {error!r}", {}
+            finally:
+                if stream is not sys.stdin:
+                    stream.close()
+        elif os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith('.txt'):
+                    yield from read_puzzles([os.path.join(path, name)])
+        else:
+            try:
+                clues, givens = read_puzzle(path)
+            except (OSError, ValueError) as error:
+                yield path, f"unreadable puzzle: {error!r}", {}
+            else:
+                yield path, clues, givens
+
+
+def solve_puzzle(task: Tuple[int, Tuple[str, Any, Dict[Tuple[int, int], int]]]) -> Tuple[int, Dict[str, Any]]:
+    """
+    Solves one puzzle in a worker process.
+
+    Args:
+        task (tuple): The position of the puzzle in the input, which identifies it even when
+                      ids repeat, and the (id, clues, givens) of the puzzle.
+
+    Returns:
+        tuple: The position of the puzzle and its result record, with the id, the status ('solved', 'unsolvable', 'unknown'
+              when a search limit was reached, 'timeout' or 'error'), the solution grid, the
+              number of assignments, the wall time in seconds, and the search statistics if
+              they are enabled. When solutions are counted, the record also holds the number
+              found, up to the limit. Unknown records give the limit that was reached as 'reason'.
+    """
+    number, (puzzle_id, clues, givens) = task
+    record = {'id': puzzle_id, 'status': 'error', 'solution': None, 'assignments': 0, 'time': 0.0}
+    if isinstance(clues, str):
+        record['error'] = clues
+        return number, record
+
+    start = time.perf_counter()
+    csp = None
+    solver = None
+    try:
+        if _timeout is not None:
+            signal.setitimer(signal.ITIMER_REAL, _timeout)
+        csp = build_csp(clues, givens)
+        solver = Solver(csp, clues=clues, **_options)
+        checkpoint = csp.domains.checkpoint()
+        solution = solver.solve()
+        if _count is not None:
+            record['solutions'] = 0
+            if solution is not None:
+                # The count builds no solution dictionary, so it runs again from the puzzle after the first search.
+                for var in solution:
+                    csp.un_assign([], var)
+                csp.domains.rewind(checkpoint)
+                record['solutions'] = solver.count_solutions(_count)
+        if solution is None:
+            record['status'] = 'unsolvable'
+        else:
+            record['status'] = 'solved'
+            n = len(clues[0])
+            record['solution'] = [[solution[(i, j)] for j in range(n)] for i in range(n)]
+        if solver.status == 'unknown':
+            # A counted puzzle may have a solution, but the count stopped before the limit.
+            record['status'] = 'unknown'
+            record['reason'] = solver.limit_reason
+    except PuzzleTimeout:
+        record['status'] = 'timeout'
+    except Exception as error:
+        record['error'] = repr(error)
+    finally:
+        if _timeout is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    record['time'] = round(time.perf_counter() - start, 6)
+    if csp is not None:
+        record['assignments'] = csp.assignments_number
+    if solver is not None and solver.stats.enabled:
+        record['stats'] = solver.stats.as_dict()
+    return number, record
+
+
+def cached_result(task: Tuple[int, Tuple[str, Any, Dict[Tuple[int, int], int]]], cache: SolutionCache,
+                  pending: Dict[int, Tuple]) -> None | Dict[str, Any]:
+    """
+    Looks a numbered puzzle up in a cache.
+
+    The clues and givens of a puzzle that is not in the cache are kept in
+    `pending` by position in the input (ids may repeat), so that its result
+    can be stored once it comes back.
+
+    Returns:
+        dict: The result record of a cached puzzle (see solve_puzzle), or None if it has to be solved.
+    """
+    number, (puzzle_id, clues, givens) = task
+    if isinstance(clues, str):
+        return None
+    start = time.perf_counter()
+    found, grid = cache.lookup(clues, givens)
+    if not found:
+        pending[number] = (clues, givens)
+        return None
+    return {'id': puzzle_id, 'status': 'unsolvable' if grid is None else 'solved', 'solution': grid,
+            'assignments': 0, 'time': round(time.perf_counter() - start, 6), 'cached': True}
+
+
+def solve_batch(paths: List[str], options: Dict[str, Any], workers: int | None = None,
+                timeout: float | None = None, count: int | None = None,
+                cache: SolutionCache | None = None) -> Iterator[Dict[str, Any]]:
+    """
+    Solves many puzzles in a process pool and yields the results as they complete.
+
+    The worker processes are started once and reused for every puzzle, so the
+    interpreter startup is paid once per worker instead of once per puzzle.
+
+    Args:
+        paths (list): The map files, directories and JSONL files to solve (see read_puzzles).
+        options (dict): The keyword arguments of Solver.
+        workers (int, optional): The number of worker processes. Defaults to the number of CPU cores.
+        timeout (float, optional): The time limit of each puzzle in seconds. Defaults to no limit.
+        count (int, optional): Count the solutions of each puzzle up to this number. Defaults to not counting.
+        cache (SolutionCache, optional): A cache that answers the puzzles solved before, or their rotations
+                                         and reflections, and keeps the new results. It is not used
+                                         when solutions are counted. Defaults to None.
+
+    Returns:
+        Iterator: The result record of every puzzle (see solve_puzzle), in completion order.
+    """
+    tasks = enumerate(read_puzzles(paths))
+    pending = {}
+    lookups = None
+    if cache is not None and count is None:
+        # The lookups and the stores both run in this thread: the puzzles missing from the cache are
+        # handed to the pool through a queue, which the thread of the pool that feeds the workers reads.
+        lookups, misses = tasks, queue.Queue()
+        tasks = iter(misses.get, None)
+    with multiprocessing.Pool(workers or os.cpu_count() or 1, initializer=_init_worker,
+                              initargs=(options, timeout, count)) as pool:
+        results = pool.imap_unordered(solve_puzzle, tasks)
+        try:
+            while True:
+                if lookups is not None:
+                    task = next(lookups, None)
+                    if task is None:
+                        misses.put(None)
+                        lookups = None
+                    else:
+                        hit = cached_result(task, cache, pending)
+                        if hit is not None:
+                            yield hit
+                        else:
+                            misses.put(task)
+                try:
+                    # While puzzles are still looked up, only the results that are ready are taken.
+                    number, record = results.next(timeout=0 if lookups is not None else None)
+                except multiprocessing.TimeoutError:
+                    continue
+                except StopIteration:
+                    break
+                puzzle = pending.pop(number, None)
+                if puzzle is not None and record['status'] in ('solved', 'unsolvable'):
+                    cache.store(*puzzle, record['solution'])
+                yield record
+        finally:
+            # The feeding thread must see the end of the queue, or the pool could not be terminated.
+            if lookups is not None:
+                misses.put(None)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve many skyscraper puzzles and write the results as JSONL")
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="Map files, directories of map files, JSONL files of puzzles ('-' reads JSONL from the standard input) "
+             "or puzzle stores (.skyb)"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="File to write the results to (defaults to the standard output)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes (defaults to the number of CPU cores)"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Time limit of each puzzle in seconds"
+    )
+    parser.add_argument(
+        "--count_solutions",
+        type=int,
+        metavar="K",
+        help="Count the solutions of each puzzle, up to K (2 checks that the solution is unique)"
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="PATH",
+        help="Database of solved puzzles, kept across runs, that answers repeated puzzles and their "
+             "rotations and reflections without solving them"
+    )
+    add_solver_arguments(parser)
+
+    args = parser.parse_args()
+    if args.count_solutions is not None and args.count_solutions < 1:
+        parser.error("--count_solutions must be at least 1")
+    if args.backjumping and (args.maintaining_arc_consistency or args.forward_checking):
+        parser.error("--backjumping cannot be combined with --forward_checking or --maintaining_arc_consistency")
+    cache = SolutionCache(path=args.cache) if args.cache else None
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for result in solve_batch(args.inputs, solver_options(args), args.workers, args.timeout,
+                                  args.count_solutions, cache):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if cache is not None:
+            cache.close()
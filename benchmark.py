@@ -0,0 +1,242 @@
+import argparse
+import itertools
+import json
+import platform
+import signal
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from line_solver import MAX_LINE_SIZE
+from skyscraper import build_csp
+from Solver import Solver
+from test_case_generator import batch_clues, sample_latin_squares
+
+
+class RunTimeout(Exception):
+    """Raised when a benchmark run goes past its time limit."""
+
+
+def _on_timeout(signum, frame) -> None:
+    raise RunTimeout()
+
+
+def configurations() -> Dict[str, Dict[str, Any]]:
+    """
+    Returns every Solver flag combination, by name.
+
+    Value ordering (default or LCV), variable ordering (static, MRV or dom/wdeg),
+    look-ahead (none, FC, MAC or backjumping) and restarts (none or Luby) are
+    combined, except backjumping with restarts, which it does not use. The line
+    search, which ignores the other flags, is added on its own.
+
+    Returns:
+        dict: The keyword arguments of Solver for every configuration, keyed by a name such as 'lcv+mrv+MAC'.
+    """
+    configs = {}
+    for lcv, order, search, restarts in itertools.product((False, True), (None, 'mrv', 'wdeg'),
+                                                          (None, 'fc', 'MAC', 'cbj'), (None, 'luby')):
+        if search == 'cbj' and restarts is not None:
+            continue
+        config = dict(domain_heuristics=lcv, variable_heuristics=order == 'mrv', dom_wdeg=order == 'wdeg',
+                      forward_checking=search == 'fc', MAC=search == 'MAC', backjumping=search == 'cbj',
+                      restarts=restarts, seed=0 if restarts is not None else None)
+        name = '+'.join(part for part in ('lcv' if lcv else None, order, search, restarts) if part) or 'bt'
+        configs[name] = config
+    configs['lines'] = dict(line_search=True)
+    return configs
+
+
+def generate_puzzles(size: int, count: int, seed: int) -> List[Tuple[List[int], ...]]:
+    """
+    Generates the same puzzles for a given size and seed on every run, from uniformly sampled Latin squares.
+
+    Returns:
+        list: The clues (top, bottom, left, right) of every puzzle.
+    """
+    rng = np.random.default_rng(seed * 1000 + size)
+    return [tuple(clues) for clues in batch_clues(sample_latin_squares(size, count, rng)).tolist()]
+
+
+def run_once(clues: Tuple[List[int], ...], config: Dict[str, Any], timeout: float | None,
+             trace_memory: bool = False) -> Dict[str, Any]:
+    """
+    Solves a puzzle once with a fresh CSP and solver.
+
+    Returns:
+        dict: The status ('solved', 'unsolvable' or 'timeout'), the wall time in seconds,
+              the number of assignments and constraint checks, and the peak memory in bytes
+              when trace_memory is set.
+    """
+    csp = build_csp(clues)
+    solver = Solver(csp, clues=clues, **config)
+    if trace_memory:
+        tracemalloc.start()
+    if timeout is not None:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    start = time.perf_counter()
+    try:
+        status = 'unsolvable' if solver.solve() is None else 'solved'
+    except (RunTimeout, RecursionError):
+        status = 'timeout'
+    finally:
+        elapsed = time.perf_counter() - start
+        if timeout is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    result = {'status': status, 'time': elapsed, 'assignments': csp.assignments_number,
+              'checks': csp.checks_number}
+    if trace_memory:
+        result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def run_benchmark(sizes: List[int], config_names: List[str], puzzles: int, seed: int, warmup: int,
+                  repetitions: int, timeout: float | None) -> Dict[str, Any]:
+    """
+    Runs every configuration on every generated puzzle.
+
+    Each (configuration, puzzle) pair is run `warmup` times without recording,
+    then `repetitions` times for the wall time (the median is reported), then
+    once more under tracemalloc for the peak memory, which slows the run down
+    too much to be timed together. A configuration that times out on a puzzle
+    is not run on the larger sizes, and the line search is not run above
+    MAX_LINE_SIZE, which it does not support.
+
+    Returns:
+        dict: The benchmark results, ready to be stored as JSON.
+    """
+    all_configs = configurations()
+    signal.signal(signal.SIGALRM, _on_timeout)
+    results = []
+    gave_up = set()
+
+    for size in sizes:
+        puzzle_set = generate_puzzles(size, puzzles, seed)
+        for name in config_names:
+            if name in gave_up:
+                continue
+            config = all_configs[name]
+            if config.get('line_search') and size > MAX_LINE_SIZE:
+                continue
+            for index, clues in enumerate(puzzle_set):
+                for _ in range(warmup):
+                    run_once(clues, config, timeout)
+                runs = [run_once(clues, config, timeout) for _ in range(repetitions)]
+                memory = run_once(clues, config, timeout, trace_memory=True)
+
+                status = runs[-1]['status']
+                record = {'config': name, 'size': size, 'puzzle': index, 'status': status,
+                          'time': statistics.median(run['time'] for run in runs),
+                          'times': [run['time'] for run in runs],
+                          'assignments': runs[-1]['assignments'], 'checks': runs[-1]['checks'],
+                          'peak_memory': memory['peak_memory']}
+                results.append(record)
+                print(f"{name:>22} n={size:<3} #{index}  {status:<10} {record['time']:.4f}s  "
+                      f"{record['assignments']} assignments  {record['checks']} checks", file=sys.stderr)
+                if status == 'timeout':
+                    gave_up.add(name)
+                    break
+
+    return {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(),
+                 'generator': 'jacobson-matthews', 'seed': seed,
+                 'sizes': sizes, 'puzzles': puzzles, 'warmup': warmup, 'repetitions': repetitions,
+                 'timeout': timeout},
+        'results': results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float,
+            min_time: float) -> List[str]:
+    """
+    Lists the regressions of a benchmark run against a baseline.
+
+    A (configuration, size, puzzle) entry regresses when it no longer solves
+    the puzzle in time, or when its median wall time, assignments or constraint
+    checks grow by more than `threshold` (as a fraction). Times below `min_time`
+    seconds on both sides are too noisy to compare and are skipped.
+
+    Returns:
+        list: A description of every regression.
+    """
+    def key(record):
+        return record['config'], record['size'], record['puzzle']
+
+    old_results = {key(record): record for record in baseline['results']}
+    regressions = []
+    for record in current['results']:
+        old = old_results.get(key(record))
+        if old is None:
+            continue
+        name = f"{record['config']} n={record['size']} #{record['puzzle']}"
+        if old['status'] != 'timeout' and record['status'] == 'timeout':
+            regressions.append(f"{name}: now times out")
+            continue
+        if old['status'] == 'timeout' or record['status'] == 'timeout':
+            continue
+
+        if max(old['time'], record['time']) >= min_time and record['time'] > old['time'] * (1 + threshold):
+            regressions.append(f"{name}: time {old['time']:.4f}s -> {record['time']:.4f}s")
+        for metric in ('assignments', 'checks'):
+            if record[metric] > old[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {old[metric]} -> {record[metric]}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the solver configurations on generated puzzles")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmark and store the results as JSON")
+    run_parser.add_argument("-o", "--output", default="benchmark.json", help="File to write the results to")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=list(range(4, 13)), help="Grid sizes to run")
+    run_parser.add_argument("--configs", nargs="+", help="Configurations to run (defaults to all of them)")
+    run_parser.add_argument("--puzzles", type=int, default=3, help="Number of puzzles per size")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed of the generated puzzles")
+    run_parser.add_argument("--warmup", type=int, default=1, help="Unrecorded runs before timing")
+    run_parser.add_argument("--repetitions", type=int, default=3, help="Timed runs per puzzle")
+    run_parser.add_argument("--timeout", type=float, default=10.0, help="Time limit of each run in seconds")
+    run_parser.add_argument("--list", action="store_true", help="List the configurations and exit")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare a benchmark run against a baseline")
+    compare_parser.add_argument("baseline", help="Results of the baseline run")
+    compare_parser.add_argument("current", help="Results of the run to check")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="Relative increase above which a metric counts as a regression")
+    compare_parser.add_argument("--min-time", type=float, default=0.001,
+                                help="Times below this many seconds are not compared")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        names = list(configurations())
+        if args.list:
+            print('\n'.join(names))
+            sys.exit(0)
+        unknown = set(args.configs or ()) - set(names)
+        if unknown:
+            parser.error(f"unknown configurations: {', '.join(sorted(unknown))}")
+
+        report = run_benchmark(args.sizes, args.configs or names, args.puzzles, args.seed, args.warmup,
+                               args.repetitions, args.timeout)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results of {len(report['results'])} runs written to {args.output}", file=sys.stderr)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        if baseline['meta'].get('generator') != current['meta'].get('generator'):
+            parser.error("the two runs were made on puzzles from different generators, run the baseline again")
+        regressions = compare(baseline, current, args.threshold, args.min_time)
+        for regression in regressions:
+            print(regression)
+        print(f"{len(regressions)} regressions", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,152 @@
+from typing import List, Sequence
+
+from alldifferent import AllDifferentPropagator
+
+
+class AllDifferent(object):
+    """
+    The distinction constraint of a row or column: all of its cells take different values.
+
+    Calling the object checks a fully assigned line, check_partial checks the
+    assigned cells of a partial one, and propagator builds the matching-based
+    filtering used to prune the domains of the line during search.
+    """
+
+    def __init__(self) -> None:
+        self.__name__ = 'distinction_constraint'
+
+    def __call__(self, *args) -> bool:
+        return len(set(args)) == len(args)
+
+    def check_partial(self, values: List) -> bool:
+        assigned = [value for value in values if value is not None]
+        return len(set(assigned)) == len(assigned)
+
+    def propagator(self, variables: List) -> AllDifferentPropagator:
+        return AllDifferentPropagator(variables)
+
+    def __repr__(self) -> str:
+        return self.__name__
+
+
+distinction_constraint = AllDifferent()
+
+
+def visibility_constraint(*args, clues, direction):
+    if direction == 'left' or direction == 'down':
+        ordering = args
+    else:
+        ordering = args[::-1]
+
+    visible = 0
+    max_height = 0
+    for height in ordering:
+        if height > max_height:
+            visible += 1
+            max_height = height
+    return (visible == clues)
+
+
+def visibility_prefix_check(values: List, clues: int, direction: str) -> bool:
+    """
+    Checks whether a partially assigned line can still show `clues` buildings (see visible_prefix_check).
+
+    Args:
+        values (list): The heights of the line in constraint order, None for unassigned cells.
+        clues (int): The number of buildings that must be visible.
+        direction (str): The direction the line is looked along ('left', 'right', 'down' or 'up').
+
+    Returns:
+        bool: False if no completion of the line can satisfy the clue, True otherwise.
+    """
+    n = len(values)
+    if direction == 'left' or direction == 'down':
+        return visible_prefix_check(values, range(n), clues)
+    return visible_prefix_check(values, range(n - 1, -1, -1), clues)
+
+
+def visible_prefix_check(values: List, order: Sequence[int], clues: int) -> bool:
+    """
+    Checks whether the cells `order` of `values`, seen in that order, can still show `clues` buildings.
+
+    The running maximum and visible count are kept over the assigned prefix seen
+    from the clue's side. The prefix is rejected when even the best completion
+    cannot reach the clue (upper bound) or when the buildings already visible,
+    plus the tallest one still to come, exceed it (lower bound). The line is
+    read through `order`, so the compiled network checks its values array
+    directly (see network.CompiledVisibility).
+
+    Args:
+        values (list): The heights, None for unassigned cells.
+        order (sequence): The positions of the line in `values`, from the clue's side.
+        clues (int): The number of buildings that must be visible.
+
+    Returns:
+        bool: False if no completion of the line can satisfy the clue, True otherwise.
+    """
+    n = len(order)
+    visible = 0
+    max_height = 0
+    position = 0
+    for index in order:
+        height = values[index]
+        if height is None:
+            break
+        if height > max_height:
+            visible += 1
+            max_height = height
+        position += 1
+
+    # Nothing behind the tallest building can be seen.
+    if max_height == n:
+        return visible == clues
+
+    # The tallest building is still to come and will be seen.
+    if visible + 1 > clues:
+        return False
+
+    # Only heights above the current maximum can still become visible, at most one per cell
+    # up to the tallest building if it has already been placed further along the line.
+    remaining = n - position
+    later = position
+    while later < n:
+        if values[order[later]] == n:
+            remaining = later - position + 1
+            break
+        later += 1
+    return visible + min(remaining, n - max_height) >= clues
+
+
+class Visibility(object):
+    """
+    A visibility constraint for one clue, seen from one side of a row or column.
+
+    Calling the object checks a fully assigned line, like visibility_constraint,
+    and check_partial rejects a partially assigned line as early as possible.
+
+    Attributes:
+        clues (int): The number of buildings that must be visible.
+        direction (str): The direction the line is looked along ('left', 'right', 'down' or 'up').
+    """
+
+    names = {'left': 'see_from_left', 'right': 'see_from_right', 'down': 'see_from_top', 'up': 'see_from_bottom'}
+
+    def __init__(self, clues: int, direction: str) -> None:
+        self.clues = clues
+        self.direction = direction
+        self.__name__ = self.names[direction]
+
+    def __call__(self, *args) -> bool:
+        return visibility_constraint(*args, clues=self.clues, direction=self.direction)
+
+    def check_partial(self, values: List) -> bool:
+        return visibility_prefix_check(values, self.clues, self.direction)
+
+    def search_order(self, n: int) -> List[int]:
+        """Returns the positions of the line in the order the clue looks along it."""
+        if self.direction == 'left' or self.direction == 'down':
+            return list(range(n))
+        return list(range(n - 1, -1, -1))
+
+    def __repr__(self) -> str:
+        return f"{self.__name__}({self.clues})"
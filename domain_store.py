@@ -0,0 +1,207 @@
+from collections.abc import Mapping
+from typing import Any, Iterator, List
+
+
+class DomainStore(object):
+    """
+    Stores the domain of every variable as an integer bitmask.
+
+    Every distinct value seen by the store gets a bit position, in the order the
+    values were first added (so for numeric ranges the bit order is the numeric
+    order). Each change to a mask is recorded on a trail, which allows the solver
+    to take a checkpoint before a decision and rewind to it on backtrack.
+
+    Attributes:
+        masks (dict): A dictionary that maps variables to their domain bitmask.
+        trail (list): A list of (variable, previous_mask) pairs in change order.
+
+    Methods:
+        add(variable, domain): Registers a variable with its initial domain.
+        remove(variable, value): Removes a value from the domain of a variable.
+        checkpoint(): Returns a mark that can later be passed to rewind.
+        rewind(mark): Undoes every domain change made after the mark.
+        commit(): Forgets the trail, keeping the current domains.
+    """
+
+    def __init__(self) -> None:
+        self.masks = {}
+        self.trail = []
+        self._values = []
+        self._bits = {}
+
+    def add(self, variable: Any, domain: List) -> None:
+        """
+        Registers a variable with its initial domain.
+
+        Args:
+            variable (any): The variable to be added.
+            domain (list): The values of the domain of the variable.
+
+        Returns:
+            None
+        """
+        mask = 0
+        for value in domain:
+            bit = self._bits.get(value)
+            if bit is None:
+                bit = len(self._values)
+                self._bits[value] = bit
+                self._values.append(value)
+            mask |= 1 << bit
+        self.masks[variable] = mask
+
+    def bit(self, value: Any) -> int:
+        """Returns the single-bit mask of a value, or 0 if the value is unknown."""
+        bit = self._bits.get(value)
+        if bit is None:
+            return 0
+        return 1 << bit
+
+    def value_of(self, bit_mask: int) -> Any:
+        """Returns the value represented by the lowest set bit of a mask."""
+        return self._values[(bit_mask & -bit_mask).bit_length() - 1]
+
+    def mask_of(self, values: List) -> int:
+        """Returns the mask that contains exactly the given values."""
+        mask = 0
+        for value in values:
+            mask |= self.bit(value)
+        return mask
+
+    def values_of(self, mask: int) -> List[Any]:
+        """Returns the values contained in a mask, in bit order."""
+        values = []
+        while mask:
+            low = mask & -mask
+            values.append(self._values[low.bit_length() - 1])
+            mask ^= low
+        return values
+
+    def mask(self, variable: Any) -> int:
+        return self.masks[variable]
+
+    def values(self, variable: Any) -> List[Any]:
+        """Returns the current domain of a variable as a list."""
+        return self.values_of(self.masks[variable])
+
+    def size(self, variable: Any) -> int:
+        return self.masks[variable].bit_count()
+
+    def contains(self, variable: Any, value: Any) -> bool:
+        return bool(self.masks[variable] & self.bit(value))
+
+    def is_empty(self, variable: Any) -> bool:
+        return self.masks[variable] == 0
+
+    def min(self, variable: Any) -> Any:
+        """Returns the smallest value (lowest bit) in the domain of a variable."""
+        return self.value_of(self.masks[variable])
+
+    def max(self, variable: Any) -> Any:
+        """Returns the largest value (highest bit) in the domain of a variable."""
+        return self._values[self.masks[variable].bit_length() - 1]
+
+    def set_mask(self, variable: Any, mask: int) -> bool:
+        """
+        Replaces the domain of a variable, recording the old mask on the trail.
+
+        Args:
+            variable (any): The variable whose domain is replaced.
+            mask (int): The new domain bitmask.
+
+        Returns:
+            bool: True if the domain changed, False otherwise.
+        """
+        old = self.masks[variable]
+        if old == mask:
+            return False
+        self.trail.append((variable, old))
+        self.masks[variable] = mask
+        return True
+
+    def remove(self, variable: Any, value: Any) -> bool:
+        """
+        Removes a value from the domain of a variable.
+
+        Returns:
+            bool: True if the value was in the domain and got removed, False otherwise.
+        """
+        old = self.masks[variable]
+        bit = self.bit(value)
+        if not old & bit:
+            return False
+        self.trail.append((variable, old))
+        self.masks[variable] = old & ~bit
+        return True
+
+    def restore(self, variable: Any, value: Any) -> bool:
+        """
+        Puts a value back into the domain of a variable.
+
+        Returns:
+            bool: True if the value was missing and got restored, False otherwise.
+        """
+        old = self.masks[variable]
+        bit = self.bit(value)
+        if old & bit:
+            return False
+        self.trail.append((variable, old))
+        self.masks[variable] = old | bit
+        return True
+
+    def assign(self, variable: Any, value: Any) -> bool:
+        """Reduces the domain of a variable to the single given value."""
+        return self.set_mask(variable, self.masks[variable] & self.bit(value))
+
+    def checkpoint(self) -> int:
+        """
+        Returns a mark for the current state of all domains.
+
+        Returns:
+            int: The current length of the trail.
+        """
+        return len(self.trail)
+
+    def rewind(self, mark: int) -> None:
+        """
+        Restores every domain to the state it had when the mark was taken.
+
+        Args:
+            mark (int): A value previously returned by checkpoint.
+
+        Returns:
+            None
+        """
+        trail = self.trail
+        masks = self.masks
+        while len(trail) > mark:
+            variable, old = trail.pop()
+            masks[variable] = old
+
+    def commit(self) -> None:
+        """Forgets the trail, so the current domains become the ones nothing can be rewound past."""
+        self.trail.clear()
+
+
+class DomainView(Mapping):
+    """
+    A read-only mapping from variables to their current domain as a list.
+
+    It keeps the `csp.variables[var]` interface working on top of a DomainStore.
+    """
+
+    def __init__(self, store: DomainStore) -> None:
+        self._store = store
+
+    def __getitem__(self, variable: Any) -> List[Any]:
+        return self._store.values(variable)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._store.masks)
+
+    def __len__(self) -> int:
+        return len(self._store.masks)
+
+    def __contains__(self, variable: Any) -> bool:
+        return variable in self._store.masks
+
@@ -1,18 +1,28 @@
+import time
 import tkinter as tk
 import Solver
 from Solver import Solver
-import time
+from solve_worker import SolveWorker
 
 
 class SkyscraperPuzzleGUI:
+    # The time between two progress updates of a running solve, in milliseconds.
+    refresh_interval = 100
+    # The time between two frames of a replay, in milliseconds.
+    frame_interval = 33
+
     def __init__(self, root, grid_size, solver: Solver):
         self.root = root
         self.grid_size = grid_size
         self.cells = {}
+        self.shown = {}
         self.counter = 0
         self.clues = []
+        self.worker = None
+        self.replay = None
         self.create_widgets()
         self.solver = solver
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
 
     def create_widgets(self):
@@ -31,6 +41,10 @@ class SkyscraperPuzzleGUI:
         self.timer_label = tk.Label(self.counter_frame_top, text="Elapsed Time: 0s", font=("Arial", 20, "bold"))
         self.timer_label.pack()
 
+        # Progress of a running solve: speed and depth of the search
+        self.progress_label = tk.Label(self.counter_frame_top, text="", font=("Arial", 14))
+        self.progress_label.pack()
+
         # Create a frame to center the puzzle grid
         self.grid_frame = tk.Frame(self.root)
         self.grid_frame.pack(pady=20)
@@ -38,9 +52,14 @@ class SkyscraperPuzzleGUI:
         # Create the grid and the clues
         self.create_grid()
 
-        # Add a "Solve" button centered below the grid
-        solve_button = tk.Button(self.root, text="Solve", command=self.solve_puzzle, font=("Arial", 14))
-        solve_button.pack(pady=20)
+        # Add the "Solve" and "Cancel" buttons centered below the grid
+        button_frame = tk.Frame(self.root)
+        button_frame.pack(pady=20)
+        self.solve_button = tk.Button(button_frame, text="Solve", command=self.solve_puzzle, font=("Arial", 14))
+        self.solve_button.pack(side=tk.LEFT, padx=10)
+        self.cancel_button = tk.Button(button_frame, text="Cancel", command=self.cancel_solve, font=("Arial", 14),
+                                       state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=10)
 
     def create_grid(self):
         """Creates the grid with white cells and black borders."""
@@ -56,7 +75,9 @@ class SkyscraperPuzzleGUI:
                 self.cells[(row, col)] = cell
 
     def add_clue(self, row, col, number, direction):
-        """Add a clue dynamically around the grid."""
+        """Add a clue dynamically around the grid. Missing clues (0) are left out."""
+        if not number:
+            return
         # Create a frame for the clue and triangle to ensure proper layout
         clue_frame = tk.Frame(self.grid_frame)
         clue_frame.grid(row=row, column=col, sticky="nsew")
@@ -99,22 +120,183 @@ class SkyscraperPuzzleGUI:
         if (row, col) in self.cells:
             self.cells[(row, col)].config(text="", bg="white")
 
+    def show_assignments(self, assignments):
+        """Shows the values the search has currently assigned, only updating the cells that changed."""
+        for cell, value in assignments.items():
+            if self.shown.get(cell) == value:
+                continue
+            self.shown[cell] = value
+            if value is None:
+                self.clear_number(*cell)
+            elif cell in self.cells:
+                self.cells[cell].config(text=str(value), bg='lightyellow')
+
     def update_counter_label(self, number):
         """Update the counter labels with the current counter value."""
         self.counter_label_top.config(text=f"Number of Assignments : {number}")
 
 
     def solve_puzzle(self):
-        """Solve the puzzle using the CSP solver and display the solution."""
-        self.start_time = time.time()
-        solution = dict(self.solver.backtrack_solver())
-        elapsed_time = int(time.time() - self.start_time)
-        self.update_counter_label(self.solver.csp.assignments_number)
-        self.timer_label.config(text=f"Elapsed Time: {elapsed_time}s")
-        if solution:
+        """
+        Starts the solver in a background thread and follows its progress.
+
+        The window stays responsive during the search: every refresh_interval
+        milliseconds, poll_solver shows the number of assignments, their rate,
+        the depth of the search, the elapsed time and the cells assigned so far.
+        """
+        if self.worker is not None:
+            return
+        self.worker = SolveWorker(self.solver)
+        self.solve_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.last_progress = (0.0, self.solver.csp.assignments_number)
+        self.worker.start()
+        self.root.after(self.refresh_interval, self.poll_solver)
+
+    def poll_solver(self):
+        """Shows the progress of the running solve, and its result once it is done."""
+        worker = self.worker
+        # A cancelled search that is still unwinding, or running in other processes, is not waited for.
+        if not worker.running or worker.cancelled:
+            self.finish_solve()
+            return
+
+        elapsed = worker.elapsed
+        assignments = worker.assignments
+        last_elapsed, last_assignments = self.last_progress
+        rate = (assignments - last_assignments) / max(elapsed - last_elapsed, 1e-9)
+        self.last_progress = (elapsed, assignments)
+
+        self.update_counter_label(assignments)
+        self.timer_label.config(text=f"Elapsed Time: {elapsed:.1f}s")
+        self.progress_label.config(text=f"{rate:,.0f} assignments/s, depth {worker.depth}")
+        self.show_assignments(worker.snapshot())
+        self.root.after(self.refresh_interval, self.poll_solver)
+
+    def finish_solve(self):
+        """Displays the result of the solve."""
+        worker = self.worker
+        self.cancel_button.config(state=tk.DISABLED)
+        self.update_counter_label(worker.assignments)
+        self.timer_label.config(text=f"Elapsed Time: {worker.elapsed:.3f}s")
+        if worker.solution:
+            self.progress_label.config(text="Solved")
             # Update each cell in the grid with the values from the solution
-            for (i, j), value in solution.items():
+            for (i, j), value in worker.solution.items():
                 self.set_number(i, j, value)
+        elif worker.cancelled:
+            self.progress_label.config(text="Cancelled")
+        elif isinstance(self.solver, Solver) and self.solver.status == 'unknown':
+            self.progress_label.config(text=f"Search stopped: {self.solver.limit_reason} limit reached")
+        elif worker.error is not None:
+            self.progress_label.config(text=f"Error: {worker.error!r}")
         else:
+            self.progress_label.config(text="No solution found!")
             print("No solution found!")
 
+    def cancel_solve(self):
+        """Stops the running solve."""
+        if self.worker is not None and self.worker.running:
+            self.worker.cancel()
+            self.cancel_button.config(state=tk.DISABLED)
+
+    def start_replay(self, replay):
+        """
+        Replays a search trace in the grid, with a position slider, a speed slider and a Play/Pause button.
+
+        Every frame shows the grid after the current event, computed by the
+        TraceReplay from its nearest keyframe, so moving the slider anywhere
+        in millions of events takes one frame. The cells pruned since the last
+        frame are shown in blue.
+
+        Args:
+            replay (TraceReplay): The trace to replay.
+        """
+        if replay.columns != self.grid_size:
+            raise ValueError(f"The trace is of a {replay.columns}x{replay.columns} grid, "
+                             f"not {self.grid_size}x{self.grid_size}")
+        self.replay = replay
+        self.replay_position = 0
+        self.replay_playing = False
+        self.replay_grid = [0] * (self.grid_size * self.grid_size)
+        self.solve_button.config(state=tk.DISABLED)
+
+        controls = tk.Frame(self.root)
+        controls.pack(pady=10)
+        self.position_scale = tk.Scale(controls, from_=0, to=len(replay), orient=tk.HORIZONTAL, length=400,
+                                       label="Event", command=self.seek_replay)
+        self.position_scale.pack()
+        # The speed is 10 ** value events per second.
+        self.speed_scale = tk.Scale(controls, from_=0, to=7, resolution=0.1, orient=tk.HORIZONTAL, length=400,
+                                    label="Speed (log10 events/s)")
+        self.speed_scale.set(2)
+        self.speed_scale.pack()
+        self.play_button = tk.Button(controls, text="Play", command=self.toggle_replay, font=("Arial", 14))
+        self.play_button.pack(pady=5)
+
+        self.show_replay(0)
+
+    def toggle_replay(self):
+        """Starts or pauses the replay."""
+        self.replay_playing = not self.replay_playing
+        self.play_button.config(text="Pause" if self.replay_playing else "Play")
+        if self.replay_playing:
+            if self.replay_position >= len(self.replay):
+                self.replay_position = 0
+            self.replay_clock = time.perf_counter()
+            self.root.after(self.frame_interval, self.replay_frame)
+
+    def replay_frame(self):
+        """Moves the replay forward by the events of the elapsed time at the current speed."""
+        if not self.replay_playing:
+            return
+        now = time.perf_counter()
+        events = (now - self.replay_clock) * 10 ** float(self.speed_scale.get())
+        position = self.replay_position + events
+        self.replay_clock = now
+        if position >= len(self.replay):
+            position = len(self.replay)
+            self.toggle_replay()
+        self.show_replay(position)
+        if self.replay_playing:
+            self.root.after(self.frame_interval, self.replay_frame)
+
+    def seek_replay(self, value):
+        """Jumps to the event selected with the position slider."""
+        if int(float(value)) != int(self.replay_position):
+            self.show_replay(int(float(value)))
+
+    def show_replay(self, position):
+        """Draws the grid after the first `position` events, only updating the cells that changed."""
+        replay = self.replay
+        previous = int(self.replay_position)
+        self.replay_position = position
+        position = int(position)
+        state = replay.state_at(position).tolist()
+
+        pruned = set()
+        if 0 < position - previous <= replay.keyframe_interval:
+            pruned = set(replay.pruned(previous, position).tolist())
+        n = self.grid_size
+        for index, value in enumerate(state):
+            if value == self.replay_grid[index] and index not in pruned:
+                continue
+            # Pruned cells are marked with a negative entry, so they are redrawn on the next frame.
+            self.replay_grid[index] = -1 if index in pruned else value
+            cell = self.cells[divmod(index, n)]
+            cell.config(text=str(value) if value else "",
+                        bg='lightblue' if index in pruned else 'lightyellow' if value else 'white')
+
+        self.update_counter_label(replay.assignments(position))
+        self.timer_label.config(text=f"Event {position} of {len(replay)}")
+        self.progress_label.config(text=replay.describe(position - 1) if position else "")
+        if int(float(self.position_scale.get())) != position:
+            self.position_scale.set(position)
+
+    def close(self):
+        """Stops the running solve, if any, and closes the window."""
+        if self.worker is not None and self.worker.running:
+            self.worker.cancel()
+            self.worker.join(1.0)
+        self.root.destroy()
+
@@ -0,0 +1,356 @@
+from typing import Any, Dict, List, Tuple
+
+from line_solver import count_visible
+from nogoods import NogoodStore
+from skyscraper import build_csp
+from Solver import Solver
+
+
+Clues = Tuple[List[int], List[int], List[int], List[int]]
+
+# The direction of the visibility constraints of each side of the grid, in the order of the clues.
+DIRECTIONS = ('down', 'up', 'left', 'right')
+
+
+def constraint_key(constraint: Any, variables: List[Any]) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Returns the place of a constraint in the puzzle, which stays the same when the puzzle is built again.
+
+    Returns:
+        tuple: The direction of a visibility constraint, or 'distinct' for a distinction constraint, and its cells.
+    """
+    return getattr(constraint, 'direction', 'distinct'), tuple(variables)
+
+
+class IncrementalSolver(object):
+    """
+    A puzzle that is edited one clue or given at a time, and solved again after each edit.
+
+    The work of the previous solves is kept:
+
+    * The last solution found is checked first. Removing a clue or a given
+      never invalidates it, and an added one often agrees with it, so most
+      edits are answered without searching. Likewise a puzzle without
+      solution stays so while clues and givens are only added.
+    * With MAC, the root domains (the arc consistent domains before the
+      first decision) are kept with the constraint or given that removed
+      every value. An added clue or given is propagated from the current
+      root. A removed one only puts back the values it removed, and the
+      values removed later by constraints over a cell that got values back
+      (they may have lost their reason), before propagating again from these
+      cells: the rest of the root stays as it is.
+    * The constraint weights learned by dom/wdeg and the residual supports
+      of the unchanged constraints carry over, and so do the nogoods of
+      backjumping until a clue or given is removed.
+    * The search tries the value of every cell in the last solution first,
+      so it goes straight to a solution that only differs around the edit.
+
+    The CSP and the solver are built again after a clue edit (the visibility
+    constraints change), but not after a given edit. Between solves, the CSP
+    is left with no assignment and the root domains.
+
+    Attributes:
+        clues (tuple): The current clues as (top, bottom, left, right) lists, with 0 for the missing ones.
+        givens (dict): The current givens, from (row, column) to height.
+        options (dict): The keyword arguments of the Solver.
+        csp (CSP): The CSP of the current clues.
+        solver (Solver): The solver of the CSP.
+        solution (dict): The solution of the last solve, or None.
+        status (str): The status of the last solve: 'solved', 'unsolvable' or 'unknown' (a search limit was reached).
+        reused (bool): Whether the last solve was answered by the previous result, without a search.
+        assignments (int): The number of assignments of the last solve.
+    """
+
+    def __init__(self, clues: Clues, givens: Dict[Tuple[int, int], int] | None = None,
+                 options: Dict[str, Any] | None = None) -> None:
+        """
+        Initializes an IncrementalSolver object. The root is propagated by the first solve.
+
+        Args:
+            clues (tuple): The clues of the puzzle as (top, bottom, left, right).
+            givens (dict, optional): The pre-filled heights, as a dictionary from (row, column) to height.
+            options (dict, optional): The keyword arguments of Solver, such as {'variable_heuristics': True, 'MAC': True}.
+        """
+        self.options = dict(options or {})
+        if self.options.get('trace_file') is not None:
+            raise ValueError("An incremental solver cannot write a trace file, its solver is built again on clue edits")
+        self.clues = tuple(list(side) for side in clues)
+        self.n = len(self.clues[0])
+        self.givens = {}
+        self.solution = None
+        self.status = None
+        self.reused = False
+        self.assignments = 0
+
+        # The steps that pruned the root domains, in order, as (cause, removed values), where the cause
+        # is the key of a constraint (see constraint_key) or ('given', cell).
+        self.removals = []
+        # The clues and givens added since the root was last propagated, and the cells that got values back.
+        self.pending = []
+        self.restored = set()
+        # Whether a clue or given was removed since the last solve.
+        self.relaxed = False
+        # The last solution found, which is checked first and whose values the search tries first.
+        self.phase = {}
+
+        self.csp = None
+        self.solver = None
+        self.keys = []
+        self.index = {}
+        self.stale = True
+        for side in range(4):
+            for i, clue in enumerate(self.clues[side]):
+                self.check_clue(side, i, clue)
+                if clue:
+                    self.pending.append(self.clue_key(side, i))
+        for cell, height in (givens or {}).items():
+            self.set_given(cell, height)
+
+    def clue_key(self, side: int, index: int) -> Tuple[str, Tuple[Any, ...]]:
+        """Returns the key of the visibility constraint of a clue (see constraint_key)."""
+        if side < 2:
+            return DIRECTIONS[side], tuple((j, index) for j in range(self.n))
+        return DIRECTIONS[side], tuple((index, j) for j in range(self.n))
+
+    def check_clue(self, side: int, index: int, clue: int) -> None:
+        """Raises ValueError unless the clue fits on the given side and index of the grid."""
+        if not 0 <= side < 4 or not 0 <= index < self.n:
+            raise ValueError(f"There is no clue {index} on side {side} of a puzzle of size {self.n}")
+        if not 0 <= clue <= self.n:
+            raise ValueError(f"A clue must be in 0..{self.n}, not {clue}")
+
+    def set_clue(self, side: int, index: int, clue: int) -> None:
+        """
+        Adds, changes or removes a clue.
+
+        Args:
+            side (int): The side of the clue, as its position in (top, bottom, left, right).
+            index (int): The column (top and bottom) or row (left and right) of the clue.
+            clue (int): The new clue, or 0 to remove it.
+
+        Returns:
+            None
+        """
+        self.check_clue(side, index, clue)
+        old = self.clues[side][index]
+        if clue == old:
+            return
+        key = self.clue_key(side, index)
+        if old:
+            self.relax(key)
+        self.clues[side][index] = clue
+        if clue:
+            self.pending.append(key)
+        self.stale = True
+
+    def set_given(self, cell: Tuple[int, int], height: int | None) -> None:
+        """
+        Adds, changes or removes a given.
+
+        Args:
+            cell (tuple): The (row, column) of the given.
+            height (int): The new height of the cell, or None (or 0) to remove it.
+
+        Returns:
+            None
+        """
+        i, j = cell
+        if not (0 <= i < self.n and 0 <= j < self.n):
+            raise ValueError(f"There is no cell {cell} in a puzzle of size {self.n}")
+        if height is not None and not 0 <= height <= self.n:
+            raise ValueError(f"A height must be in 1..{self.n}, not {height}")
+        height = height or None
+        old = self.givens.get(cell)
+        if height == old:
+            return
+        key = ('given', cell)
+        if old is not None:
+            self.relax(key)
+            del self.givens[cell]
+        if height is not None:
+            self.givens[cell] = height
+            self.pending.append(key)
+
+    def relax(self, cause: tuple) -> None:
+        """
+        Undoes the root prunings of a clue or given that is removed, and of the ones that may depend on them.
+
+        A pruning step is kept when its constraint has no cell that got values
+        back before it: its reason still holds. The constraints of the cells
+        that got values back are propagated again by the next solve.
+
+        Args:
+            cause (tuple): The key of the clue or given.
+
+        Returns:
+            None
+        """
+        self.relaxed = True
+        if cause in self.pending:
+            self.pending.remove(cause)
+            return
+
+        domains = self.csp.domains
+        restored = set()
+        kept = []
+        for step in self.removals:
+            step_cause, removed = step
+            if step_cause == cause or (step_cause[0] != 'given' and not restored.isdisjoint(step_cause[1])):
+                for var, value in removed:
+                    domains.restore(var, value)
+                    restored.add(var)
+            else:
+                kept.append(step)
+        self.removals = kept
+        self.restored |= restored
+        domains.commit()
+        # Nogoods were learned with the constraint or given that is removed.
+        self.solver.nogoods = NogoodStore(self.solver.nogoods.capacity)
+
+    def build(self) -> None:
+        """
+        Builds the CSP and the solver of the current clues, keeping the root domains and what was learned.
+
+        Returns:
+            None
+        """
+        csp = build_csp(self.clues)
+        keys = [constraint_key(constraint, variables) for constraint, variables in csp.constraints]
+        solver = Solver(csp, clues=tuple(list(side) for side in self.clues), **self.options)
+
+        old = self.solver
+        if old is not None:
+            for var, mask in self.csp.domains.masks.items():
+                csp.domains.set_mask(var, mask)
+            csp.domains.commit()
+            # The residual supports only carry over to the same clue on the same line.
+            weights = {}
+            residues = {}
+            for k, (constraint, _) in enumerate(self.csp.constraints):
+                weights[self.keys[k]] = old.weights[k]
+                residues[self.keys[k], getattr(constraint, 'clues', None)] = old.residues[k]
+            for k, (constraint, _) in enumerate(csp.constraints):
+                solver.weights[k] = weights.get(keys[k], 1)
+                solver.residues[k] = residues.get((keys[k], getattr(constraint, 'clues', None)), {})
+            solver.nogoods = old.nogoods
+            solver.random = old.random
+
+        self.csp = csp
+        self.solver = solver
+        self.keys = keys
+        self.index = {key: k for k, key in enumerate(keys)}
+        self.stale = False
+
+    def propagate(self) -> bool:
+        """
+        Propagates the pending clues and givens, and the constraints of the cells that got values back, at the root.
+
+        When a domain is wiped out, the root is left as it was and the edits stay pending,
+        so the puzzle is unsolvable until a clue or given is removed.
+
+        Returns:
+            bool: False if the root is inconsistent, True otherwise.
+        """
+        solver = self.solver
+        domains = self.csp.domains
+        checkpoint = domains.checkpoint()
+        steps = []
+        variables = set(self.restored)
+        consistent = True
+        # A cell may get back values it lost before its given was applied, so the given applies again.
+        givens = [cause for cause in self.pending if cause[0] == 'given']
+        givens.extend(('given', cell) for cell in self.restored if cell in self.givens)
+        for cause in givens:
+            cell = cause[1]
+            mask = domains.masks[cell]
+            bit = domains.bit(self.givens[cell])
+            if not mask & bit:
+                consistent = False
+                break
+            if mask != bit:
+                steps.append((cause, [(cell, value) for value in domains.values_of(mask & ~bit)]))
+                domains.set_mask(cell, bit)
+            variables.add(cell)
+
+        # The line search does not use the root domains of MAC.
+        if consistent and solver.MAC and not solver.line_search:
+            seeds = [self.index[cause] for cause in self.pending if cause[0] != 'given']
+            removals = []
+            consistent = solver.apply_MAC(list(variables), seeds, removals) is not None
+            steps.extend((self.keys[k], removed) for k, removed in removals)
+
+        if not consistent:
+            domains.rewind(checkpoint)
+            return False
+        self.removals.extend(steps)
+        self.pending = []
+        self.restored = set()
+        domains.commit()
+        return True
+
+    def satisfies(self, solution: Dict[Tuple[int, int], int]) -> bool:
+        """Checks a solution of an earlier version of the puzzle against the current clues and givens."""
+        n = self.n
+        for cell, height in self.givens.items():
+            if solution[cell] != height:
+                return False
+        for side in range(4):
+            for index, clue in enumerate(self.clues[side]):
+                if not clue:
+                    continue
+                if side < 2:
+                    line = [solution[(i, index)] for i in range(n)]
+                else:
+                    line = [solution[(index, j)] for j in range(n)]
+                if side % 2:
+                    line.reverse()
+                if count_visible(line) != clue:
+                    return False
+        return True
+
+    def solve(self) -> None | dict:
+        """
+        Solves the current puzzle, reusing the previous result when it still holds.
+
+        Returns:
+            dict{any : any}: The solution as a dictionary from (row, column) to height, or None.
+        """
+        self.reused = False
+        self.assignments = 0
+        if self.phase and self.satisfies(self.phase):
+            self.reused = True
+            self.status = 'solved'
+            self.relaxed = False
+            self.solution = dict(self.phase)
+            return dict(self.phase)
+        if self.status == 'unsolvable' and not self.relaxed:
+            self.reused = True
+            return None
+        self.relaxed = False
+
+        if self.stale:
+            self.build()
+        if not self.propagate():
+            self.solution = None
+            self.status = 'unsolvable'
+            return None
+
+        csp = self.csp
+        checkpoint = csp.domains.checkpoint()
+        start = csp.assignments_number
+        self.solver.phase = self.phase or None
+        solution = self.solver.solve(propagate=False)
+        self.assignments = csp.assignments_number - start
+        self.status = self.solver.status
+        # Back to the root for the next edit.
+        for var, value in csp.assignments.items():
+            if value is not None:
+                csp.un_assign([], var)
+        csp.domains.rewind(checkpoint)
+
+        self.solution = solution
+        if solution is not None:
+            self.phase.clear()
+            self.phase.update(solution)
+            return dict(solution)
+        return None
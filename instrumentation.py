@@ -0,0 +1,302 @@
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+
+class SolverHook(object):
+    """
+    Base class of custom profilers attached to a Solver.
+
+    Override any of these methods. They are only called when the solver was
+    created with hooks, so a solver without hooks pays nothing for them, and
+    only the methods listed by `events` are called at all.
+    """
+
+    names = ('on_assign', 'on_unassign', 'on_prune', 'on_propagate', 'on_failure', 'on_solve')
+
+    def events(self) -> set:
+        """Returns the names of the methods to call. Defaults to the ones overridden by the subclass."""
+        return {name for name in self.names if getattr(type(self), name) is not getattr(SolverHook, name)}
+
+    def on_assign(self, variable: Any, value: Any, depth: int) -> None:
+        pass
+
+    def on_unassign(self, variable: Any) -> None:
+        pass
+
+    def on_prune(self, variable: Any, count: int) -> None:
+        pass
+
+    def on_propagate(self, constraint_index: int) -> None:
+        pass
+
+    def on_failure(self, constraint_index: int | None) -> None:
+        pass
+
+    def on_solve(self, solution: None | dict, elapsed: float) -> None:
+        pass
+
+
+class SolverStats(object):
+    """
+    Counters describing where a Solver spends its work.
+
+    The counters stay at zero unless instrumentation was enabled when the
+    solver was created.
+
+    Attributes:
+        enabled (bool): Whether the counters are being updated.
+        assignments (int): The number of assignments.
+        backtracks (int): The number of assignments undone.
+        max_depth (int): The largest number of variables assigned at once.
+        consistency_checks (int): The number of is_consistent calls.
+        constraint_evaluations (int): The number of calls to constraint functions and their check_partial.
+        prunings (int): The number of values removed from domains (restored values are not counted).
+        queue_pops (int): The number of constraints taken from the propagation queue.
+        failures (int): The number of failed assignments.
+        time (float): The wall time spent in solve, in seconds.
+        constraint_names (list): A description of every constraint, by index.
+        constraint_calls (list): The number of evaluations of every constraint, by index.
+        constraint_time (list): The time spent in every constraint in seconds, or None without timing.
+    """
+
+    counters = ('assignments', 'backtracks', 'max_depth', 'consistency_checks', 'constraint_evaluations',
+                'prunings', 'queue_pops', 'failures')
+
+    def __init__(self, constraint_names: List[str]) -> None:
+        self.enabled = False
+        for name in self.counters:
+            setattr(self, name, 0)
+        self.time = 0.0
+        self.constraint_names = constraint_names
+        self.constraint_calls = [0] * len(constraint_names)
+        self.constraint_time = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Returns the statistics as a dictionary of plain values."""
+        result = {'enabled': self.enabled, 'time': self.time}
+        for name in self.counters:
+            result[name] = getattr(self, name)
+        constraints = []
+        for k, name in enumerate(self.constraint_names):
+            entry = {'constraint': name, 'calls': self.constraint_calls[k]}
+            if self.constraint_time is not None:
+                entry['time'] = self.constraint_time[k]
+            constraints.append(entry)
+        result['constraints'] = constraints
+        return result
+
+    def to_json(self, indent: int | None = None) -> str:
+        """Returns the statistics as a JSON string."""
+        return json.dumps(self.as_dict(), indent=indent)
+
+
+class InstrumentedConstraint(object):
+    """
+    Wraps a constraint to count (and optionally time) its evaluations.
+
+    It forwards every other attribute (such as __name__, search_order or
+    propagator) to the wrapped constraint, and only provides check_partial
+    if the wrapped constraint does. wrap_check counts the checks of the
+    compiled form of the constraint the same way (see network.compile_constraint).
+    """
+
+    def __init__(self, constraint: Any, index: int, stats: SolverStats, timing: bool) -> None:
+        self.constraint = constraint
+        self.__name__ = getattr(constraint, '__name__', repr(constraint))
+        self._call = self._wrap(constraint, index, stats, timing)
+        if hasattr(constraint, 'check_partial'):
+            self.check_partial = self._wrap(constraint.check_partial, index, stats, timing)
+        self.wrap_check = lambda check: self._wrap(check, index, stats, timing)
+
+    @staticmethod
+    def _wrap(function: Callable, index: int, stats: SolverStats, timing: bool) -> Callable:
+        calls = stats.constraint_calls
+        if not timing:
+            def counted(*args):
+                stats.constraint_evaluations += 1
+                calls[index] += 1
+                return function(*args)
+            return counted
+
+        spent = stats.constraint_time
+        clock = time.perf_counter
+
+        def timed(*args):
+            stats.constraint_evaluations += 1
+            calls[index] += 1
+            start = clock()
+            try:
+                return function(*args)
+            finally:
+                spent[index] += clock() - start
+        return timed
+
+    def __call__(self, *args) -> bool:
+        return self._call(*args)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.constraint, name)
+
+    def __repr__(self) -> str:
+        return repr(self.constraint)
+
+
+def instrument(solver: Any, constraint_timing: bool = False, hooks: List[SolverHook] | None = None) -> None:
+    """
+    Enables the statistics of a solver by wrapping the methods of its CSP, domain store and propagators.
+
+    Nothing is wrapped for solvers created without instrumentation, so their
+    search runs the plain methods. The constraints of the CSP are replaced by
+    InstrumentedConstraint wrappers, so a CSP should only be instrumented once.
+
+    Args:
+        solver (Solver): The solver to instrument. Its `stats` object receives the counters.
+        constraint_timing (bool, optional): Whether to measure the time spent in every constraint. Defaults to False.
+        hooks (list, optional): SolverHook objects to notify of search events. Defaults to none.
+
+    Returns:
+        None
+    """
+    stats = solver.stats
+    stats.enabled = True
+    if constraint_timing:
+        stats.constraint_time = [0.0] * len(stats.constraint_names)
+    hooks = list(hooks or ())
+    # The bound methods of the hooks, per event, so that events nobody listens to cost nothing.
+    listeners = {name: [getattr(hook, name) for hook in hooks if name in hook.events()]
+                 for name in SolverHook.names}
+    on_assign = listeners['on_assign']
+    on_unassign = listeners['on_unassign']
+    on_prune = listeners['on_prune']
+    on_propagate = listeners['on_propagate']
+    on_failure = listeners['on_failure']
+    on_solve = listeners['on_solve']
+    csp = solver.csp
+    domains = csp.domains
+    variable_count = len(csp.assignments)
+
+    # Constraints
+    for k, entry in enumerate(csp.constraints):
+        entry[0] = InstrumentedConstraint(entry[0], k, stats, constraint_timing)
+    for var, entries in csp.var_constraints.items():
+        ids = csp.var_constraint_ids[var]
+        for i, (_, vars_in_constraint) in enumerate(entries):
+            entries[i] = (csp.constraints[ids[i]][0], vars_in_constraint)
+    # The compiled network holds the old constraints, it is compiled again with the wrappers. AllDifferent
+    # and Visibility keep their compiled checks, only counted, so the statistics measure the same code.
+    csp.network = None
+
+    # Search
+    assign = csp.assign
+    un_assign = csp.un_assign
+    is_consistent = csp.is_consistent
+
+    def instrumented_assign(variable, value):
+        assign(variable, value)
+        stats.assignments += 1
+        depth = variable_count - len(csp.unassigned_var)
+        if depth > stats.max_depth:
+            stats.max_depth = depth
+        for listener in on_assign:
+            listener(variable, value, depth)
+
+    def instrumented_un_assign(removed_values_from_domain, variable):
+        un_assign(removed_values_from_domain, variable)
+        stats.backtracks += 1
+        for listener in on_unassign:
+            listener(variable)
+
+    def instrumented_is_consistent(variable, value):
+        stats.consistency_checks += 1
+        return is_consistent(variable, value)
+
+    csp.assign = instrumented_assign
+    csp.un_assign = instrumented_un_assign
+    csp.is_consistent = instrumented_is_consistent
+
+    record_failure = solver.record_failure
+
+    def instrumented_record_failure(conflict):
+        stats.failures += 1
+        for listener in on_failure:
+            listener(conflict)
+        record_failure(conflict)
+
+    solver.record_failure = instrumented_record_failure
+
+    # Domains
+    remove = domains.remove
+    set_mask = domains.set_mask
+    masks = domains.masks
+
+    def instrumented_remove(variable, value):
+        removed = remove(variable, value)
+        if removed:
+            stats.prunings += 1
+            for listener in on_prune:
+                listener(variable, 1)
+        return removed
+
+    def instrumented_set_mask(variable, mask):
+        lost = (masks[variable] & ~mask).bit_count()
+        changed = set_mask(variable, mask)
+        if lost:
+            stats.prunings += lost
+            for listener in on_prune:
+                listener(variable, lost)
+        return changed
+
+    domains.remove = instrumented_remove
+    domains.set_mask = instrumented_set_mask
+
+    # Propagation
+    multi_arc_reduce = solver.multi_arc_reduce
+    constraint_index = {id(entry[0]): k for k, entry in enumerate(csp.constraints)}
+
+    def instrumented_multi_arc_reduce(constraint_func, variables, residues=None):
+        stats.queue_pops += 1
+        for listener in on_propagate:
+            listener(constraint_index.get(id(constraint_func)))
+        return multi_arc_reduce(constraint_func, variables, residues)
+
+    solver.multi_arc_reduce = instrumented_multi_arc_reduce
+
+    for k, propagator in enumerate(solver.propagators):
+        if propagator is not None:
+            propagator.filter = _instrumented_filter(propagator.filter, k, stats, on_propagate, constraint_timing)
+
+    # Wall time
+    solve = solver.solve
+
+    def instrumented_solve(*args, **kwargs):
+        start = time.perf_counter()
+        solution = solve(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        stats.time += elapsed
+        for listener in on_solve:
+            listener(solution, elapsed)
+        return solution
+
+    solver.solve = instrumented_solve
+
+
+def _instrumented_filter(filter_domains: Callable, k: int, stats: SolverStats, on_propagate: List[Callable],
+                         timing: bool) -> Callable:
+    """Wraps the filter method of a dedicated propagator to count (and optionally time) its runs."""
+    clock = time.perf_counter
+
+    def instrumented_filter(domains):
+        stats.queue_pops += 1
+        stats.constraint_calls[k] += 1
+        for listener in on_propagate:
+            listener(k)
+        if not timing:
+            return filter_domains(domains)
+        start = clock()
+        try:
+            return filter_domains(domains)
+        finally:
+            stats.constraint_time[k] += clock() - start
+
+    return instrumented_filter
@@ -0,0 +1,39 @@
+import threading
+
+
+# The keyword arguments of Solver that bound its search.
+LIMITS = ('node_limit', 'assignment_limit', 'time_limit', 'cancel_token')
+
+
+class CancellationToken(object):
+    """
+    A flag that stops a search from another thread.
+
+    The search checks it at every node, so it stops soon after cancel() is
+    called, and reports 'unknown' with the reason 'cancelled'.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """Asks the searches that hold this token to stop."""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class LimitReached(Exception):
+    """
+    Raised inside a search when one of its limits is reached, and caught by the solver.
+
+    Attributes:
+        reason (str): The limit that was reached: 'nodes', 'assignments', 'time' or 'cancelled'.
+    """
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(f"The search stopped: {reason} limit reached" if reason != 'cancelled'
+                         else "The search was cancelled")
+        self.reason = reason
@@ -0,0 +1,335 @@
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Iterator, List, Tuple
+
+
+def count_visible(line: Tuple[int, ...]) -> int:
+    """Counts the buildings visible when looking along the line from its start."""
+    visible = 0
+    max_height = 0
+    for height in line:
+        if height > max_height:
+            visible += 1
+            max_height = height
+    return visible
+
+
+# The largest grid the line search supports. The permutations allowed for every line are built in full,
+# and a line without clues allows all n! of them: 362880 for 9, but 3628800 for 10 and 479001600 for 12.
+MAX_LINE_SIZE = 9
+
+
+def visible_patterns(size: int, visible: int) -> Iterator[Tuple[int, ...]]:
+    """
+    Yields the permutations of 1..size with `visible` elements visible from their start, in order.
+
+    The permutations are built from their start, and a prefix is dropped as
+    soon as it cannot reach the count any more: each height taller than the
+    prefix can add at most one visible element, and the tallest one always
+    adds one. Visibility only depends on the relative order of the heights,
+    so these patterns can be reused for any set of `size` distinct heights.
+    """
+    def extend(prefix: Tuple[int, ...], remaining: Tuple[int, ...], tallest: int,
+               seen: int) -> Iterator[Tuple[int, ...]]:
+        if not remaining:
+            yield prefix
+            return
+        for k, height in enumerate(remaining):
+            count = seen + (height > tallest)
+            top = max(tallest, height)
+            rest = remaining[:k] + remaining[k + 1:]
+            taller = sum(1 for other in rest if other > top)
+            if count + (taller > 0) <= visible <= count + taller:
+                yield from extend(prefix + (height,), rest, top, count)
+
+    if size == 0:
+        if visible == 0:
+            yield ()
+        return
+    yield from extend((), tuple(range(1, size + 1)), 0, 0)
+
+
+@lru_cache(maxsize=256)
+def line_permutations(n: int, front: int, back: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    Returns every permutation of 1..n that shows `front` buildings from its start
+    and `back` buildings from its end. A clue of 0 is missing and allows any count.
+
+    The tallest building splits the line in two: the part before it must show
+    front - 1 buildings from the start and the part after it back - 1 buildings
+    from the end, so both parts are built from visible patterns instead of
+    filtering all n! permutations, and the work grows with the number of
+    matching permutations only. The result is cached for the last 256 clue
+    pairs. With at most MAX_LINE_SIZE heights, the permutations of all the
+    clue pairs of a size add up to at most 4 n!, so the cache stays bounded.
+
+    Args:
+        n (int): The length of the line, at most MAX_LINE_SIZE.
+        front (int): The clue seen from the start of the line (left or top), or 0.
+        back (int): The clue seen from the end of the line (right or bottom), or 0.
+
+    Returns:
+        tuple: The matching permutations, each one a tuple of heights.
+    """
+    if n > MAX_LINE_SIZE:
+        raise ValueError(f"The line search supports grids of size up to {MAX_LINE_SIZE}, not {n}")
+    if front == 0 or back == 0:
+        fronts = range(1, n + 1) if front == 0 else (front,)
+        backs = range(1, n + 1) if back == 0 else (back,)
+        # Every permutation shows exactly one count from each side, so the sets are disjoint.
+        return tuple(sorted(permutation for f in fronts for b in backs
+                            for permutation in line_permutations(n, f, b)))
+
+    result = []
+    if not (1 <= front <= n and 1 <= back <= n):
+        return ()
+
+    heights = range(1, n)
+    for position in range(front - 1, n - back + 1):
+        before_patterns = list(visible_patterns(position, front - 1))
+        after_patterns = list(visible_patterns(n - 1 - position, back - 1))
+        if not before_patterns or not after_patterns:
+            continue
+
+        for before_set in combinations(heights, position):
+            after_set = tuple(height for height in heights if height not in before_set)
+            befores = [tuple(before_set[rank - 1] for rank in pattern) for pattern in before_patterns]
+            # The part after the tallest building is seen from the end, so its pattern is reversed.
+            afters = [tuple(after_set[rank - 1] for rank in reversed(pattern)) for pattern in after_patterns]
+            for before in befores:
+                prefix = before + (n,)
+                for after in afters:
+                    result.append(prefix + after)
+
+    result.sort()
+    return tuple(result)
+
+
+class LineSolver(object):
+    """
+    Solves a skyscraper puzzle by treating whole rows and columns as variables.
+
+    The domain of each line is the set of permutations allowed by its clue pair.
+    Rows and columns are filtered against each other through the cells where
+    they intersect, and the search branches on the line with the fewest
+    remaining permutations.
+
+    Attributes:
+        n (int): The size of the grid.
+        rows (list): The remaining permutations of every row.
+        cols (list): The remaining permutations of every column.
+        nodes (int): The number of line assignments tried during the search.
+        depth (int): The number of lines branched on along the current branch of the search.
+        check (Callable): Called before every line assignment, if set. It can stop the search by raising.
+        interrupt (Callable): Called before every line is filtered, if set. It can stop the search by raising.
+        prefer (dict): The heights of an earlier solution, if set. The search tries the permutation
+                       each line has in it first.
+    """
+
+    def __init__(self, clues: Tuple[List[int], List[int], List[int], List[int]],
+                 givens: Dict[Tuple[int, int], int] | None = None) -> None:
+        """
+        Initializes a LineSolver object. Grids larger than MAX_LINE_SIZE raise a ValueError.
+
+        Args:
+            clues (tuple): The clues of the puzzle as (top, bottom, left, right).
+            givens (dict, optional): The pre-filled heights, as a dictionary from (row, column) to height.
+        """
+        top, bottom, left, right = clues
+        self.n = len(top)
+        self.rows = [line_permutations(self.n, left[i], right[i]) for i in range(self.n)]
+        self.cols = [line_permutations(self.n, top[j], bottom[j]) for j in range(self.n)]
+        for (i, j), height in (givens or {}).items():
+            self.rows[i] = tuple(permutation for permutation in self.rows[i] if permutation[j] == height)
+            self.cols[j] = tuple(permutation for permutation in self.cols[j] if permutation[i] == height)
+        self.nodes = 0
+        self.depth = 0
+        self.check = None
+        self.interrupt = None
+        self.prefer = None
+
+    def solve(self) -> None | Dict[Tuple[int, int], int]:
+        """
+        Searches for a solution of the puzzle.
+
+        Returns:
+            dict{(int, int) : int}: The height of every cell, or None if the puzzle has no solution.
+        """
+        state = self.propagate(list(self.rows), list(self.cols))
+        if state is None:
+            return None
+        found = self.search(*state)
+        if found is None:
+            return None
+
+        rows, _ = found
+        return {(i, j): rows[i][0][j] for i in range(self.n) for j in range(self.n)}
+
+    def solutions(self) -> Iterator[Dict[Tuple[int, int], int]]:
+        """
+        Yields every solution of the puzzle, one at a time.
+
+        The search only goes on when the next solution is asked for, so taking
+        the first k solutions (for example to check that a puzzle has exactly
+        one) costs no more than finding them.
+
+        Returns:
+            Iterator: The height of every cell, for each solution.
+        """
+        state = self.propagate(list(self.rows), list(self.cols))
+        if state is None:
+            return
+        for rows, _ in self.search_all(*state):
+            yield {(i, j): rows[i][0][j] for i in range(self.n) for j in range(self.n)}
+
+    def select_line(self, rows: List, cols: List) -> None | Tuple[bool, int]:
+        """
+        Picks the line with the fewest permutations left among those with more than one.
+
+        Returns:
+            tuple: Whether the line is a row, and its index, or None if every line has a single permutation.
+        """
+        best = None
+        best_size = 0
+        for is_row, lines in ((True, rows), (False, cols)):
+            for index, candidates in enumerate(lines):
+                size = len(candidates)
+                if size > 1 and (best is None or size < best_size):
+                    best = (is_row, index)
+                    best_size = size
+        return best
+
+    def search_all(self, rows: List, cols: List) -> Iterator[Tuple[List, List]]:
+        """
+        Yields the rows and columns of every solution below a propagated state.
+
+        The search keeps its own stack of nodes instead of recursing. Every node
+        holds the line branched on, its candidate permutations, the next one to
+        try and the rows and columns it was reached with.
+
+        Returns:
+            Iterator: The rows and columns with one permutation each, for each solution.
+        """
+        best = self.select_line(rows, cols)
+        if best is None:
+            yield rows, cols
+            return
+
+        stack = [self.branch(rows, cols, best)]
+        while stack:
+            self.depth = len(stack)
+            node = stack[-1]
+            is_row, index, candidates, position, rows, cols = node
+            if position == len(candidates):
+                stack.pop()
+                continue
+            node[3] = position + 1
+
+            if self.check is not None:
+                self.check()
+            self.nodes += 1
+            new_rows, new_cols = list(rows), list(cols)
+            if is_row:
+                new_rows[index] = (candidates[position],)
+            else:
+                new_cols[index] = (candidates[position],)
+
+            state = self.propagate(new_rows, new_cols)
+            if state is None:
+                continue
+            best = self.select_line(*state)
+            if best is None:
+                yield state
+            else:
+                stack.append(self.branch(*state, best))
+
+    def search(self, rows: List, cols: List) -> None | Tuple[List, List]:
+        """
+        Branches on the line with the fewest permutations left, until the first solution.
+
+        Returns:
+            tuple: The rows and columns with one permutation each, or None if the branch fails.
+        """
+        return next(self.search_all(rows, cols), None)
+
+    def branch(self, rows: List, cols: List, best: Tuple[bool, int]) -> list:
+        """Returns a new search node that branches on a line, with its preferred permutation first."""
+        is_row, index = best
+        candidates = rows[index] if is_row else cols[index]
+        if self.prefer is not None:
+            candidates = self.preferred_first(candidates, is_row, index)
+        return [is_row, index, candidates, 0, rows, cols]
+
+    def preferred_first(self, candidates: Tuple, is_row: bool, index: int) -> Tuple:
+        """Moves the permutation the line has in `prefer` to the front of its candidates, if it is one of them."""
+        n = self.n
+        if is_row:
+            line = tuple(self.prefer[(index, j)] for j in range(n))
+        else:
+            line = tuple(self.prefer[(i, index)] for i in range(n))
+        if candidates[0] == line or line not in candidates:
+            return candidates
+        return (line,) + tuple(permutation for permutation in candidates if permutation != line)
+
+    def propagate(self, rows: List, cols: List) -> None | Tuple[List, List]:
+        """
+        Filters rows and columns by their intersections until nothing changes.
+
+        Returns:
+            tuple: The filtered rows and columns, or None if a line has no permutation left.
+        """
+        n = self.n
+        # A clue pair (or a given) that no permutation matches makes the puzzle unsolvable.
+        if not all(rows) or not all(cols):
+            return None
+        row_support = self.supports(rows)
+        col_support = self.supports(cols)
+
+        changed = True
+        while changed:
+            changed = False
+            # Only the cells where a row still allows heights its column has lost are checked.
+            for i in range(n):
+                allowed = [(j, col_support[j][i]) for j in range(n) if row_support[i][j] & ~col_support[j][i]]
+                if allowed:
+                    if self.interrupt is not None:
+                        self.interrupt()
+                    rows[i] = self.filter(rows[i], allowed)
+                    if not rows[i]:
+                        return None
+                    row_support[i] = self.support(rows[i])
+                    changed = True
+
+            for j in range(n):
+                allowed = [(i, row_support[i][j]) for i in range(n) if col_support[j][i] & ~row_support[i][j]]
+                if allowed:
+                    if self.interrupt is not None:
+                        self.interrupt()
+                    cols[j] = self.filter(cols[j], allowed)
+                    if not cols[j]:
+                        return None
+                    col_support[j] = self.support(cols[j])
+                    changed = True
+
+        return rows, cols
+
+    def supports(self, lines: List) -> List[List[int]]:
+        """Returns the support of every line (see support), calling `interrupt` before each one."""
+        supports = []
+        for candidates in lines:
+            if self.interrupt is not None:
+                self.interrupt()
+            supports.append(self.support(candidates))
+        return supports
+
+    @staticmethod
+    def support(candidates: Tuple) -> List[int]:
+        """Returns, for every position of a line, the bitmask of heights some candidate puts there."""
+        return [sum(1 << height for height in set(column)) for column in zip(*candidates)]
+
+    @staticmethod
+    def filter(candidates: Tuple, allowed: List[Tuple[int, int]]) -> Tuple:
+        """Keeps the candidates whose height at each listed position is in that position's mask."""
+        for position, mask in allowed:
+            candidates = [permutation for permutation in candidates if mask >> permutation[position] & 1]
+        return tuple(candidates)
@@ -1,10 +1,10 @@
-import tkinter as tk
 import argparse
-from collections import deque
+import time
 
-from map_reader import map_reader
-from graphics import SkyscraperPuzzleGUI
-from CSP import CSP
+from limits import CancellationToken
+from line_solver import MAX_LINE_SIZE
+from map_reader import puzzle_reader
+from skyscraper import add_solver_arguments, build_csp, create_solver, solver_options
 from Solver import Solver
 
 
@@ -18,25 +18,6 @@ def longest_increasing_sequence(arr):
             max = arr[i]
     return length
 
-def distinction_constraint(*args):
-    ans = len(set(args)) == len(args)
-    return ans
-
-def visibility_constraint(*args, clues, direction):
-    if direction == 'left' or direction == 'down':
-        ordering = args
-    else: 
-        ordering = args[::-1]
-
-    visible = 0
-    max_height = 0
-    for height in ordering:
-        if height > max_height:
-            visible += 1
-            max_height = height
-    return (visible == clues)
-
-
 # Main part of the code to run the GUI
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Skyscraper Puzzle Solver")
@@ -48,99 +29,112 @@ if __name__ == "__main__":
         choices=[i for i in range(3, 100)],
         help="Map must be less than 100 and greater than 2",
     )
+    add_solver_arguments(parser)
     parser.add_argument(
-        "-lcv",
-        "--lcv",
+        "-portfolio",
+        "--portfolio",
         action="store_true",
-        help="Enable least constraint value (LCV) as a order-type optimizer"
+        help="Run several solver configurations in parallel processes and keep the first one to finish"
     )
     parser.add_argument(
-        "-mrv",
-        "--mrv",
+        "-parallel",
+        "--parallel",
         action="store_true",
-        help="Enable minimum remaining values (MRV) as a order-type optimizer"
+        help="Split the search tree into subproblems and solve them in parallel processes"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes of the portfolio or the parallel search (defaults to the number of CPU cores)"
+    )
+    parser.add_argument(
+        "--trace_file",
+        help="File to write every search event to as the search runs, at the --trace level ('decisions' by default). "
+             "Read it with tracing.py or replay it with --replay"
     )
     parser.add_argument(
-        "-MAC",
-        "--maintaining_arc_consistency",
+        "--replay",
+        help="Trace file of this map to replay in the window instead of solving"
+    )
+    parser.add_argument(
+        "--no-gui",
         action="store_true",
-        help="Enable arc consistency as a mechanism to eliminate the domain of variables achieving an optimized solution"
+        help="Solve the puzzle right away and print the grid instead of opening a window"
     )
 
     args = parser.parse_args()
-    clues = map_reader(args.map)  # clues= [top, bottom, left, right]
+    if args.replay and args.no_gui:
+        parser.error("--replay needs the window")
+    if args.backjumping and (args.maintaining_arc_consistency or args.forward_checking):
+        parser.error("--backjumping cannot be combined with --forward_checking or --maintaining_arc_consistency")
+    if (args.portfolio or args.parallel) and \
+            (args.node_limit is not None or args.assignment_limit is not None or args.time_limit is not None):
+        parser.error("the search limits cannot be used with --portfolio or --parallel")
+    clues, givens = puzzle_reader(args.map)  # clues= [top, bottom, left, right]
     grid_size = len(clues[0])
-
-    csp = CSP()
-    
-        # Here are the variables
-    for i in range(grid_size):
-        for j in range(grid_size):
-            variable = (i, j)
-            csp.add_variable(variable, range(1, grid_size + 1))
-
-    print("CSP's info")
-    print("vars & domains:")
-    for variable, domain in csp.variables.items():
-        print(f"{variable}: {domain}")
-
-    # adding the distinction constraints
-    for i in range(grid_size):
-        # distinction constraint for row i
-        csp.add_constraint(distinction_constraint, [(i,j) for j in range(grid_size)])
-
-        # distinction constraint for column i
-        csp.add_constraint(distinction_constraint, [(j,i) for j in range(grid_size)])
-
-    top, bottom, left, right = clues
-
-    # constraints for visibility of skyscrapers for row i
-    for i in range(grid_size):
-        # left constraint
-        def see_from_left(*args, clues=left[i]):
-            return visibility_constraint(*args, clues=clues, direction='left')
-        
-        # right constraint
-        def see_from_right(*args, clues=right[i]):
-            return visibility_constraint(*args, clues=clues, direction='right')
-        
-        csp.add_constraint(see_from_left, [(i,j) for j in range(grid_size)])
-        csp.add_constraint(see_from_right, [(i,j) for j in range(grid_size)])
-
-    # constraints for visibility of skyscrapers for column i
-    for i in range(grid_size):
-        # top constraint function
-        def see_from_top(*args, clues=top[i]):
-            return visibility_constraint(*args, clues=clues, direction='down')
-        
-        # bottom constraint function
-        def see_from_bottom(*args, clues=bottom[i]):
-            return visibility_constraint(*args, clues=clues, direction='up')
-        
-        csp.add_constraint(see_from_top, [(j,i) for j in range(grid_size)])
-        csp.add_constraint(see_from_bottom, [(j,i) for j in range(grid_size)])
-
-    root = tk.Tk()
-    root.title("Skyscraper Puzzle")
-
-    # Center the window
-    window_width, window_height = 600, 700
-    screen_width = root.winfo_screenwidth()
-    screen_height = root.winfo_screenheight()
-    position_top = int(screen_height / 2 - window_height / 2)
-    position_right = int(screen_width / 2 - window_width / 2)
-    root.geometry(f"{window_width}x{window_height}+{position_right}+{position_top}")
-
-    solver = Solver(csp, args.lcv, args.mrv, args.maintaining_arc_consistency)
-
-    puzzle = SkyscraperPuzzleGUI(root, grid_size, solver)
-
-    # Adding clues to the GUI
-    for j in range(1, grid_size + 1):
-        puzzle.add_clue(0, j, clues[0][j - 1], "down")  # Top clue pointing down
-        puzzle.add_clue(grid_size + 1, j, clues[1][j - 1], "up")  # Bottom clue pointing up
-    for i in range(1, grid_size + 1):
-        puzzle.add_clue(i, 0, clues[2][i - 1], "right")  # Left clue pointing right
-        puzzle.add_clue(i, grid_size + 1, clues[3][i - 1], "left")  # Right clue pointing left
-
-    root.mainloop()
\ No newline at end of file
+    if args.line_search and not args.portfolio and grid_size > MAX_LINE_SIZE:
+        parser.error(f"--line_search supports grids of size up to {MAX_LINE_SIZE}")
+
+    csp = build_csp(clues, givens)
+    options = solver_options(args)
+    # The portfolio and the parallel search run their solvers in other processes, which are not traced.
+    if args.trace_file and not (args.portfolio or args.parallel):
+        options['trace'] = args.trace or 'decisions'
+        options['trace_file'] = args.trace_file
+    # The Cancel button of the window stops the search through this token.
+    if not args.no_gui and not (args.portfolio or args.parallel):
+        options['cancel_token'] = CancellationToken()
+    solver = create_solver(csp, clues, options, args.portfolio, args.parallel, args.workers)
+
+    if args.no_gui:
+        start = time.perf_counter()
+        solution = solver.solve()
+        elapsed = time.perf_counter() - start
+        if isinstance(solver, Solver) and solver.status == 'unknown':
+            print(f"Search stopped: {solver.limit_reason} limit reached")
+        elif solution is None:
+            print("No solution found!")
+        else:
+            for i in range(grid_size):
+                print(' '.join(str(solution[(i, j)]) for j in range(grid_size)))
+        print(f"Number of Assignments : {csp.assignments_number}")
+        print(f"Elapsed Time: {elapsed:.6f}s")
+    else:
+        # tkinter is only loaded when a window is opened.
+        import tkinter as tk
+        from graphics import SkyscraperPuzzleGUI
+
+        root = tk.Tk()
+        root.title("Skyscraper Puzzle")
+
+        # Center the window
+        window_width, window_height = 600, 700
+        screen_width = root.winfo_screenwidth()
+        screen_height = root.winfo_screenheight()
+        position_top = int(screen_height / 2 - window_height / 2)
+        position_right = int(screen_width / 2 - window_width / 2)
+        root.geometry(f"{window_width}x{window_height}+{position_right}+{position_top}")
+
+        puzzle = SkyscraperPuzzleGUI(root, grid_size, solver)
+
+        # Adding clues to the GUI
+        for j in range(1, grid_size + 1):
+            puzzle.add_clue(0, j, clues[0][j - 1], "down")  # Top clue pointing down
+            puzzle.add_clue(grid_size + 1, j, clues[1][j - 1], "up")  # Bottom clue pointing up
+        for i in range(1, grid_size + 1):
+            puzzle.add_clue(i, 0, clues[2][i - 1], "right")  # Left clue pointing right
+            puzzle.add_clue(i, grid_size + 1, clues[3][i - 1], "left")  # Right clue pointing left
+
+        if args.replay:
+            from trace_replay import TraceReplay
+            puzzle.start_replay(TraceReplay(args.replay))
+
+        root.mainloop()
+
+    if args.portfolio and solver.winner is not None:
+        from portfolio import describe
+        print(f"Portfolio winner: {describe(solver.winner)}")
+    if isinstance(solver, Solver) and (args.stats or args.constraint_timing):
+        print(solver.stats.to_json(indent=2))
+    if isinstance(solver, Solver) and solver.tracer is not None:
+        solver.tracer.close()
\ No newline at end of file
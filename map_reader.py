@@ -1,20 +1,93 @@
-def map_reader(map_num):
-    # Read the data from the file
-    with open(f'map{map_num}.txt', 'r') as file:
-        lines = file.readlines()
-    # Initialize lists for top, bottom, left, and right
-    top = lines[0].split()
-    bottom = lines[-1].split()
+from typing import Dict, List, Tuple
+
+
+def parse_token(token: str) -> int:
+    """Reads a clue or a cell, where '.' (or 0) stands for a missing one."""
+    if token == '.':
+        return 0
+    return int(token)
+
+
+def parse_puzzle(text: str) -> Tuple[Tuple[List[int], List[int], List[int], List[int]], Dict[Tuple[int, int], int]]:
+    """
+    Reads a puzzle in the map format.
+
+    The first line holds the top clues and the last line the bottom clues. Every
+    line in between is one row: its left clue, its cells and its right clue.
+    The cells are either a bracketed list, such as '[1, 3, 2]' (the solution
+    written by test_case_generator, which is not part of the puzzle), n tokens
+    with the pre-filled heights (givens), or nothing at all. Tokens are separated
+    by whitespace, so sizes and clues of any number of digits can be used, and
+    a missing clue or an empty cell is written '.' or 0.
+
+    Args:
+        text (str): The content of a map file.
+
+    Returns:
+        tuple: The clues as (top, bottom, left, right), with 0 for the missing ones,
+               and the givens as a dictionary from (row, column) to height.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    if len(lines) < 3:
+        raise ValueError("A map needs a line of top clues, at least one row and a line of bottom clues")
+
+    top = [parse_token(token) for token in lines[0].split()]
+    bottom = [parse_token(token) for token in lines[-1].split()]
+    n = len(top)
+    if len(bottom) != n:
+        raise ValueError(f"There are {n} top clues but {len(bottom)} bottom clues")
+    if len(lines) - 2 != n:
+        raise ValueError(f"There are {n} top clues but {len(lines) - 2} rows")
+
     left = []
     right = []
+    givens = {}
+    for i, line in enumerate(lines[1:-1]):
+        cells = []
+        if '[' in line:
+            before, _, rest = line.partition('[')
+            _, _, after = rest.partition(']')
+            tokens = before.split() + after.split()
+        else:
+            tokens = line.split()
+            if len(tokens) == n + 2:
+                cells = tokens[1:-1]
+                tokens = [tokens[0], tokens[-1]]
+        if len(tokens) != 2:
+            raise ValueError(f"Row {i + 1} must have a left clue, {n} cells or none, and a right clue")
 
-    for line in lines[1:-1]:
-        left.append(line[0])
-        right.append((line[-2]))
+        left.append(parse_token(tokens[0]))
+        right.append(parse_token(tokens[1]))
+        for j, token in enumerate(cells):
+            value = parse_token(token)
+            if not 0 <= value <= n:
+                raise ValueError(f"The cell ({i}, {j}) holds {value}, outside 1..{n}")
+            if value:
+                givens[(i, j)] = value
+
+    for side in (top, bottom, left, right):
+        for clue in side:
+            if not 0 <= clue <= n:
+                raise ValueError(f"The clue {clue} is outside 1..{n}")
+
+    return (top, bottom, left, right), givens
+
+
+def read_puzzle(path: str) -> Tuple[Tuple[List[int], List[int], List[int], List[int]], Dict[Tuple[int, int], int]]:
+    """Reads the clues and the givens of a map file (see parse_puzzle)."""
+    with open(path, 'r') as file:
+        return parse_puzzle(file.read())
+
+
+def read_map(path):
+    """Reads the clues (top, bottom, left, right) of a map file, with 0 for the missing ones."""
+    clues, _ = read_puzzle(path)
+    return clues
+
+
+def map_reader(map_num):
+    return read_map(f'map{map_num}.txt')
 
-    top = list(map(int, top))
-    bottom = list(map(int, bottom))
-    left = list(map(int, left))
-    right = list(map(int, right))
 
-    return top, bottom, left, right
\ No newline at end of file
+def puzzle_reader(map_num):
+    return read_puzzle(f'map{map_num}.txt')
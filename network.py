@@ -0,0 +1,149 @@
+from array import array
+from typing import Any, Callable, List, Tuple
+
+from constraints import AllDifferent, Visibility, visible_prefix_check
+
+
+class CompiledAllDifferent(object):
+    """
+    The compiled form of AllDifferent over the variables `scope`, given by index.
+
+    It is only checked after an assignment, when the other variables of the
+    line are already different from each other, so only the new value is
+    compared with them.
+    """
+
+    __slots__ = ('scope',)
+
+    def __init__(self, scope: Tuple[int, ...]) -> None:
+        self.scope = scope
+
+    def check(self, values: List[Any], variable: int) -> bool:
+        value = values[variable]
+        for index in self.scope:
+            if values[index] == value and index != variable:
+                return False
+        return True
+
+
+class CompiledVisibility(object):
+    """
+    The compiled form of Visibility: the clue, the direction, and the line in the order the clue looks along it.
+
+    check is visible_prefix_check, the same as Visibility.check_partial, run on
+    the values array through `order`.
+    """
+
+    __slots__ = ('scope', 'clue', 'direction', 'order')
+
+    def __init__(self, scope: Tuple[int, ...], clue: int, direction: str) -> None:
+        self.scope = scope
+        self.clue = clue
+        self.direction = direction
+        self.order = scope if direction == 'left' or direction == 'down' else scope[::-1]
+
+    def check(self, values: List[Any], variable: int) -> bool:
+        return visible_prefix_check(values, self.order, self.clue)
+
+
+class CompiledConstraint(object):
+    """
+    Any other constraint, called on the values of its variables.
+
+    Like CSP.is_consistent, it uses check_partial when the constraint has one,
+    and otherwise only checks the constraint once all of its variables are assigned.
+    """
+
+    __slots__ = ('scope', 'constraint', 'check_partial')
+
+    def __init__(self, scope: Tuple[int, ...], constraint: Callable) -> None:
+        self.scope = scope
+        self.constraint = constraint
+        self.check_partial = getattr(constraint, 'check_partial', None)
+
+    def check(self, values: List[Any], variable: int) -> bool:
+        line = [values[index] for index in self.scope]
+        if self.check_partial is not None:
+            return self.check_partial(line)
+        for value in line:
+            if value is None:
+                return True
+        return self.constraint(*line)
+
+
+class InstrumentedCheck(object):
+    """A compiled constraint whose checks are counted (and maybe timed) by an instrumented solver."""
+
+    __slots__ = ('scope', 'check')
+
+    def __init__(self, compiled: Any, check: Callable) -> None:
+        self.scope = compiled.scope
+        self.check = check
+
+
+class Network(object):
+    """
+    The constraint network of a CSP, compiled to integer indices.
+
+    The variables are numbered 0..V-1 in the order they were added, and every
+    constraint becomes a typed object over the indices of its variables. The
+    constraints of variable i are incidence[offsets[i]:offsets[i + 1]], in the
+    order they were added, as indices into `constraints` (the same as the
+    indices of csp.constraints). Together with a list of the values by
+    variable index, a consistency check is a few list lookups.
+
+    Attributes:
+        variables (list): The variables of the CSP, by index.
+        index (dict): The index of every variable.
+        constraints (list): The compiled constraints.
+        offsets (array): Where the constraints of every variable start in `incidence`, followed by its length.
+        incidence (array): The constraint indices of all variables, one after the other.
+    """
+
+    def __init__(self, variables: List[Any], constraints: List[Tuple[Callable, List[Any]]]) -> None:
+        """
+        Initializes a Network object.
+
+        Args:
+            variables (list): The variables of the CSP, in the order they were added.
+            constraints (list): The [constraint_func, variables] entries of the CSP.
+        """
+        self.variables = list(variables)
+        self.index = {var: i for i, var in enumerate(self.variables)}
+        self.constraints = [compile_constraint(constraint, tuple(self.index[var] for var in scope))
+                            for constraint, scope in constraints]
+
+        by_variable = [[] for _ in self.variables]
+        for k, compiled in enumerate(self.constraints):
+            for i in compiled.scope:
+                by_variable[i].append(k)
+        self.offsets = array('l', [0])
+        self.incidence = array('l')
+        for ids in by_variable:
+            self.incidence.extend(ids)
+            self.offsets.append(len(self.incidence))
+
+    def constraints_of(self, i: int) -> array:
+        """Returns the indices of the constraints of variable i."""
+        return self.incidence[self.offsets[i]:self.offsets[i + 1]]
+
+
+def compile_constraint(constraint: Callable, scope: Tuple[int, ...]) -> Any:
+    """
+    Compiles one constraint over the variable indices `scope`.
+
+    An instrumented AllDifferent or Visibility (see instrumentation.InstrumentedConstraint)
+    is compiled like the constraint it wraps, and only its check is wrapped to be counted.
+
+    Returns:
+        CompiledAllDifferent | CompiledVisibility | CompiledConstraint | InstrumentedCheck: The compiled constraint.
+    """
+    wrap_check = getattr(constraint, 'wrap_check', None)
+    if wrap_check is not None and isinstance(constraint.constraint, (AllDifferent, Visibility)):
+        compiled = compile_constraint(constraint.constraint, scope)
+        return InstrumentedCheck(compiled, wrap_check(compiled.check))
+    if isinstance(constraint, AllDifferent):
+        return CompiledAllDifferent(scope)
+    if isinstance(constraint, Visibility):
+        return CompiledVisibility(scope, constraint.clues, constraint.direction)
+    return CompiledConstraint(scope, constraint)
@@ -0,0 +1,71 @@
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, Tuple
+
+
+class NogoodStore(object):
+    """
+    A bounded store of nogoods: sets of (variable, value) pairs that cannot all hold in a solution.
+
+    Nogoods are indexed by each of their pairs, so the nogoods that a new
+    assignment could complete are found without scanning the whole store. When
+    the store is full, the least recently used nogood is evicted.
+
+    Attributes:
+        capacity (int): The maximum number of nogoods kept.
+        nogoods (OrderedDict): The stored nogoods, from least to most recently used.
+    """
+
+    def __init__(self, capacity: int = 10000) -> None:
+        self.capacity = capacity
+        self.nogoods = OrderedDict()
+        self._index: Dict[Tuple[Any, Any], set] = {}
+
+    def __len__(self) -> int:
+        return len(self.nogoods)
+
+    def add(self, pairs: Iterable[Tuple[Any, Any]]) -> None:
+        """
+        Stores a nogood, evicting the least recently used one if the store is full.
+
+        Args:
+            pairs (iterable): The (variable, value) pairs of the nogood.
+
+        Returns:
+            None
+        """
+        nogood = frozenset(pairs)
+        if self.capacity <= 0:
+            return
+        if nogood in self.nogoods:
+            self.nogoods.move_to_end(nogood)
+            return
+
+        if len(self.nogoods) >= self.capacity:
+            evicted, _ = self.nogoods.popitem(last=False)
+            for pair in evicted:
+                self._index[pair].discard(evicted)
+
+        self.nogoods[nogood] = None
+        for pair in nogood:
+            self._index.setdefault(pair, set()).add(nogood)
+
+    def violated(self, variable: Any, value: Any, assignments: Dict[Any, Any]) -> None | FrozenSet[Tuple[Any, Any]]:
+        """
+        Finds a nogood made true by assigning value to variable.
+
+        Args:
+            variable (any): The variable being assigned.
+            value (any): The value being assigned.
+            assignments (dict): The current assignments of the CSP (None for unassigned variables).
+
+        Returns:
+            frozenset: A nogood whose other pairs all hold in the assignments, or None if there is none.
+        """
+        for nogood in self._index.get((variable, value), ()):
+            for other, other_value in nogood:
+                if other != variable and assignments[other] != other_value:
+                    break
+            else:
+                self.nogoods.move_to_end(nogood)
+                return nogood
+        return None
@@ -0,0 +1,347 @@
+import multiprocessing
+import os
+from typing import Any, Dict, List, Tuple
+
+from CSP import CSP
+from line_solver import LineSolver
+from nogoods import NogoodStore
+from Solver import Solver
+
+
+# The worker processes keep one solver each, created once by _init_worker.
+_solver = None
+
+
+def _init_worker(csp: CSP, clues: Any, options: Dict[str, Any]) -> None:
+    """Creates the solver of a worker process."""
+    global _solver
+    _solver = Solver(csp, clues=clues, **options)
+
+
+def apply_decisions(solver: Solver, decisions: List[Tuple[Any, Any]]) -> bool:
+    """
+    Assigns a sequence of decisions, checking and propagating each one like the search does.
+
+    Args:
+        solver (Solver): The solver whose CSP receives the assignments.
+        decisions (list): The (variable, value) pairs to assign, in order.
+
+    Returns:
+        bool: False if a decision is inconsistent or wipes out a domain, True otherwise.
+    """
+    csp = solver.csp
+    for var, value in decisions:
+        csp.assign(var, value)
+        if not csp.is_consistent(var, value) or not solver.look_ahead(var, value):
+            return False
+    return True
+
+
+def _solve_cells(decisions: List[Tuple[Any, Any]]) -> Tuple[None | dict, int]:
+    """
+    Solves the subproblem below a sequence of cell assignments in a worker process.
+
+    Returns:
+        tuple: The solution (or None) and the number of assignments made.
+    """
+    csp = _solver.csp
+    checkpoint = csp.domains.checkpoint()
+    _forget_nogoods()
+
+    solution = None
+    # The decisions were already counted when the tree was split.
+    replayed = apply_decisions(_solver, decisions)
+    before = csp.assignments_number
+    if replayed:
+        solution = _solver.solve()
+
+    _restore(checkpoint)
+    return solution, csp.assignments_number - before
+
+
+def _count_cells(task: Tuple[List[Tuple[Any, Any]], int | None]) -> Tuple[int, int]:
+    """
+    Counts the solutions of the subproblem below a sequence of cell assignments in a worker process.
+
+    Returns:
+        tuple: The number of solutions, at most the limit of the task, and the number of assignments made.
+    """
+    decisions, limit = task
+    csp = _solver.csp
+    checkpoint = csp.domains.checkpoint()
+    _forget_nogoods()
+
+    count = 0
+    replayed = apply_decisions(_solver, decisions)
+    before = csp.assignments_number
+    if replayed:
+        count = _solver.count_solutions(limit)
+
+    _restore(checkpoint)
+    return count, csp.assignments_number - before
+
+
+def _forget_nogoods() -> None:
+    """
+    Clears the nogoods that the solver of a worker process learned on its previous subproblem.
+
+    A nogood only holds below the decisions of the subproblem it was learned in, so it must not prune the next one.
+    The dom/wdeg weights are kept, since they only guide the variable ordering.
+    """
+    _solver.nogoods = NogoodStore(_solver.nogoods.capacity)
+
+
+def _restore(checkpoint: int) -> None:
+    """Undoes the assignments of the solver of a worker process and rewinds its domains to a checkpoint."""
+    csp = _solver.csp
+    for var in list(csp.assignments):
+        if csp.assignments[var] is not None:
+            csp.un_assign([], var)
+    csp.domains.rewind(checkpoint)
+
+
+def _line_subproblem(is_row: bool, index: int, permutation: Tuple[int, ...]) -> Tuple[LineSolver, Any]:
+    """Returns a line search of the puzzle where one row or column takes a given permutation, and its propagated state."""
+    engine = LineSolver(_solver.clues, _solver.csp.givens())
+    rows, cols = list(engine.rows), list(engine.cols)
+    if is_row:
+        rows[index] = (permutation,)
+    else:
+        cols[index] = (permutation,)
+    return engine, engine.propagate(rows, cols)
+
+
+def _solve_line(task: Tuple[bool, int, Tuple[int, ...]]) -> Tuple[None | dict, int]:
+    """
+    Solves the subproblem where one row or column takes a given permutation, in a worker process.
+
+    Returns:
+        tuple: The solution (or None) and the number of line assignments made.
+    """
+    engine, state = _line_subproblem(*task)
+    found = engine.search(*state) if state is not None else None
+    if found is None:
+        return None, engine.nodes
+    rows, _ = found
+    return {(i, j): rows[i][0][j] for i in range(engine.n) for j in range(engine.n)}, engine.nodes
+
+
+def _count_line(task: Tuple[bool, int, Tuple[int, ...], int | None]) -> Tuple[int, int]:
+    """
+    Counts the solutions of the subproblem where one row or column takes a given permutation, in a worker process.
+
+    Returns:
+        tuple: The number of solutions, at most the limit of the task, and the number of line assignments made.
+    """
+    is_row, index, permutation, limit = task
+    engine, state = _line_subproblem(is_row, index, permutation)
+    count = 0
+    if state is not None:
+        for _ in engine.search_all(*state):
+            count += 1
+            if count == limit:
+                break
+    return count, engine.nodes
+
+
+class ParallelSolver(object):
+    """
+    Solves one puzzle by splitting its search tree into subproblems solved in a process pool.
+
+    The tree is expanded breadth-first on the main process, with the variable and
+    value ordering and the look-ahead of the chosen configuration, until there are
+    enough open nodes to keep every worker busy. Each node is a short sequence of
+    decisions. The pool hands the next node to whichever worker becomes free, so
+    easy and hard subtrees balance out, and every worker is terminated as soon
+    as one of them finds a solution. count_solutions adds up the counts of the
+    subproblems instead, until the limit is reached. With line search, the tree
+    is split on the permutations of the most constrained row or column instead.
+
+    Like Solver, it exposes `csp` and `solve()`, so the GUI can use either.
+
+    Attributes:
+        csp (CSP): The Constraint Satisfaction Problem to be solved.
+        clues (tuple): The clues of the puzzle as (top, bottom, left, right).
+        workers (int): The number of worker processes.
+        tasks_per_worker (int): The number of subproblems created per worker, so that free workers find more work.
+        options (dict): The keyword arguments of the Solver run by every worker.
+        subproblems (int): The number of subproblems created by the last solve.
+    """
+
+    def __init__(self, csp: CSP, clues: Tuple[List[int], List[int], List[int], List[int]] | None = None,
+                 workers: int | None = None, tasks_per_worker: int = 8, **options) -> None:
+        """
+        Initializes a ParallelSolver object.
+
+        Args:
+            csp (CSP): The Constraint Satisfaction Problem to be solved.
+            clues (tuple, optional): The clues of the puzzle, needed by the line search.
+            workers (int, optional): The number of worker processes. Defaults to the number of CPU cores.
+            tasks_per_worker (int, optional): The number of subproblems to create per worker. Defaults to 8.
+            **options: The keyword arguments of Solver (MAC, forward_checking, variable_heuristics, ...).
+        """
+        self.csp = csp
+        self.clues = clues
+        self.workers = workers or os.cpu_count() or 1
+        self.tasks_per_worker = tasks_per_worker
+        self.options = options
+        self.subproblems = 0
+
+    def solve(self) -> None | dict:
+        """
+        Splits the search tree and solves the subproblems in parallel.
+
+        Returns:
+            dict{any : any}: A list of variable-value assignments that satisfy all constraints.
+        """
+        tasks = self.split()
+        worker = _solve_line if self.options.get('line_search') else _solve_cells
+        if not tasks:
+            return None
+
+        solution = None
+        pool = self.pool(len(tasks))
+        try:
+            for solution, assignments_number in pool.imap_unordered(worker, tasks):
+                self.csp.assignments_number += assignments_number
+                if solution is not None:
+                    break
+        finally:
+            pool.terminate()
+            pool.join()
+
+        if solution is not None:
+            for var, value in solution.items():
+                self.csp.assignments[var] = value
+            self.csp.unassigned_var.clear()
+        return solution
+
+    def count_solutions(self, limit: int | None = None) -> int:
+        """
+        Counts the solutions of the CSP in parallel, stopping at `limit`.
+
+        The subproblems are disjoint, so their counts add up. Every worker counts
+        its subproblem up to the limit with Solver.count_solutions (or the line
+        search), and every worker is terminated once the total reaches it.
+
+        Args:
+            limit (int, optional): The number of solutions after which counting stops. Defaults to no limit.
+
+        Returns:
+            int: The number of solutions, at most `limit`.
+        """
+        if limit is not None and limit <= 0:
+            return 0
+        tasks = self.split()
+        if self.options.get('line_search'):
+            tasks = [(is_row, index, permutation, limit) for is_row, index, permutation in tasks]
+            worker = _count_line
+        else:
+            tasks = [(decisions, limit) for decisions in tasks]
+            worker = _count_cells
+        if not tasks:
+            return 0
+
+        count = 0
+        pool = self.pool(len(tasks))
+        try:
+            for found, assignments_number in pool.imap_unordered(worker, tasks):
+                self.csp.assignments_number += assignments_number
+                count += found
+                if limit is not None and count >= limit:
+                    count = limit
+                    break
+        finally:
+            pool.terminate()
+            pool.join()
+        return count
+
+    def split(self) -> List[Any]:
+        """
+        Splits the search tree into subproblems, on cells or on the permutations of a line with the line search.
+
+        Returns:
+            list: The subproblems (see split_cells and split_lines).
+        """
+        if self.options.get('line_search'):
+            if self.clues is None:
+                raise ValueError("The line search needs the clues of the puzzle")
+            tasks = self.split_lines()
+        else:
+            tasks = self.split_cells()
+        self.subproblems = len(tasks)
+        return tasks
+
+    def pool(self, tasks: int) -> multiprocessing.Pool:
+        """Starts the worker processes for a number of subproblems, each with its own solver of the CSP."""
+        return multiprocessing.Pool(min(self.workers, tasks), initializer=_init_worker,
+                                    initargs=(self.csp, self.clues, self.options))
+
+    def split_cells(self) -> List[List[Tuple[Any, Any]]]:
+        """
+        Expands the top of the search tree until there are enough open nodes for the workers.
+
+        Returns:
+            list: The decisions leading to every open node, in the order the sequential search would visit them.
+        """
+        # The CSP is sent to the workers afterwards, so it must not be instrumented or traced here.
+        options = {key: value for key, value in self.options.items()
+                   if key not in ('instrumented', 'constraint_timing', 'hooks', 'trace', 'trace_file')}
+        solver = Solver(self.csp, clues=self.clues, **options)
+        csp = self.csp
+        # The root propagation only guides the split, the workers propagate again: the CSP of the caller
+        # gets its domains back.
+        root = csp.domains.checkpoint()
+        if solver.MAC and solver.apply_MAC() is None:
+            csp.domains.rewind(root)
+            return []
+
+        target = self.workers * self.tasks_per_worker
+        frontier = [[]]
+        while 0 < len(frontier) < target:
+            next_frontier = []
+            expanded = False
+            for decisions in frontier:
+                checkpoint = csp.domains.checkpoint()
+                # Replaying the decisions of a node is not new work, so it is left out of the count.
+                before = csp.assignments_number
+                replayed = apply_decisions(solver, decisions)
+                csp.assignments_number = before
+                if replayed and not csp.is_complete():
+                    expanded = True
+                    var = solver.select_unassigned_variable()
+                    for value in list(solver.ordered_domain_value(var)):
+                        child_checkpoint = csp.domains.checkpoint()
+                        if apply_decisions(solver, [(var, value)]):
+                            next_frontier.append(decisions + [(var, value)])
+                        csp.un_assign([], var)
+                        csp.domains.rewind(child_checkpoint)
+                else:
+                    next_frontier.append(decisions)
+                for var, _ in reversed(decisions):
+                    csp.un_assign([], var)
+                csp.domains.rewind(checkpoint)
+            frontier = next_frontier
+            if not expanded:
+                break
+        csp.domains.rewind(root)
+        return frontier
+
+    def split_lines(self) -> List[Tuple[bool, int, Tuple[int, ...]]]:
+        """
+        Lists the permutations of the row or column with the fewest of them left after propagation.
+
+        Returns:
+            list: One (is_row, index, permutation) subproblem per permutation of that line.
+        """
+        engine = LineSolver(self.clues, self.csp.givens())
+        state = engine.propagate(list(engine.rows), list(engine.cols))
+        if state is None:
+            return []
+
+        rows, cols = state
+        candidates = [(len(line), True, i) for i, line in enumerate(rows)]
+        candidates += [(len(line), False, j) for j, line in enumerate(cols)]
+        _, is_row, index = min(candidates, key=lambda candidate: (candidate[0] <= 1, candidate[0]))
+        lines = rows if is_row else cols
+        return [(is_row, index, permutation) for permutation in lines[index]]
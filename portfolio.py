@@ -0,0 +1,135 @@
+import multiprocessing
+import os
+from typing import Any, Dict, List, Tuple
+
+from CSP import CSP
+from line_solver import MAX_LINE_SIZE
+from Solver import Solver
+
+
+# Solver configurations tried by the portfolio, as keyword arguments of Solver, from the most to the
+# least generally useful. Configurations past the end of this list reuse the randomized ones with new seeds.
+CONFIGURATIONS = [
+    {'variable_heuristics': True, 'MAC': True},
+    {'line_search': True},
+    {'variable_heuristics': True, 'forward_checking': True},
+    {'dom_wdeg': True, 'forward_checking': True, 'restarts': 'luby', 'seed': 0},
+    {'dom_wdeg': True, 'MAC': True, 'restarts': 'geometric', 'seed': 0},
+    {'domain_heuristics': True, 'variable_heuristics': True, 'MAC': True},
+    {'variable_heuristics': True, 'backjumping': True},
+    {'domain_heuristics': True, 'dom_wdeg': True, 'forward_checking': True, 'seed': 0},
+]
+
+
+def portfolio_configurations(size: int) -> List[Dict[str, Any]]:
+    """
+    Returns `size` Solver configurations for a portfolio.
+
+    The fixed configurations come first. After them, the randomized ones (those
+    with a seed) are repeated with seeds 1, 2, ... so that every extra worker
+    explores a different part of the tree.
+
+    Args:
+        size (int): The number of configurations to return.
+
+    Returns:
+        list: The keyword arguments of Solver for every configuration.
+    """
+    configurations = [dict(config) for config in CONFIGURATIONS[:size]]
+    randomized = [config for config in CONFIGURATIONS if 'seed' in config]
+    seed = 1
+    while len(configurations) < size:
+        for config in randomized:
+            if len(configurations) == size:
+                break
+            configurations.append(dict(config, seed=seed))
+        seed += 1
+    return configurations
+
+
+def describe(config: Dict[str, Any]) -> str:
+    """Returns a short description of a configuration, such as 'MAC+variable_heuristics'."""
+    parts = []
+    for key, value in config.items():
+        if value is True:
+            parts.append(key)
+        elif value is not False and value is not None:
+            parts.append(f"{key}={value}")
+    return '+'.join(parts) or 'backtracking'
+
+
+def _run_configuration(task: Tuple[int, CSP, Any, Dict[str, Any]]) -> Tuple[int, None | dict, int]:
+    """
+    Solves a private copy of the CSP with one configuration.
+
+    Returns:
+        tuple: The index of the configuration, the solution (or None) and the number of assignments.
+    """
+    index, csp, clues, config = task
+    solver = Solver(csp, clues=clues, **config)
+    solution = solver.solve()
+    return index, solution, csp.assignments_number
+
+
+class PortfolioSolver(object):
+    """
+    Runs several Solver configurations in parallel and keeps the first one to finish.
+
+    Every configuration solves its own copy of the CSP in a process pool. All of
+    them are complete, so the first result (a solution, or None when there is no
+    solution) is the answer, and the other workers are terminated right away.
+    Like Solver, it exposes `csp` and `solve()`, so the GUI can use either.
+
+    Attributes:
+        csp (CSP): The Constraint Satisfaction Problem to be solved.
+        clues (tuple): The clues of the puzzle as (top, bottom, left, right), needed by the line search.
+        configurations (list): The keyword arguments of Solver for every configuration.
+        workers (int): The number of worker processes.
+        winner (dict): The configuration that produced the result of the last solve, or None.
+    """
+
+    def __init__(self, csp: CSP, clues: Tuple[List[int], List[int], List[int], List[int]] | None = None,
+                 workers: int | None = None, configurations: List[Dict[str, Any]] | None = None) -> None:
+        """
+        Initializes a PortfolioSolver object.
+
+        Args:
+            csp (CSP): The Constraint Satisfaction Problem to be solved.
+            clues (tuple, optional): The clues of the puzzle. Without them, or above MAX_LINE_SIZE, line search
+                                     configurations are skipped.
+            workers (int, optional): The number of worker processes. Defaults to the number of CPU cores.
+            configurations (list, optional): The Solver configurations to run. Defaults to one per worker.
+        """
+        self.csp = csp
+        self.clues = clues
+        self.workers = workers or os.cpu_count() or 1
+        if configurations is None:
+            configurations = portfolio_configurations(max(self.workers, len(CONFIGURATIONS)))
+        if clues is None or len(clues[0]) > MAX_LINE_SIZE:
+            configurations = [config for config in configurations if not config.get('line_search')]
+        self.configurations = configurations
+        self.winner = None
+
+    def solve(self) -> None | dict:
+        """
+        Solves the CSP with every configuration at once and returns the first result.
+
+        Returns:
+            dict{any : any}: A list of variable-value assignments that satisfy all constraints.
+        """
+        tasks = [(index, self.csp, self.clues, config) for index, config in enumerate(self.configurations)]
+        pool = multiprocessing.Pool(min(self.workers, len(tasks)))
+        try:
+            index, solution, assignments_number = next(pool.imap_unordered(_run_configuration, tasks))
+        finally:
+            pool.terminate()
+            pool.join()
+
+        self.winner = self.configurations[index]
+        self.csp.assignments_number += assignments_number
+
+        if solution is not None:
+            for var, value in solution.items():
+                self.csp.assignments[var] = value
+            self.csp.unassigned_var.clear()
+        return solution
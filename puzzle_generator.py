@@ -0,0 +1,204 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from line_solver import MAX_LINE_SIZE, LineSolver
+from skyscraper import build_csp
+from Solver import Solver
+from test_case_generator import sample_latin_squares, square_clues
+
+
+# The labels of the difficulty estimate, by the largest search effort (assignments of the reference
+# solver per empty cell) they cover. Puzzles above the last bound are 'expert'.
+DIFFICULTY_LEVELS = [(1.0, 'easy'), (1.5, 'medium'), (3.0, 'hard')]
+
+Clues = Tuple[List[int], List[int], List[int], List[int]]
+
+
+def first_solutions(clues: Clues, givens: Dict[Tuple[int, int], int], limit: int = 2) -> List[Dict]:
+    """
+    Finds up to `limit` solutions of a puzzle, stopping as soon as it has them.
+
+    The line search is used up to MAX_LINE_SIZE, and MRV with MAC above, where
+    the permutations of the lines no longer fit in memory.
+
+    Returns:
+        list: The solutions found, as dictionaries from (row, column) to height.
+    """
+    if len(clues[0]) <= MAX_LINE_SIZE:
+        return list(islice(LineSolver(clues, givens).solutions(), limit))
+    solver = Solver(build_csp(clues, givens), variable_heuristics=True, MAC=True)
+    return list(islice(solver.solutions(), limit))
+
+
+def make_unique(clues: Clues, square: Dict[Tuple[int, int], int], rng: np.random.Generator) -> Dict:
+    """
+    Adds cells of the square as givens until it is the only solution of the clues.
+
+    Every clue of a square is kept, but larger squares often share their clues
+    with other squares. Each time another solution is found, one of the cells
+    where it differs from the square is given, which rules that solution out.
+
+    Args:
+        clues (tuple): The clues of the square as (top, bottom, left, right).
+        square (dict): The heights of the square, from (row, column) to height.
+        rng (np.random.Generator): The random generator that picks the given cells.
+
+    Returns:
+        dict: The givens, from (row, column) to height.
+    """
+    givens = {}
+    while True:
+        others = [solution for solution in first_solutions(clues, givens) if solution != square]
+        if not others:
+            return givens
+        cells = [cell for cell, height in others[0].items() if square[cell] != height]
+        cell = cells[rng.integers(len(cells))]
+        givens[cell] = square[cell]
+
+
+def minimize_clues(clues: Clues, givens: Dict[Tuple[int, int], int], rng: np.random.Generator) -> Clues:
+    """
+    Removes the clues of a unique puzzle one by one, in random order, as long as it stays unique.
+
+    Every clue is tried once. A clue whose removal lets a second solution in is
+    put back, so the result is minimal: removing any one of its clues makes the
+    puzzle ambiguous.
+
+    Args:
+        clues (tuple): The clues of a puzzle with a single solution, as (top, bottom, left, right).
+        givens (dict): The givens of the puzzle, from (row, column) to height.
+        rng (np.random.Generator): The random generator that orders the clues.
+
+    Returns:
+        tuple: The remaining clues, with 0 for the removed ones.
+    """
+    clues = tuple(list(side) for side in clues)
+    positions = [(side, index) for side in range(4) for index in range(len(clues[0])) if clues[side][index]]
+    for k in rng.permutation(len(positions)):
+        side, index = positions[k]
+        clue = clues[side][index]
+        clues[side][index] = 0
+        if len(first_solutions(clues, givens)) != 1:
+            clues[side][index] = clue
+    return clues
+
+
+def minimize_givens(clues: Clues, givens: Dict[Tuple[int, int], int],
+                    rng: np.random.Generator) -> Dict[Tuple[int, int], int]:
+    """
+    Removes the givens of a unique puzzle one by one, in random order, as long as it stays unique.
+
+    Givens added early by make_unique can become redundant once later ones are
+    in, so every given is tried once and put back only when its removal lets a
+    second solution in.
+
+    Args:
+        clues (tuple): The clues of a puzzle with a single solution, as (top, bottom, left, right).
+        givens (dict): The givens of the puzzle, from (row, column) to height.
+        rng (np.random.Generator): The random generator that orders the givens.
+
+    Returns:
+        dict: The remaining givens, from (row, column) to height.
+    """
+    givens = dict(givens)
+    cells = sorted(givens)
+    for k in rng.permutation(len(cells)):
+        cell = cells[k]
+        height = givens.pop(cell)
+        if len(first_solutions(clues, givens)) != 1:
+            givens[cell] = height
+    return givens
+
+
+def rate_difficulty(clues: Clues, givens: Dict[Tuple[int, int], int]) -> Tuple[float, str]:
+    """
+    Estimates the difficulty of a puzzle from the search effort of a reference solver (MRV with MAC).
+
+    Returns:
+        tuple: The assignments made per empty cell, and the matching label of DIFFICULTY_LEVELS.
+    """
+    csp = build_csp(clues, givens)
+    Solver(csp, variable_heuristics=True, MAC=True).solve()
+    n = len(clues[0])
+    effort = csp.assignments_number / max(n * n - len(givens), 1)
+    for bound, label in DIFFICULTY_LEVELS:
+        if effort <= bound:
+            return effort, label
+    return effort, 'expert'
+
+
+def generate_puzzle(task: Tuple[int, int, np.random.SeedSequence]) -> Dict[str, Any]:
+    """
+    Generates one minimal puzzle with a unique solution, in a worker process.
+
+    Returns:
+        dict: The puzzle record, with the id, the clues, the givens as [row, column, height]
+              triples, the number of clues, the search effort and the difficulty label.
+    """
+    index, n, seed = task
+    rng = np.random.default_rng(seed)
+    matrix = sample_latin_squares(n, 1, rng)[0]
+    square = {(i, j): int(matrix[i, j]) for i in range(n) for j in range(n)}
+    clues = square_clues(matrix)
+
+    givens = make_unique(clues, square, rng)
+    clues = minimize_clues(clues, givens, rng)
+    givens = minimize_givens(clues, givens, rng)
+    effort, difficulty = rate_difficulty(clues, givens)
+    return {
+        'id': f"n{n}-{index}",
+        'clues': list(clues),
+        'givens': [[i, j, height] for (i, j), height in sorted(givens.items())],
+        'clue_count': sum(1 for side in clues for clue in side if clue),
+        'effort': round(effort, 4),
+        'difficulty': difficulty,
+    }
+
+
+def generate_puzzles(n: int, count: int, seed: int | None = None,
+                     workers: int | None = None) -> Iterator[Dict[str, Any]]:
+    """
+    Generates minimal unique puzzles in a process pool and yields them in order.
+
+    Every puzzle gets its own seed, spawned from the main one, so the output
+    only depends on the seed and not on the number of workers.
+
+    Args:
+        n (int): The size of the puzzles.
+        count (int): The number of puzzles.
+        seed (int, optional): The main seed. Defaults to fresh entropy.
+        workers (int, optional): The number of worker processes. Defaults to the number of CPU cores.
+
+    Returns:
+        Iterator: The puzzle record of every puzzle (see generate_puzzle).
+    """
+    seeds = np.random.SeedSequence(seed).spawn(count)
+    tasks = ((index, n, seeds[index]) for index in range(count))
+    with multiprocessing.Pool(workers or os.cpu_count() or 1) as pool:
+        yield from pool.imap(generate_puzzle, tasks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate minimal skyscraper puzzles with a unique solution as JSONL")
+    parser.add_argument("-n", "--size", type=int, required=True, help="Size of the puzzles")
+    parser.add_argument("--count", type=int, default=10, help="Number of puzzles")
+    parser.add_argument("--seed", type=int, help="Seed of the generator")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (defaults to the number of CPU cores)")
+    parser.add_argument("-o", "--output", help="File to write the puzzles to (defaults to the standard output)")
+
+    args = parser.parse_args()
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for puzzle in generate_puzzles(args.size, args.count, args.seed, args.workers):
+            output.write(json.dumps(puzzle) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
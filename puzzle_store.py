@@ -0,0 +1,233 @@
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+# The header of a store: magic, version, number of puzzles and offset of the index.
+HEADER = struct.Struct('<4sHxxQQ')
+MAGIC = b'SKYB'
+VERSION = 1
+# Every puzzle starts with its size and a flag telling whether its givens follow the clues.
+PUZZLE = struct.Struct('<BB')
+
+Clues = Tuple[List[int], List[int], List[int], List[int]]
+
+
+def pack_puzzle(clues: Clues, givens: Dict[Tuple[int, int], int] | None = None) -> bytes:
+    """
+    Packs one puzzle into bytes.
+
+    The record is the size n, a givens flag, the 4n clues (top, bottom, left,
+    right, one byte each, 0 when missing) and, if the flag is set, the n * n
+    cells row by row (0 for empty cells).
+
+    Returns:
+        bytes: The packed puzzle.
+    """
+    n = len(clues[0])
+    if not 0 < n < 256:
+        raise ValueError(f"Puzzles of size {n} cannot be stored, the size must be in 1..255")
+    record = bytearray(PUZZLE.pack(n, 1 if givens else 0))
+    for side in clues:
+        record += bytes(side)
+    if givens:
+        cells = bytearray(n * n)
+        for (i, j), height in givens.items():
+            cells[i * n + j] = height
+        record += cells
+    return bytes(record)
+
+
+def unpack_puzzle(buffer, offset: int) -> Tuple[Clues, Dict[Tuple[int, int], int]]:
+    """Reads the puzzle packed at an offset of a buffer (see pack_puzzle)."""
+    n, has_givens = PUZZLE.unpack_from(buffer, offset)
+    offset += PUZZLE.size
+    clues = tuple(list(buffer[offset + k * n:offset + (k + 1) * n]) for k in range(4))
+    givens = {}
+    if has_givens:
+        cells = buffer[offset + 4 * n:offset + 4 * n + n * n]
+        givens = {divmod(index, n): height for index, height in enumerate(cells) if height}
+    return clues, givens
+
+
+class StoreWriter(object):
+    """
+    Streams puzzles into a new store file.
+
+    The puzzles are written as they come, so only their offsets are kept in
+    memory. The index and the final header are written by close (or at the end
+    of a with block).
+
+    Attributes:
+        path (str): The file being written.
+        count (int): The number of puzzles written so far.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+        self._position = HEADER.size
+        self._offsets = array('Q')
+
+    @property
+    def count(self) -> int:
+        return len(self._offsets)
+
+    def write(self, clues: Clues, givens: Dict[Tuple[int, int], int] | None = None) -> None:
+        """Appends one puzzle to the store."""
+        record = pack_puzzle(clues, givens)
+        self._offsets.append(self._position)
+        self._file.write(record)
+        self._position += len(record)
+
+    def write_block(self, records: bytes, record_size: int) -> None:
+        """
+        Appends puzzles that were already packed, all of the same size, in one write.
+
+        Args:
+            records (bytes): Consecutive records packed like pack_puzzle does.
+            record_size (int): The size of every record in bytes.
+
+        Returns:
+            None
+        """
+        if len(records) % record_size:
+            raise ValueError(f"{len(records)} bytes do not make records of {record_size} bytes")
+        self._offsets.extend(range(self._position, self._position + len(records), record_size))
+        self._file.write(records)
+        self._position += len(records)
+
+    def close(self) -> None:
+        """Writes the index and the header, and closes the file."""
+        if self._file.closed:
+            return
+        # The index is stored little-endian, like the header.
+        if sys.byteorder != 'little':
+            self._offsets.byteswap()
+        self._file.write(self._offsets.tobytes())
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, len(self._offsets), self._position))
+        self._file.close()
+
+    def __enter__(self) -> 'StoreWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_store(path: str, puzzles: Iterable[Tuple[Clues, Dict[Tuple[int, int], int] | None]]) -> int:
+    """
+    Writes puzzles to a store file, one after the other, followed by the index of their offsets.
+
+    Args:
+        path (str): The file to write.
+        puzzles (Iterable): (clues, givens) pairs, where givens may be None.
+
+    Returns:
+        int: The number of puzzles written.
+    """
+    with StoreWriter(path) as writer:
+        for clues, givens in puzzles:
+            writer.write(clues, givens)
+    return writer.count
+
+
+class PuzzleStore(object):
+    """
+    Read access to a store of many puzzles written by write_store.
+
+    The file is mapped into memory and the puzzles are decoded on demand
+    through the offset index at its end, so opening a store of millions of
+    puzzles reads nothing but its header, and any puzzle can be fetched by
+    index without parsing the others.
+
+    Attributes:
+        path (str): The store file.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._map = None
+        self._offsets = None
+        self._file = open(path, 'rb')
+        try:
+            # Empty files cannot be mapped.
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self._map) < HEADER.size:
+                raise ValueError()
+            magic, version, self._count, index = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION or index + 8 * self._count > len(self._map):
+                raise ValueError()
+        except ValueError:
+            self.close()
+            raise ValueError(f"{path} is not a puzzle store of version {VERSION}")
+
+        if sys.byteorder == 'little':
+            self._offsets = memoryview(self._map)[index:index + 8 * self._count].cast('Q')
+        else:
+            self._offsets = array('Q', self._map[index:index + 8 * self._count])
+            self._offsets.byteswap()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Tuple[Clues, Dict[Tuple[int, int], int]]:
+        """Returns the clues and the givens of the puzzle at an index."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("puzzle index out of range")
+        return unpack_puzzle(self._map, self._offsets[index])
+
+    def __iter__(self) -> Iterator[Tuple[Clues, Dict[Tuple[int, int], int]]]:
+        for index in range(self._count):
+            yield unpack_puzzle(self._map, self._offsets[index])
+
+    def close(self) -> None:
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._offsets = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> 'PuzzleStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from batch import read_puzzles
+
+    parser = argparse.ArgumentParser(description="Pack puzzles into a binary store, or list the puzzles of a store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack_parser = subparsers.add_parser("pack", help="Pack map files, directories and JSONL files into a store")
+    pack_parser.add_argument("output", help="Store file to write")
+    pack_parser.add_argument("inputs", nargs="+", help="Inputs, as accepted by batch.py")
+    show_parser = subparsers.add_parser("show", help="Print puzzles of a store as JSON lines")
+    show_parser.add_argument("store", help="Store file to read")
+    show_parser.add_argument("--start", type=int, default=0, help="Index of the first puzzle to print")
+    show_parser.add_argument("--count", type=int, default=10, help="Number of puzzles to print")
+
+    args = parser.parse_args()
+    if args.command == "pack":
+        puzzles = ((clues, givens) for _, clues, givens in read_puzzles(args.inputs) if not isinstance(clues, str))
+        print(f"{write_store(args.output, puzzles)} puzzles written to {args.output}")
+    else:
+        with PuzzleStore(args.store) as store:
+            for index in range(args.start, min(args.start + args.count, len(store))):
+                clues, givens = store[index]
+                record = {'id': f"{args.store}:{index}", 'clues': clues}
+                if givens:
+                    record['givens'] = [[i, j, height] for (i, j), height in sorted(givens.items())]
+                print(json.dumps(record))
@@ -0,0 +1,256 @@
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+from CSP import CSP
+from constraints import Visibility, distinction_constraint
+from limits import LIMITS
+from Solver import Solver
+
+if TYPE_CHECKING:
+    # argparse is only needed by the command line tools, which import it themselves.
+    import argparse
+
+    from solution_cache import SolutionCache
+
+
+def build_csp(clues: Tuple[List[int], List[int], List[int], List[int]],
+              givens: Dict[Tuple[int, int], int] | None = None) -> CSP:
+    """
+    Builds the CSP of a skyscraper puzzle.
+
+    Every cell (i, j) is a variable with the domain 1..n, or only its height when
+    it is given. Each row and column gets a distinction constraint and one
+    visibility constraint per clue (missing clues, written 0, have none).
+
+    Args:
+        clues (tuple): The clues of the puzzle as (top, bottom, left, right).
+        givens (dict, optional): The pre-filled heights, as a dictionary from (row, column) to height.
+
+    Returns:
+        CSP: The Constraint Satisfaction Problem of the puzzle.
+    """
+    top, bottom, left, right = clues
+    grid_size = len(top)
+    givens = givens or {}
+
+    csp = CSP()
+    for i in range(grid_size):
+        for j in range(grid_size):
+            if (i, j) in givens:
+                csp.add_variable((i, j), [givens[(i, j)]])
+            else:
+                csp.add_variable((i, j), range(1, grid_size + 1))
+
+    for i in range(grid_size):
+        # distinction constraints for row i and column i
+        csp.add_constraint(distinction_constraint, [(i, j) for j in range(grid_size)])
+        csp.add_constraint(distinction_constraint, [(j, i) for j in range(grid_size)])
+
+    # constraints for visibility of skyscrapers for row i
+    for i in range(grid_size):
+        if left[i]:
+            csp.add_constraint(Visibility(left[i], 'left'), [(i, j) for j in range(grid_size)])
+        if right[i]:
+            csp.add_constraint(Visibility(right[i], 'right'), [(i, j) for j in range(grid_size)])
+
+    # constraints for visibility of skyscrapers for column i
+    for i in range(grid_size):
+        if top[i]:
+            csp.add_constraint(Visibility(top[i], 'down'), [(j, i) for j in range(grid_size)])
+        if bottom[i]:
+            csp.add_constraint(Visibility(bottom[i], 'up'), [(j, i) for j in range(grid_size)])
+
+    return csp
+
+
+def create_solver(csp: CSP, clues: Tuple[List[int], List[int], List[int], List[int]],
+                  options: Dict[str, Any] | None = None, portfolio: bool = False, parallel: bool = False,
+                  workers: int | None = None) -> Any:
+    """
+    Creates the solver of a CSP: a Solver, a PortfolioSolver or a ParallelSolver.
+
+    The parallel solvers (and multiprocessing) are only imported when they are used.
+
+    Args:
+        csp (CSP): The Constraint Satisfaction Problem to be solved.
+        clues (tuple): The clues of the puzzle as (top, bottom, left, right).
+        options (dict, optional): The keyword arguments of Solver. Ignored by the portfolio, except for the limits.
+        portfolio (bool, optional): Flag indicating whether to run a portfolio of configurations. Defaults to False.
+        parallel (bool, optional): Flag indicating whether to split the search tree over processes. Defaults to False.
+        workers (int, optional): The number of worker processes of the parallel solvers.
+
+    Returns:
+        Solver | PortfolioSolver | ParallelSolver: The solver, whose solve() returns the solution or None.
+    """
+    options = options or {}
+    # The workers of the parallel solvers would report a search stopped by a limit as unsolvable.
+    if (portfolio or parallel) and any(options.get(name) is not None for name in LIMITS):
+        raise ValueError("The search limits are not supported by the portfolio and parallel solvers")
+    if portfolio:
+        from portfolio import PortfolioSolver
+        return PortfolioSolver(csp, clues=clues, workers=workers)
+    if parallel:
+        from parallel_search import ParallelSolver
+        return ParallelSolver(csp, clues=clues, workers=workers, **options)
+    return Solver(csp, clues=clues, **options)
+
+
+def solve(clues: Tuple[List[int], List[int], List[int], List[int]], options: Dict[str, Any] | None = None,
+          portfolio: bool = False, parallel: bool = False, workers: int | None = None,
+          givens: Dict[Tuple[int, int], int] | None = None, cache: 'SolutionCache | None' = None) -> Dict[str, Any]:
+    """
+    Solves a skyscraper puzzle without the GUI.
+
+    Args:
+        clues (tuple): The clues of the puzzle as (top, bottom, left, right).
+        options (dict, optional): The keyword arguments of Solver, such as {'variable_heuristics': True, 'MAC': True}.
+        portfolio (bool, optional): Flag indicating whether to run a portfolio of configurations. Defaults to False.
+        parallel (bool, optional): Flag indicating whether to split the search tree over processes. Defaults to False.
+        workers (int, optional): The number of worker processes of the parallel solvers.
+        givens (dict, optional): The pre-filled heights, as a dictionary from (row, column) to height.
+        cache (SolutionCache, optional): A cache that answers puzzles solved before, or their rotations
+                                         and reflections, and keeps the new results. Defaults to None.
+
+    Returns:
+        dict: The status ('solved', 'unsolvable', or 'unknown' when a limit of the search was reached,
+              with the limit as 'reason'), the solution grid as a list of rows (or None), the number
+              of assignments, the wall time in seconds, and the search statistics if they are enabled.
+              A portfolio also gives the configuration that won as 'winner'. Results from the cache have no assignments and are marked 'cached'.
+    """
+    start = time.perf_counter()
+    if cache is not None:
+        found, grid = cache.lookup(clues, givens)
+        if found:
+            return {
+                'status': 'unsolvable' if grid is None else 'solved',
+                'solution': grid,
+                'assignments': 0,
+                'time': time.perf_counter() - start,
+                'cached': True,
+            }
+
+    csp = build_csp(clues, givens)
+    solver = create_solver(csp, clues, options, portfolio, parallel, workers)
+    solution = solver.solve()
+
+    n = len(clues[0])
+    stopped = isinstance(solver, Solver) and solver.status == 'unknown'
+    result = {
+        'status': 'unknown' if stopped else 'unsolvable' if solution is None else 'solved',
+        'solution': None if solution is None else [[solution[(i, j)] for j in range(n)] for i in range(n)],
+        'assignments': csp.assignments_number,
+        'time': time.perf_counter() - start,
+    }
+    if stopped:
+        result['reason'] = solver.limit_reason
+        result['nodes'] = solver.nodes
+    if isinstance(solver, Solver) and solver.stats.enabled:
+        result['stats'] = solver.stats.as_dict()
+    if portfolio:
+        from portfolio import describe
+        result['winner'] = describe(solver.winner)
+    if cache is not None and not stopped:
+        cache.store(clues, givens, result['solution'])
+    return result
+
+
+def add_solver_arguments(parser: 'argparse.ArgumentParser') -> None:
+    """Adds the flags that configure a Solver to a command line parser."""
+    parser.add_argument(
+        "-lcv",
+        "--lcv",
+        action="store_true",
+        help="Enable least constraint value (LCV) as a order-type optimizer"
+    )
+    parser.add_argument(
+        "-mrv",
+        "--mrv",
+        action="store_true",
+        help="Enable minimum remaining values (MRV) as a order-type optimizer"
+    )
+    parser.add_argument(
+        "-MAC",
+        "--maintaining_arc_consistency",
+        action="store_true",
+        help="Enable arc consistency as a mechanism to eliminate the domain of variables achieving an optimized solution"
+    )
+    parser.add_argument(
+        "-fc",
+        "--forward_checking",
+        action="store_true",
+        help="Enable forward checking to prune the domains of neighbouring variables after each assignment"
+    )
+    parser.add_argument(
+        "-wdeg",
+        "--dom_wdeg",
+        action="store_true",
+        help="Order variables by domain size over the weights of the constraints that caused failures (dom/wdeg)"
+    )
+    parser.add_argument(
+        "--restarts",
+        choices=["luby", "geometric"],
+        help="Restart the search with a growing failure limit, following the given policy"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Seed for breaking ties between equally good variables at random"
+    )
+    parser.add_argument(
+        "-cbj",
+        "--backjumping",
+        action="store_true",
+        help="Use conflict-directed backjumping with nogood recording instead of chronological backtracking"
+    )
+    parser.add_argument(
+        "-lines",
+        "--line_search",
+        action="store_true",
+        help="Search over whole rows and columns, using the permutations allowed by each clue pair"
+    )
+    parser.add_argument(
+        "-stats",
+        "--stats",
+        action="store_true",
+        help="Collect search statistics (assignments, checks, prunings, backtracks, ...) and print them as JSON"
+    )
+    parser.add_argument(
+        "--constraint_timing",
+        action="store_true",
+        help="Also measure the time spent in every constraint (implies --stats)"
+    )
+    parser.add_argument(
+        "--trace",
+        choices=["failures", "decisions", "all"],
+        help="Record the search events of this level (and the ones below it) in a ring buffer"
+    )
+    parser.add_argument(
+        "--trace_size",
+        type=int,
+        default=65536,
+        help="Number of most recent events kept by --trace"
+    )
+    parser.add_argument(
+        "--node_limit",
+        type=int,
+        help="Stop the search after this many nodes and report the puzzle as unknown"
+    )
+    parser.add_argument(
+        "--assignment_limit",
+        type=int,
+        help="Stop the search after this many assignments and report the puzzle as unknown"
+    )
+    parser.add_argument(
+        "--time_limit",
+        type=float,
+        help="Stop the search after this many seconds and report the puzzle as unknown"
+    )
+
+
+def solver_options(args: 'argparse.Namespace') -> Dict[str, Any]:
+    """Returns the keyword arguments of Solver selected by the flags of add_solver_arguments."""
+    return dict(domain_heuristics=args.lcv, variable_heuristics=args.mrv, MAC=args.maintaining_arc_consistency,
+                line_search=args.line_search, forward_checking=args.forward_checking, dom_wdeg=args.dom_wdeg,
+                restarts=args.restarts, seed=args.seed, backjumping=args.backjumping, instrumented=args.stats,
+                constraint_timing=args.constraint_timing, trace=args.trace, trace_capacity=args.trace_size,
+                node_limit=args.node_limit, assignment_limit=args.assignment_limit, time_limit=args.time_limit)
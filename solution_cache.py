@@ -0,0 +1,223 @@
+import dbm
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from operator import itemgetter
+from typing import Callable, Dict, List, Tuple
+
+from puzzle_store import PUZZLE
+
+
+Clues = Tuple[List[int], List[int], List[int], List[int]]
+Grid = List[List[int]]
+
+
+def _getter(order: List[int]) -> Callable:
+    """Returns a function that picks the items of a sequence in an order, as a tuple."""
+    if len(order) == 1:
+        return lambda sequence: (sequence[order[0]],)
+    return itemgetter(*order)
+
+
+@lru_cache(maxsize=None)
+def symmetries(n: int) -> List[Tuple[Callable, Callable, Callable]]:
+    """
+    Returns the 8 symmetries of the square (rotations and reflections) for puzzles of size n.
+
+    A symmetry moves the cell (i, j) to (a, b), where a and b are i and j,
+    possibly mirrored (n - 1 - i), and possibly swapped. The clues move with
+    the cells: they are placed around the grid, at row -1 (top), row n
+    (bottom), column -1 (left) and column n (right), where the same formula
+    moves them to their new side.
+
+    Args:
+        n (int): The size of the puzzles.
+
+    Returns:
+        list: For every symmetry, the functions that pick the transformed clues (as the flat
+              top + bottom + left + right vector) and cells (row by row) of a puzzle, and the
+              function that picks the cells of a grid back from the transformed grid.
+    """
+    slots = [(-1, j) for j in range(n)] + [(n, j) for j in range(n)] + \
+            [(i, -1) for i in range(n)] + [(i, n) for i in range(n)]
+    slot_index = {slot: k for k, slot in enumerate(slots)}
+    cells = [(i, j) for i in range(n) for j in range(n)]
+
+    result = []
+    for swap in (False, True):
+        for mirror_i in (False, True):
+            for mirror_j in (False, True):
+                def move(cell):
+                    a = n - 1 - cell[0] if mirror_i else cell[0]
+                    b = n - 1 - cell[1] if mirror_j else cell[1]
+                    return (b, a) if swap else (a, b)
+
+                # The transformed puzzle holds at move(p) what the puzzle holds at p.
+                clue_order = [0] * len(slots)
+                for k, slot in enumerate(slots):
+                    clue_order[slot_index[move(slot)]] = k
+                forward = [a * n + b for a, b in map(move, cells)]
+                cell_order = [0] * len(cells)
+                for k, target in enumerate(forward):
+                    cell_order[target] = k
+                result.append((_getter(clue_order), _getter(cell_order), _getter(forward)))
+    return result
+
+
+def canonical_form(clues: Clues, givens: Dict[Tuple[int, int], int] | None = None) -> Tuple[bytes, Callable]:
+    """
+    Returns the canonical form of a puzzle under the rotations and reflections of the grid.
+
+    The puzzle is packed like puzzle_store.pack_puzzle in each of its 8
+    orientations, and the smallest record is the canonical form, so all
+    rotations and reflections of a puzzle share it.
+
+    Args:
+        clues (tuple): The clues of the puzzle as (top, bottom, left, right), with 0 for the missing ones.
+        givens (dict, optional): The pre-filled heights, as a dictionary from (row, column) to height.
+
+    Returns:
+        tuple: The canonical form as bytes, and the function that turns a grid of the canonical
+               puzzle, flattened row by row, into the flat grid of this puzzle.
+    """
+    n = len(clues[0])
+    if not 0 < n < 256:
+        raise ValueError(f"Puzzles of size {n} cannot be cached, the size must be in 1..255")
+    flat_clues = [clue for side in clues for clue in side]
+    cells = None
+    if givens:
+        cells = [0] * (n * n)
+        for (i, j), height in givens.items():
+            cells[i * n + j] = height
+    header = PUZZLE.pack(n, 1 if givens else 0)
+
+    best = None
+    best_back = None
+    for pick_clues, pick_cells, back in symmetries(n):
+        form = header + bytes(pick_clues(flat_clues))
+        if cells is not None:
+            form += bytes(pick_cells(cells))
+        if best is None or form < best:
+            best = form
+            best_back = back
+    return best, best_back
+
+
+class SolutionCache(object):
+    """
+    A cache of solved puzzles, shared by all the rotations and reflections of a puzzle.
+
+    The solutions are kept by the canonical form of their puzzle (see
+    canonical_form), in the orientation of the canonical puzzle, and are turned
+    back to the orientation of the puzzle that is looked up. The most recently
+    used `capacity` entries are kept in memory; with a path, every entry is
+    also written to a dbm database that is read back by later runs. Puzzles
+    known to have no solution are cached too. When a puzzle has several
+    solutions, the cache returns the one that was stored.
+
+    The methods take a lock, so a cache can be shared by threads.
+
+    Attributes:
+        capacity (int): The number of entries kept in memory.
+        path (str): The database file, or None for a cache in memory only.
+        hits (int): The number of lookups answered by the cache.
+        misses (int): The number of lookups that were not.
+    """
+
+    def __init__(self, capacity: int = 4096, path: str | None = None) -> None:
+        """
+        Initializes a SolutionCache object.
+
+        Args:
+            capacity (int, optional): The number of entries kept in memory. Defaults to 4096.
+            path (str, optional): The database file that persists the cache across runs. Defaults to None.
+        """
+        if capacity <= 0:
+            raise ValueError("The cache capacity must be positive")
+        self.capacity = capacity
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = dbm.open(path, 'c') if path is not None else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: bytes, value: bytes) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def lookup(self, clues: Clues, givens: Dict[Tuple[int, int], int] | None = None) -> Tuple[bool, Grid | None]:
+        """
+        Looks a puzzle up in the memory, then in the database.
+
+        Args:
+            clues (tuple): The clues of the puzzle as (top, bottom, left, right).
+            givens (dict, optional): The pre-filled heights, as a dictionary from (row, column) to height.
+
+        Returns:
+            tuple: Whether the puzzle was found, and its solution grid as a list of rows,
+                   or None if it has no solution (or was not found).
+        """
+        key, back = canonical_form(clues, givens)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            elif self._db is not None:
+                value = self._db.get(key)
+                if value is not None:
+                    self._remember(key, value)
+            if value is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+
+        if not value:
+            return True, None
+        n = len(clues[0])
+        grid = back(value)
+        return True, [list(grid[i * n:(i + 1) * n]) for i in range(n)]
+
+    def store(self, clues: Clues, givens: Dict[Tuple[int, int], int] | None, solution: Grid | None) -> None:
+        """
+        Adds a solved puzzle to the cache.
+
+        Args:
+            clues (tuple): The clues of the puzzle as (top, bottom, left, right).
+            givens (dict): The pre-filled heights, as a dictionary from (row, column) to height, or None.
+            solution (list): The solution grid as a list of rows, or None if the puzzle has no solution.
+
+        Returns:
+            None
+        """
+        key, back = canonical_form(clues, givens)
+        value = b''
+        if solution is not None:
+            # back moves the cells from the canonical puzzle to this one, so it is inverted here.
+            cells = [height for row in solution for height in row]
+            canonical = [0] * len(cells)
+            for k, height in zip(back(range(len(cells))), cells):
+                canonical[k] = height
+            value = bytes(canonical)
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db[key] = value
+
+    def close(self) -> None:
+        """Closes the database, which writes it to disk."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __enter__(self) -> 'SolutionCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
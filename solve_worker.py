@@ -0,0 +1,90 @@
+import threading
+import time
+from typing import Any, Dict
+
+
+class SolveWorker(object):
+    """
+    Runs the solve() of a solver in a background thread, so a GUI stays responsive.
+
+    The worker never calls back into the GUI: the GUI polls `assignments`,
+    `depth`, `elapsed` and `snapshot()` from its own loop, at the rate it
+    wants. Cancelling goes through the limits.CancellationToken the solver was
+    created with (Solver(cancel_token=...)): the search stops at its next node,
+    in the cell search and in the line search alike, and leaves the CSP as it
+    was before the solve. The portfolio and parallel solvers search in other
+    processes, they cannot be interrupted and only report when they are done,
+    so cancelling them just stops the wait for their result.
+
+    Attributes:
+        solver (Solver): The solver that is run.
+        solution (dict): The solution, once the search has found one.
+        error (Exception): The exception the search raised, if any.
+    """
+
+    def __init__(self, solver: Any) -> None:
+        self.solver = solver
+        self.csp = solver.csp
+        self.solution = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._start = None
+        self._end = None
+        self._variable_count = len(self.csp.assignments)
+
+    def start(self) -> None:
+        """Starts the search."""
+        self._start = time.perf_counter()
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            self.solution = self.solver.solve()
+        except Exception as error:
+            self.error = error
+        finally:
+            self._end = time.perf_counter()
+
+    def cancel(self) -> None:
+        """Asks the search to stop at its next node."""
+        self._cancel.set()
+        token = getattr(self.solver, 'cancel_token', None)
+        if token is not None:
+            token.cancel()
+
+    def join(self, timeout: float | None = None) -> None:
+        """Waits for the search to stop, at most `timeout` seconds."""
+        if self._start is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        """The time the search has run so far, or took, in seconds."""
+        if self._start is None:
+            return 0.0
+        return (self._end if self._end is not None else time.perf_counter()) - self._start
+
+    @property
+    def assignments(self) -> int:
+        return self.csp.assignments_number
+
+    @property
+    def depth(self) -> int:
+        """The number of variables assigned on the current branch, or of lines fixed by the line search."""
+        engine = getattr(self.solver, 'engine', None)
+        if engine is not None:
+            return engine.depth
+        return self._variable_count - len(self.csp.unassigned_var)
+
+    def snapshot(self) -> Dict[Any, Any]:
+        """Returns a copy of the current assignments, with None for unassigned variables."""
+        return dict(self.csp.assignments)
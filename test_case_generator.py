@@ -2,6 +2,8 @@ import numpy as np
 import random
 import argparse
 
+from puzzle_store import PUZZLE, StoreWriter
+
 
 def longest_increasing_sequence(arr):
     """Find the length of the longest increasing sequence starting from the beginning."""
@@ -79,18 +81,9 @@ def analyze_matrix(matrix):
     output = []
 
     # Calculate increasing sequences for each row and column
-    for i in range(len(matrix)):
-        row = matrix[i]
-        col = matrix[:, i]
-
-        # Find longest increasing sequence
-        start_seq_length_row = longest_increasing_sequence(row)
-        end_seq_length_row = longest_increasing_sequence(np.flip(row))
-        sequence_rows.append((start_seq_length_row, end_seq_length_row))
-
-        start_seq_length_col = longest_increasing_sequence(col)
-        end_seq_length_col = longest_increasing_sequence(np.flip(col))
-        sequence_cols.append((start_seq_length_col, end_seq_length_col))
+    top, bottom, left, right = square_clues(matrix)
+    sequence_rows = list(zip(left, right))
+    sequence_cols = list(zip(top, bottom))
 
     # Check if the matrix is a valid Latin square
     if not is_latin_square(matrix):
@@ -104,7 +97,7 @@ def analyze_matrix(matrix):
     # Format the row sequence analysis
     for j, tup in enumerate(sequence_rows):
         row = matrix[j]
-        output.append(f"{tup[0]} {list(row)} {tup[1]}\n")
+        output.append(f"{tup[0]} {row.tolist()} {tup[1]}\n")
 
     # Format the bottom row of column sequence analysis
     output.append('   ' + '  '.join(f"{tup[1]}" for tup in sequence_cols) + '\n')
@@ -113,6 +106,33 @@ def analyze_matrix(matrix):
     return ''.join(output)
 
 
+def visible_counts(lines):
+    """Count the buildings visible from the start of every line, along the last axis of an array."""
+    highest = np.maximum.accumulate(lines, axis=-1)
+    return 1 + np.count_nonzero(highest[..., 1:] > highest[..., :-1], axis=-1)
+
+
+def batch_clues(squares):
+    """
+    Compute the clues of many solved grids at once.
+
+    Args:
+        squares (np.ndarray): The grids, with shape (count, n, n).
+
+    Returns:
+        np.ndarray: The clues with shape (count, 4, n), as (top, bottom, left, right) for every grid.
+    """
+    columns = np.swapaxes(squares, 1, 2)
+    return np.stack([visible_counts(columns), visible_counts(columns[..., ::-1]),
+                     visible_counts(squares), visible_counts(squares[..., ::-1])], axis=1)
+
+
+def square_clues(matrix):
+    """Return the clues (top, bottom, left, right) of a solved grid, in the order map_reader returns them."""
+    top, bottom, left, right = batch_clues(np.asarray(matrix)[None])[0].tolist()
+    return top, bottom, left, right
+
+
 def generate_latin_square_backtracking(square):
     return permute_latin_square(square)
 
@@ -142,16 +162,144 @@ def permute_latin_square(square):
     return square_permuted
 
 
+def _pick(mask, rng):
+    """Pick, in every row of a boolean array with one or two True positions, one of them uniformly at random."""
+    first = np.argmax(mask, axis=1)
+    last = mask.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1)
+    return np.where(rng.random(len(mask)) < 0.5, first, last)
+
+
+def sample_latin_squares(n, count, rng=None, steps=None, interval=None):
+    """
+    Sample Latin squares uniformly with the Jacobson-Matthews Markov chain.
+
+    Every square is an incidence cube (cell (r, c) holds symbol s when
+    cube[r, c, s] is 1). A move changes eight entries of the cube around one
+    cell by +1 or -1; it can leave one entry at -1 (an improper square), which
+    the next moves repair. The chain is uniform over all Latin squares in the
+    limit, unlike row and column permutations of one cyclic square. All the
+    squares of the batch are stepped together with NumPy. After `steps` moves a
+    square is taken if it is proper, and looked at again every `interval` moves
+    otherwise: taking it the very move it becomes proper would favour the
+    squares that are most often reached from improper ones.
+
+    Args:
+        n (int): The size of the squares.
+        count (int): The number of squares.
+        rng (np.random.Generator | int, optional): The random generator, or a seed for one.
+        steps (int, optional): The number of moves of every chain. Defaults to n ** 3.
+        interval (int, optional): The number of moves between two looks at an improper chain. Defaults to n ** 2.
+
+    Returns:
+        np.ndarray: The squares with shape (count, n, n), holding the symbols 1..n.
+    """
+    rng = np.random.default_rng(rng)
+    if n == 1:
+        return np.ones((count, 1, 1), dtype=np.intp)
+    if steps is None:
+        steps = n ** 3
+    if interval is None:
+        interval = n ** 2
+
+    cells = np.arange(n)
+    cube = np.zeros((count, n, n, n), dtype=np.int8)
+    cube[:, cells[:, None], cells[None, :], (cells[:, None] + cells[None, :]) % n] = 1
+    improper = np.zeros(count, dtype=bool)
+    improper_cell = np.zeros((count, 3), dtype=np.intp)
+
+    # The cubes are indexed through one flat view, where entry (b, r, c, s) is at b * n^3 + r * n^2 + c * n + s.
+    flat = cube.reshape(-1)
+    r_stride, c_stride = n * n, n
+    r_line, c_line = cells * r_stride, cells * c_stride
+
+    active = np.arange(count)
+    step = 0
+    while len(active):
+        step += 1
+        base = active * n ** 3
+        stuck = improper[active]
+        r = np.where(stuck, improper_cell[active, 0], rng.integers(n, size=len(active)))
+        c = np.where(stuck, improper_cell[active, 1], rng.integers(n, size=len(active)))
+        rc = base + r * r_stride + c * c_stride
+        # In a proper square each of these lines has one 1, in an improper one two, and one is picked.
+        s2 = _pick(flat[rc[:, None] + cells] == 1, rng)
+        # A proper square moves from a random cell and a symbol that it does not hold.
+        s = np.where(stuck, improper_cell[active, 2], (s2 + rng.integers(1, n, size=len(active))) % n)
+        r2 = _pick(flat[(base + c * c_stride + s)[:, None] + r_line] == 1, rng)
+        c2 = _pick(flat[(base + r * r_stride + s)[:, None] + c_line] == 1, rng)
+
+        rc2 = base + r * r_stride + c2 * c_stride
+        r2c = base + r2 * r_stride + c * c_stride
+        r2c2 = base + r2 * r_stride + c2 * c_stride
+        flat[rc + s] += 1
+        flat[rc2 + s2] += 1
+        flat[r2c + s2] += 1
+        flat[r2c2 + s] += 1
+        flat[rc2 + s] -= 1
+        flat[rc + s2] -= 1
+        flat[r2c + s] -= 1
+        flat[r2c2 + s2] -= 1
+
+        improper[active] = flat[r2c2 + s2] == -1
+        improper_cell[active] = np.stack([r2, c2, s2], axis=1)
+
+        if step >= steps and (step - steps) % interval == 0:
+            active = np.flatnonzero(improper)
+
+    return np.argmax(cube, axis=3) + 1
+
+
+def write_puzzle_store(path, n, count, seed=None, batch_size=10000, steps=None):
+    """
+    Generate puzzles from uniformly sampled Latin squares and stream them to a puzzle store.
+
+    The squares are sampled and their clues computed one batch at a time, and
+    every batch is packed with NumPy and written in one block, so the memory
+    used does not grow with the number of puzzles.
+
+    Args:
+        path (str): The store file to write (see puzzle_store.py).
+        n (int): The size of the puzzles.
+        count (int): The number of puzzles.
+        seed (int, optional): The seed of the random generator.
+        batch_size (int, optional): The number of squares sampled at once. Defaults to 10000.
+        steps (int, optional): The number of Markov chain moves per square. Defaults to n ** 3.
+
+    Returns:
+        int: The number of puzzles written.
+    """
+    rng = np.random.default_rng(seed)
+    record_size = PUZZLE.size + 4 * n
+    with StoreWriter(path) as writer:
+        while writer.count < count:
+            size = min(batch_size, count - writer.count)
+            clues = batch_clues(sample_latin_squares(n, size, rng, steps))
+            records = np.zeros((size, record_size), dtype=np.uint8)
+            records[:, 0] = n  # the size, followed by a zero "no givens" flag
+            records[:, PUZZLE.size:] = clues.reshape(size, 4 * n)
+            writer.write_block(records.tobytes(), record_size)
+    return writer.count
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate and analyze Latin squares.")
     parser.add_argument("-grid_size", type=int, required=True, help="The grid size for the Latin square.")
-    parser.add_argument("-map", type=int, required=True, help="The map number for the output file name.")
+    parser.add_argument("-map", type=int, help="The map number for the output file name.")
+    parser.add_argument("-output", help="Write COUNT puzzles to this puzzle store (.skyb) instead of one map file.")
+    parser.add_argument("-count", type=int, default=1, help="The number of puzzles written to the store.")
+    parser.add_argument("-seed", type=int, help="The seed of the random generator.")
+    parser.add_argument("-batch_size", type=int, default=10000, help="The number of squares sampled at once.")
 
     args = parser.parse_args()
+    if args.output is not None:
+        written = write_puzzle_store(args.output, args.grid_size, args.count, args.seed, args.batch_size)
+        print(f"{written} puzzles of size {args.grid_size} written to {args.output}")
+        return
+    if args.map is None:
+        parser.error("either -map or -output is required")
 
-    # Generate a Latin square of the specified grid size
-    base_square = generate_latin_square(args.grid_size)
-    latin_square = generate_latin_square_backtracking(base_square)
+    # Sample a Latin square of the specified grid size uniformly
+    latin_square = sample_latin_squares(args.grid_size, 1, args.seed)[0]
 
     # Analyze the matrix and get formatted string output
     analysis = analyze_matrix(latin_square)
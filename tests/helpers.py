@@ -0,0 +1,83 @@
+"""Brute-force references the tests compare the solver against."""
+import random
+from functools import lru_cache
+from itertools import permutations
+from typing import Dict, List, Tuple
+
+Clues = Tuple[List[int], List[int], List[int], List[int]]
+Grid = Tuple[Tuple[int, ...], ...]
+
+
+def visible(line) -> int:
+    """Counts the buildings seen from the start of a line."""
+    count = 0
+    tallest = 0
+    for height in line:
+        if height > tallest:
+            count += 1
+            tallest = height
+    return count
+
+
+@lru_cache(maxsize=None)
+def latin_squares(n: int) -> Tuple[Grid, ...]:
+    """Returns every Latin square of size n (576 for n = 4, 161280 for n = 5)."""
+    rows = list(permutations(range(1, n + 1)))
+    squares = []
+
+    def extend(square):
+        if len(square) == n:
+            squares.append(tuple(square))
+            return
+        for row in rows:
+            if all(row[j] != other[j] for other in square for j in range(n)):
+                extend(square + [row])
+
+    extend([])
+    return tuple(squares)
+
+
+def grid_clues(grid: Grid) -> Clues:
+    """Returns the full clues (top, bottom, left, right) of a grid."""
+    n = len(grid)
+    columns = [[grid[i][j] for i in range(n)] for j in range(n)]
+    return ([visible(column) for column in columns], [visible(column[::-1]) for column in columns],
+            [visible(row) for row in grid], [visible(row[::-1]) for row in grid])
+
+
+def fits(grid: Grid, clues: Clues, givens: Dict[Tuple[int, int], int] | None = None) -> bool:
+    """Checks a Latin square against the clues (0 for a missing one) and the givens."""
+    if any((grid[i][j] != height) for (i, j), height in (givens or {}).items()):
+        return False
+    return all(clue == 0 or clue == actual
+               for side, actual_side in zip(clues, grid_clues(grid))
+               for clue, actual in zip(side, actual_side))
+
+
+def brute_solutions(clues: Clues, givens: Dict[Tuple[int, int], int] | None = None) -> List[Grid]:
+    """Returns every solution of a puzzle by checking all the Latin squares of its size."""
+    return [grid for grid in latin_squares(len(clues[0])) if fits(grid, clues, givens)]
+
+
+def as_grid(solution: Dict[Tuple[int, int], int], n: int) -> Grid:
+    """Turns a solution dictionary into a grid."""
+    return tuple(tuple(solution[(i, j)] for j in range(n)) for i in range(n))
+
+
+def random_puzzle(rng: random.Random, n: int, keep: float = 0.5,
+                  given_count: int = 0) -> Tuple[Clues, Dict[Tuple[int, int], int]]:
+    """
+    Makes a puzzle from a random Latin square: each clue is kept with probability `keep`, and
+    `given_count` random cells are given.
+    """
+    if n <= 4:
+        grid = rng.choice(latin_squares(n))
+    else:
+        grid = [[(i + j) % n + 1 for j in range(n)] for i in range(n)]
+        rng.shuffle(grid)
+        order = list(range(n))
+        rng.shuffle(order)
+        grid = tuple(tuple(row[j] for j in order) for row in grid)
+    clues = tuple([clue if rng.random() < keep else 0 for clue in side] for side in grid_clues(grid))
+    cells = rng.sample([(i, j) for i in range(n) for j in range(n)], given_count)
+    return clues, {cell: grid[cell[0]][cell[1]] for cell in cells}
@@ -0,0 +1,46 @@
+import random
+from itertools import product
+
+import pytest
+
+from alldifferent import AllDifferentPropagator
+from domain_store import DomainStore
+
+
+def exact_gac(domains):
+    """Keeps the values that take part in some assignment of distinct values, or None if there is none."""
+    kept = [set() for _ in domains]
+    for values in product(*domains):
+        if len(set(values)) == len(values):
+            for position, value in enumerate(values):
+                kept[position].add(value)
+    if not kept[0]:
+        return None
+    return [sorted(values) for values in kept]
+
+
+@pytest.mark.parametrize("size", range(1, 7))
+def test_filter_matches_exact_gac(size):
+    rng = random.Random(size)
+    variables = list(range(size))
+    store = DomainStore()
+    for var in variables:
+        store.add(var, range(1, size + 2))
+    # One propagator for all the cases, so the matching it keeps between calls is exercised too.
+    propagator = AllDifferentPropagator(variables)
+    for _ in range(300):
+        mark = store.checkpoint()
+        for var in variables:
+            kept = [value for value in range(1, size + 2) if rng.random() < 0.6]
+            store.set_mask(var, store.mask_of(kept))
+        domains = [store.values(var) for var in variables]
+        expected = exact_gac(domains)
+
+        removed = propagator.filter(store)
+        if expected is None:
+            assert removed is None, domains
+        else:
+            assert [store.values(var) for var in variables] == expected, domains
+            assert sorted(removed) == sorted((var, value) for var in variables
+                                             for value in domains[var] if value not in expected[var])
+        store.rewind(mark)
@@ -0,0 +1,42 @@
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from helpers import brute_solutions, fits, random_puzzle
+from skyscraper import solve
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_solve_agrees_with_brute_force(seed):
+    rng = random.Random(seed)
+    clues, givens = random_puzzle(rng, 4, keep=0.5, given_count=rng.randint(0, 1))
+    if seed % 2:
+        clues[rng.randrange(4)][rng.randrange(4)] = rng.randint(1, 4)
+    result = solve(clues, {'MAC': True, 'variable_heuristics': True}, givens=givens)
+    if brute_solutions(clues, givens):
+        assert result['status'] == 'solved'
+        assert fits(tuple(map(tuple, result['solution'])), clues, givens)
+        assert result['assignments'] > 0
+    else:
+        assert result['status'] == 'unsolvable'
+        assert result['solution'] is None
+    assert result['time'] >= 0
+    assert 'stats' not in result
+
+
+def test_solve_returns_stats_when_instrumented():
+    clues, givens = random_puzzle(random.Random(0), 4)
+    result = solve(clues, {'MAC': True, 'instrumented': True}, givens=givens)
+    assert result['stats']['assignments'] == result['assignments']
+
+
+def test_import_does_not_load_the_gui_or_the_pools():
+    code = ("import sys, skyscraper; "
+            "print(sorted(m for m in ('tkinter', 'graphics', 'numpy', 'multiprocessing') if m in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == '[]'
@@ -0,0 +1,43 @@
+import random
+from itertools import product
+
+import pytest
+
+from helpers import latin_squares, random_puzzle
+from skyscraper import build_csp
+from Solver import Solver
+
+
+def has_support(constraint, variables, domains, position, value):
+    choices = [[value] if k == position else domains[var] for k, var in enumerate(variables)]
+    return any(constraint(*values) for values in product(*choices))
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_mac_reaches_generalized_arc_consistency(seed):
+    rng = random.Random(seed)
+    n = 4
+    clues, givens = random_puzzle(rng, n, keep=0.5, given_count=rng.randint(0, 2))
+    csp = build_csp(clues, givens)
+    solver = Solver(csp, MAC=True)
+    # Random extra removals give the filtering domains that are not just the clues.
+    for _ in range(rng.randint(0, 6)):
+        csp.domains.remove((rng.randrange(n), rng.randrange(n)), rng.randint(1, n))
+    domains = {var: csp.domains.values(var) for var in csp.variables}
+    solutions = [grid for grid in latin_squares(n)
+                 if all(grid[i][j] in domains[(i, j)] for (i, j) in domains)
+                 and all(constraint(*(grid[i][j] for i, j in variables)) for constraint, variables in csp.constraints)]
+
+    if solver.apply_MAC() is None:
+        assert not solutions
+        return
+
+    domains = {var: csp.domains.values(var) for var in csp.variables}
+    # Sound: no value of a solution is removed.
+    for grid in solutions:
+        assert all(grid[i][j] in domains[(i, j)] for (i, j) in domains)
+    # Complete: every value left has a support in every constraint of its variable.
+    for constraint, variables in csp.constraints:
+        for position, var in enumerate(variables):
+            for value in domains[var]:
+                assert has_support(constraint, variables, domains, position, value), (constraint, var, value)
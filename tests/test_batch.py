@@ -0,0 +1,89 @@
+import json
+import random
+
+import pytest
+
+import batch
+from batch import read_puzzles, solve_batch
+from helpers import brute_solutions, fits, random_puzzle
+from solution_cache import SolutionCache
+
+
+def write_puzzles(path, count, seed=0):
+    """Writes random 4x4 puzzles, some of them unsolvable, and returns them by id."""
+    rng = random.Random(seed)
+    puzzles = {}
+    with open(path, 'w') as file:
+        for index in range(count):
+            clues, givens = random_puzzle(rng, 4, keep=0.6, given_count=rng.randint(0, 1))
+            if index % 3 == 2:
+                clues[rng.randrange(4)][rng.randrange(4)] = rng.randint(1, 4)
+            puzzles[f"p{index}"] = (clues, givens)
+            file.write(json.dumps({'id': f"p{index}", 'clues': clues,
+                                   'givens': [[i, j, height] for (i, j), height in givens.items()]}) + '\n')
+    return puzzles
+
+
+def test_read_puzzles_reports_unreadable_lines(tmp_path):
+    path = tmp_path / 'puzzles.jsonl'
+    path.write_text('{"top": [1], "bottom": [1], "left": [1], "right": [1]}\n\n{"clues": 3}\n')
+    read = list(read_puzzles([str(path)]))
+    assert read[0] == (f"{path}:1", ([1], [1], [1], [1]), {})
+    assert read[1][0] == f"{path}:3"
+    assert read[1][1].startswith("unreadable puzzle")
+
+
+@pytest.mark.parametrize("clues, givens", [
+    (([1, 2, 3, 2, 1], [3, 2, 1, 2], [1, 2, 3, 2], [3, 2, 1, 2]), {}),
+    (([1, 2, 3, 2], [3, 2, 1, 2], [1, 2, 3, 2], [3, 2, 1, 2]), {(0, 0): '4'}),
+    (([1, 2, 3, 2], [3, 2, 1, 2], [1, 2, 3, 2], [3, 2, 1, 2]), {(0, 0): None}),
+])
+def test_malformed_puzzle_gives_an_error_record(clues, givens):
+    batch._init_worker({'MAC': True}, None)
+    number, record = batch.solve_puzzle((7, ('bad', clues, givens)))
+    assert number == 7
+    assert record['status'] == 'error'
+    assert record['error']
+
+
+@pytest.mark.parametrize("options", [{'MAC': True}, {'forward_checking': True, 'variable_heuristics': True}], ids=str)
+def test_solve_batch_agrees_with_brute_force(tmp_path, options):
+    path = tmp_path / 'puzzles.jsonl'
+    puzzles = write_puzzles(path, 12)
+    with open(path, 'a') as file:
+        file.write('not json\n')
+
+    results = list(solve_batch([str(path)], options, workers=2))
+    assert len(results) == len(puzzles) + 1
+    for record in results:
+        if record['id'] not in puzzles:
+            assert record['status'] == 'error'
+            continue
+        clues, givens = puzzles[record['id']]
+        if brute_solutions(clues, givens):
+            assert record['status'] == 'solved'
+            assert fits(tuple(map(tuple, record['solution'])), clues, givens)
+        else:
+            assert record['status'] == 'unsolvable'
+            assert record['solution'] is None
+
+
+def test_solve_batch_with_cache_answers_repeated_puzzles(tmp_path):
+    path = tmp_path / 'puzzles.jsonl'
+    puzzles = write_puzzles(path, 9, seed=1)
+    with open(path, 'a') as file:
+        file.write('not json\n')
+    database = str(tmp_path / 'cache')
+
+    with SolutionCache(path=database) as cache:
+        first = {record['id']: record for record in solve_batch([str(path)], {'MAC': True}, workers=2, cache=cache)}
+    with SolutionCache(path=database) as cache:
+        second = {record['id']: record for record in solve_batch([str(path)], {'MAC': True}, workers=2, cache=cache)}
+
+    assert set(first) == set(second) == set(puzzles) | {f"{path}:10"}
+    for puzzle_id in puzzles:
+        assert not first[puzzle_id].get('cached')
+        assert second[puzzle_id]['cached']
+        assert (second[puzzle_id]['status'], second[puzzle_id]['solution']) == \
+            (first[puzzle_id]['status'], first[puzzle_id]['solution'])
+    assert second[f"{path}:10"]['status'] == 'error'
@@ -0,0 +1,37 @@
+import copy
+
+from benchmark import compare, configurations, generate_puzzles, run_benchmark
+from helpers import brute_solutions
+
+
+def test_generated_puzzles_are_reproducible_and_solvable():
+    puzzles = generate_puzzles(4, 5, seed=1)
+    assert puzzles == generate_puzzles(4, 5, seed=1)
+    assert puzzles != generate_puzzles(4, 5, seed=2)
+    for clues in puzzles:
+        assert brute_solutions(clues)
+
+
+def test_every_configuration_solves_and_repeats_its_counts():
+    names = sorted(configurations())
+    first = run_benchmark([4], names, puzzles=2, seed=0, warmup=0, repetitions=1, timeout=60)
+    second = run_benchmark([4], names, puzzles=2, seed=0, warmup=0, repetitions=1, timeout=60)
+    assert len(first['results']) == 2 * len(names)
+    assert all(record['status'] == 'solved' for record in first['results'])
+    # The searches are deterministic, so only the times may differ between runs.
+    assert compare(first, second, threshold=0.0, min_time=float('inf')) == []
+
+
+def test_compare_reports_regressions():
+    baseline = {'results': [
+        {'config': 'bt', 'size': 4, 'puzzle': 0, 'status': 'solved', 'time': 1.0, 'assignments': 100, 'checks': 50},
+        {'config': 'bt', 'size': 4, 'puzzle': 1, 'status': 'solved', 'time': 1.0, 'assignments': 100, 'checks': 50},
+        {'config': 'MAC', 'size': 4, 'puzzle': 0, 'status': 'timeout', 'time': 9.0, 'assignments': 0, 'checks': 0},
+    ]}
+    current = copy.deepcopy(baseline)
+    current['results'][0].update(time=1.5, assignments=105)
+    current['results'][1].update(status='timeout')
+    current['results'][2].update(status='solved', time=0.5)
+    regressions = compare(baseline, current, threshold=0.1, min_time=0.01)
+    assert regressions == ["bt n=4 #0: time 1.0000s -> 1.5000s", "bt n=4 #1: now times out"]
+    assert compare(baseline, current, threshold=0.1, min_time=10) == ["bt n=4 #1: now times out"]
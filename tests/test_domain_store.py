@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from domain_store import DomainStore, DomainView
+
+
+def make_store():
+    store = DomainStore()
+    for variable in range(5):
+        store.add(variable, range(1, 7))
+    return store
+
+
+def test_values_follow_insertion_order():
+    store = DomainStore()
+    store.add('a', [3, 1, 2])
+    store.add('b', [5, 1])
+    assert store.values('a') == [3, 1, 2]
+    assert store.values('b') == [1, 5]
+    assert store.min('a') == 3
+    assert store.max('b') == 5
+    assert store.size('b') == 2
+    assert store.mask_of([1, 5]) == store.mask('b')
+    assert store.bit(42) == 0
+
+
+def test_remove_restore_and_assign_report_changes():
+    store = make_store()
+    assert store.remove(0, 3)
+    assert not store.remove(0, 3)
+    assert not store.contains(0, 3)
+    assert store.restore(0, 3)
+    assert not store.restore(0, 3)
+    assert store.assign(1, 4)
+    assert store.values(1) == [4]
+    assert not store.assign(1, 4)
+    assert store.assign(1, 5)
+    assert store.is_empty(1)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_rewind_restores_every_checkpoint(seed):
+    rng = random.Random(seed)
+    store = make_store()
+    snapshots = []
+    for _ in range(60):
+        action = rng.random()
+        if action < 0.2:
+            snapshots.append((store.checkpoint(), dict(store.masks)))
+        elif action < 0.3 and snapshots:
+            mark, masks = snapshots.pop(rng.randrange(len(snapshots)))
+            # Rewinding to a mark invalidates every later one.
+            snapshots = [snapshot for snapshot in snapshots if snapshot[0] <= mark]
+            store.rewind(mark)
+            assert store.masks == masks
+        else:
+            variable = rng.randrange(5)
+            value = rng.randint(1, 6)
+            operation = rng.choice((store.remove, store.restore, store.assign))
+            operation(variable, value)
+    while snapshots:
+        mark, masks = snapshots.pop()
+        store.rewind(mark)
+        assert store.masks == masks
+
+
+def test_commit_keeps_domains_and_forgets_trail():
+    store = make_store()
+    store.remove(0, 1)
+    store.commit()
+    assert store.trail == []
+    mark = store.checkpoint()
+    store.remove(0, 2)
+    store.rewind(mark)
+    assert store.values(0) == [2, 3, 4, 5, 6]
+
+
+def test_domain_view_reads_current_domains():
+    store = make_store()
+    view = DomainView(store)
+    store.remove(2, 6)
+    assert view[2] == [1, 2, 3, 4, 5]
+    assert len(view) == 5
+    assert 4 in view and 5 not in view
+    assert list(view) == list(range(5))
@@ -0,0 +1,71 @@
+import json
+import random
+
+import pytest
+
+from batch import solve_batch
+from helpers import as_grid, brute_solutions, random_puzzle
+from skyscraper import build_csp
+from Solver import Solver
+
+CONFIGS = [
+    {},
+    {'forward_checking': True, 'variable_heuristics': True},
+    {'MAC': True},
+    {'MAC': True, 'variable_heuristics': True, 'domain_heuristics': True},
+    {'MAC': True, 'dom_wdeg': True},
+    {'line_search': True},
+]
+
+
+def puzzle(seed):
+    rng = random.Random(seed)
+    clues, givens = random_puzzle(rng, 4, keep=0.3, given_count=rng.randint(0, 1))
+    if seed % 4 == 3:
+        clues[rng.randrange(4)][rng.randrange(4)] = rng.randint(1, 4)
+    return clues, givens
+
+
+@pytest.mark.parametrize("options", CONFIGS, ids=str)
+@pytest.mark.parametrize("seed", range(8))
+def test_solutions_match_exhaustive_enumeration(options, seed):
+    clues, givens = puzzle(seed)
+    expected = sorted(brute_solutions(clues, givens))
+    csp = build_csp(clues, givens)
+    masks = dict(csp.domains.masks)
+    solver = Solver(csp, clues=clues, **options)
+
+    found = [as_grid(solution, 4) for solution in solver.solutions()]
+    assert sorted(found) == expected
+    assert solver.status == ('solved' if expected else 'unsolvable')
+    # An exhausted enumeration leaves the CSP as it found it.
+    assert csp.domains.masks == masks
+    assert all(value is None for value in csp.assignments.values())
+
+    assert solver.count_solutions() == len(expected)
+    for limit in (1, 2, 5):
+        assert solver.count_solutions(limit) == min(len(expected), limit)
+    assert solver.count_solutions(0) == 0
+
+
+def test_enumeration_stops_where_it_is_left():
+    clues, givens = puzzle(0)
+    expected = brute_solutions(clues, givens)
+    assert len(expected) > 2
+    solutions = Solver(build_csp(clues, givens), MAC=True).solutions()
+    first = [as_grid(next(solutions), 4) for _ in range(2)]
+    rest = [as_grid(solution, 4) for solution in solutions]
+    assert sorted(first + rest) == sorted(expected)
+
+
+def test_batch_counts_solutions(tmp_path):
+    path = tmp_path / 'puzzles.jsonl'
+    puzzles = {f"p{seed}": puzzle(seed) for seed in range(8)}
+    with open(path, 'w') as file:
+        for puzzle_id, (clues, givens) in puzzles.items():
+            file.write(json.dumps({'id': puzzle_id, 'clues': clues,
+                                   'givens': [[i, j, height] for (i, j), height in givens.items()]}) + '\n')
+    for record in solve_batch([str(path)], {'MAC': True}, workers=2, count=3):
+        expected = len(brute_solutions(*puzzles[record['id']]))
+        assert record['solutions'] == min(expected, 3)
+        assert record['status'] == ('solved' if expected else 'unsolvable')
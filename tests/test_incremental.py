@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from helpers import as_grid, brute_solutions, fits, grid_clues, latin_squares, random_puzzle
+from incremental import IncrementalSolver
+from skyscraper import build_csp
+from Solver import Solver
+
+CONFIGS = [
+    {'MAC': True},
+    {'MAC': True, 'variable_heuristics': True, 'dom_wdeg': True},
+    {'forward_checking': True},
+    {'backjumping': True},
+    {'line_search': True},
+]
+
+
+def random_edit(rng, solver, grid):
+    """
+    Adds, changes or removes a random clue or given. Most edits agree with `grid` or remove
+    something, so the puzzle keeps going from solvable to unsolvable and back.
+    """
+    n = len(grid)
+    full_clues = grid_clues(grid)
+    side, index = rng.randrange(4), rng.randrange(n)
+    cell = (rng.randrange(n), rng.randrange(n))
+    edit = rng.random()
+    if edit < 0.4:
+        solver.set_clue(side, index, full_clues[side][index])
+    elif edit < 0.55:
+        solver.set_given(cell, grid[cell[0]][cell[1]])
+    elif edit < 0.85:
+        solver.set_clue(side, index, 0)
+        if solver.givens:
+            solver.set_given(rng.choice(sorted(solver.givens)), None)
+    elif edit < 0.95:
+        solver.set_clue(side, index, rng.randint(1, n))
+    else:
+        solver.set_given(cell, rng.randint(1, n))
+
+
+@pytest.mark.parametrize("options", CONFIGS, ids=str)
+@pytest.mark.parametrize("seed", range(4))
+def test_incremental_matches_fresh_solves_after_random_edits(options, seed):
+    rng = random.Random(seed)
+    n = 4
+    grid = rng.choice(latin_squares(n))
+    solver = IncrementalSolver(([0] * n,) * 4, {}, options)
+    for _ in range(40):
+        current_clues = tuple(list(side) for side in solver.clues)
+        current_givens = dict(solver.givens)
+        expected = brute_solutions(current_clues, current_givens)
+
+        solution = solver.solve()
+        if expected:
+            assert solver.status == 'solved'
+            assert fits(as_grid(solution, n), current_clues, current_givens)
+        else:
+            assert solution is None
+            assert solver.status == 'unsolvable'
+
+        # A fresh solver on the same puzzle agrees.
+        fresh = Solver(build_csp(current_clues, current_givens), clues=current_clues, **options).solve()
+        assert (fresh is None) == (solution is None)
+        random_edit(rng, solver, grid)
+
+
+def test_removed_clues_reuse_the_last_solution():
+    clues, givens = random_puzzle(random.Random(5), 4, keep=1.0)
+    solver = IncrementalSolver(clues, givens, {'MAC': True})
+    solution = solver.solve()
+    assert not solver.reused
+    solver.set_clue(0, 0, 0)
+    solver.set_clue(2, 1, 0)
+    assert solver.solve() == solution
+    assert solver.reused and solver.assignments == 0
+
+
+def test_invalid_edits_are_rejected():
+    solver = IncrementalSolver(([0] * 4,) * 4)
+    with pytest.raises(ValueError):
+        solver.set_clue(4, 0, 1)
+    with pytest.raises(ValueError):
+        solver.set_clue(0, 0, 5)
+    with pytest.raises(ValueError):
+        solver.set_given((4, 0), 1)
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from helpers import random_puzzle
+from instrumentation import SolverHook
+from skyscraper import build_csp
+from Solver import Solver
+
+CONFIGS = [
+    {},
+    {'forward_checking': True, 'variable_heuristics': True},
+    {'MAC': True, 'dom_wdeg': True},
+    {'backjumping': True},
+]
+
+
+class CountingHook(SolverHook):
+
+    def __init__(self):
+        self.assigned = 0
+        self.unassigned = 0
+
+    def on_assign(self, variable, value, depth):
+        self.assigned += 1
+
+    def on_unassign(self, variable):
+        self.unassigned += 1
+
+
+@pytest.mark.parametrize("options", CONFIGS, ids=str)
+@pytest.mark.parametrize("seed", range(5))
+def test_instrumentation_does_not_change_the_search(options, seed):
+    rng = random.Random(seed)
+    clues, givens = random_puzzle(rng, 4, keep=0.4)
+    plain = build_csp(clues, givens)
+    expected = Solver(plain, **options).solve()
+
+    csp = build_csp(clues, givens)
+    hook = CountingHook()
+    solver = Solver(csp, instrumented=True, constraint_timing=True, hooks=[hook], **options)
+    assert solver.solve() == expected
+    assert csp.assignments_number == plain.assignments_number
+
+    stats = solver.stats.as_dict()
+    assert stats['enabled']
+    assert stats['assignments'] == hook.assigned == csp.assignments_number
+    assert stats['backtracks'] == hook.unassigned
+    assert stats['max_depth'] <= len(csp.variables)
+    calls = sum(entry['calls'] for entry in stats['constraints'])
+    # The runs of the AllDifferent propagators count as calls of their constraint, not as evaluations.
+    if options.get('MAC'):
+        assert calls >= stats['constraint_evaluations']
+    else:
+        assert calls == stats['constraint_evaluations']
+    assert all(entry['time'] >= 0 for entry in stats['constraints'])
+
+
+def test_stats_stay_at_zero_without_instrumentation():
+    clues, givens = random_puzzle(random.Random(0), 4)
+    solver = Solver(build_csp(clues, givens), MAC=True)
+    solver.solve()
+    stats = solver.stats.as_dict()
+    assert not stats['enabled']
+    assert stats['assignments'] == stats['constraint_evaluations'] == 0
@@ -0,0 +1,54 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from helpers import grid_clues, latin_squares
+from puzzle_store import PuzzleStore
+from test_case_generator import batch_clues, sample_latin_squares, square_clues, write_puzzle_store
+
+
+@pytest.mark.parametrize("n", [1, 2, 5, 9])
+def test_samples_are_latin_squares(n):
+    squares = sample_latin_squares(n, 50, 1)
+    assert squares.shape == (50, n, n)
+    expected = np.arange(1, n + 1)
+    for square in squares:
+        assert all((np.sort(line) == expected).all() for line in list(square) + list(square.T))
+
+
+def test_samples_are_reproducible():
+    assert (sample_latin_squares(6, 20, 3) == sample_latin_squares(6, 20, 3)).all()
+
+
+@pytest.mark.parametrize("n", [3, 4])
+def test_samples_are_uniform(n):
+    squares = latin_squares(n)
+    samples = 100 * len(squares)
+    counts = Counter(tuple(map(tuple, square.tolist())) for square in sample_latin_squares(n, samples, 7))
+    assert set(counts) == set(squares)
+    # Every square is expected 100 times. A chi-square test with len(squares) - 1 degrees of freedom:
+    # the bound is far above its mean, so only a biased sampler fails it.
+    chi_square = sum((count - 100) ** 2 / 100 for count in counts.values())
+    assert chi_square < 2 * len(squares)
+
+
+def test_clues_match_brute_force():
+    squares = sample_latin_squares(6, 30, 5)
+    clues = batch_clues(squares)
+    for square, square_clue in zip(squares, clues):
+        grid = tuple(map(tuple, square.tolist()))
+        assert tuple(map(list, square_clue.tolist())) == tuple(grid_clues(grid))
+        assert square_clues(square) == tuple(grid_clues(grid))
+
+
+def test_puzzle_store_holds_the_clues_of_latin_squares(tmp_path):
+    path = str(tmp_path / 'puzzles.skyb')
+    write_puzzle_store(path, 5, 25, seed=2, batch_size=10)
+    with PuzzleStore(path) as store:
+        assert len(store) == 25
+        for (top, bottom, left, right), givens in store:
+            assert givens == {}
+            # Every line of a square has a clue pair that some permutation shows.
+            for front, back in list(zip(top, bottom)) + list(zip(left, right)):
+                assert 1 <= front and 1 <= back and front + back <= 6
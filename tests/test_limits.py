@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from skyscraper import build_csp
+from Solver import Solver
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEARCHES = [
+    {},
+    {'forward_checking': True},
+    {'MAC': True, 'variable_heuristics': True},
+    {'MAC': True, 'dom_wdeg': True, 'restarts': 'luby', 'seed': 0},
+    {'backjumping': True},
+    {'line_search': True},
+]
+
+
+def empty_puzzle(n):
+    return ([0] * n, [0] * n, [0] * n, [0] * n)
+
+
+@pytest.mark.parametrize("options", SEARCHES, ids=str)
+@pytest.mark.parametrize("limit, reason", [({'node_limit': 3}, 'nodes'), ({'assignment_limit': 3}, 'assignments')])
+def test_limits_stop_every_search(options, limit, reason):
+    clues = empty_puzzle(6)
+    csp = build_csp(clues)
+    masks = dict(csp.domains.masks)
+    solver = Solver(csp, clues=clues, **options, **limit)
+    assert solver.solve() is None
+    assert (solver.status, solver.limit_reason) == ('unknown', reason)
+    # A stopped search leaves the CSP as it was before the solve.
+    assert csp.domains.masks == masks
+    assert all(value is None for value in csp.assignments.values())
+
+    # The limits apply to a whole enumeration too.
+    assert len(list(solver.solutions())) <= 3
+    assert solver.status == 'unknown'
+    assert csp.domains.masks == masks
+
+
+def test_time_limit_stops_a_long_search():
+    # No column can be seen as 7 from the top and 2 from the bottom, which plain backtracking
+    # only notices at the bottom of the column.
+    clues = ([0] * 6 + [7], [0] * 6 + [2], [0] * 7, [0] * 7)
+    solver = Solver(build_csp(clues), time_limit=0.2)
+    start = time.perf_counter()
+    assert solver.solve() is None
+    assert time.perf_counter() - start < 10
+    assert (solver.status, solver.limit_reason) == ('unknown', 'time')
+
+
+def test_limits_do_not_change_a_search_that_stays_within_them():
+    clues = empty_puzzle(5)
+    plain = build_csp(clues)
+    expected = Solver(plain, MAC=True).solve()
+    limited = build_csp(clues)
+    solver = Solver(limited, MAC=True, node_limit=10 ** 6, assignment_limit=10 ** 6, time_limit=600)
+    assert solver.solve() == expected
+    assert solver.status == 'solved'
+    assert limited.assignments_number == plain.assignments_number
+
+
+def test_searches_do_not_recurse():
+    # 64 cells and a recursion limit of 50: a search that recursed once per variable would fail.
+    code = (
+        "import sys\n"
+        "from skyscraper import build_csp\n"
+        "from Solver import Solver\n"
+        "clues = ([0] * 8,) * 4\n"
+        "options = [{}, {'MAC': True}, {'forward_checking': True}, {'backjumping': True}]\n"
+        "solvers = [Solver(build_csp(clues), **option) for option in options]\n"
+        "counters = [Solver(build_csp(clues), **option) for option in options]\n"
+        "sys.setrecursionlimit(50)\n"
+        "print(all(solver.solve() is not None for solver in solvers),\n"
+        "      all(counter.count_solutions(2) == 2 for counter in counters))\n"
+    )
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, timeout=300)
+    assert output.stdout.strip() == 'True True', output.stderr
@@ -0,0 +1,57 @@
+import random
+from itertools import permutations
+
+import pytest
+
+from helpers import as_grid, brute_solutions, fits, random_puzzle, visible
+from line_solver import MAX_LINE_SIZE, LineSolver, count_visible, line_permutations, visible_patterns
+
+
+@pytest.mark.parametrize("n", range(1, 7))
+def test_line_permutations_match_brute_force(n):
+    every = sorted(permutations(range(1, n + 1)))
+    for front in range(n + 2):
+        for back in range(n + 2):
+            expected = tuple(permutation for permutation in every
+                             if front in (0, visible(permutation)) and back in (0, visible(permutation[::-1])))
+            assert line_permutations(n, front, back) == expected, (front, back)
+
+
+@pytest.mark.parametrize("size", range(0, 7))
+def test_visible_patterns_match_brute_force(size):
+    every = sorted(permutations(range(1, size + 1)))
+    for count in range(size + 2):
+        expected = [permutation for permutation in every if visible(permutation) == count]
+        assert list(visible_patterns(size, count)) == expected, count
+
+
+def test_line_permutations_reject_large_lines():
+    with pytest.raises(ValueError):
+        line_permutations(MAX_LINE_SIZE + 1, 0, 3)
+    with pytest.raises(ValueError):
+        LineSolver(([0] * 12, [0] * 12, [0] * 12, [0] * 12))
+
+
+@pytest.mark.parametrize("n", range(1, 7))
+def test_count_visible(n):
+    for permutation in permutations(range(1, n + 1)):
+        assert count_visible(permutation) == visible(permutation)
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_solutions_match_brute_force(seed):
+    rng = random.Random(seed)
+    clues, givens = random_puzzle(rng, 4, keep=0.4, given_count=rng.randint(0, 2))
+    if seed % 3 == 0:
+        # Some clue sets of no square, so that unsolvable puzzles are covered too.
+        clues[rng.randrange(4)][rng.randrange(4)] = rng.randint(1, 4)
+    expected = sorted(brute_solutions(clues, givens))
+    found = [as_grid(solution, 4) for solution in LineSolver(clues, givens).solutions()]
+    assert sorted(found) == expected
+    assert len(set(found)) == len(found)
+
+    solution = LineSolver(clues, givens).solve()
+    if expected:
+        assert fits(as_grid(solution, 4), clues, givens)
+    else:
+        assert solution is None
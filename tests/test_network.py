@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from helpers import random_puzzle
+from skyscraper import build_csp
+from Solver import Solver
+
+
+def reference_consistent(csp, variable):
+    """Checks the constraints of a variable on its Python objects, as the network did before it was compiled."""
+    for constraint, variables in csp.constraints:
+        if variable not in variables:
+            continue
+        values = [csp.assignments[var] for var in variables]
+        if hasattr(constraint, 'check_partial'):
+            if not constraint.check_partial(values):
+                return False
+        elif None not in values and not constraint(*values):
+            return False
+    return True
+
+
+def random_walk(csp, rng, steps):
+    """Assigns random values to random cells, checking each one and undoing the inconsistent ones."""
+    cells = list(csp.variables)
+    for _ in range(steps):
+        free = [cell for cell in cells if csp.assignments[cell] is None]
+        if not free or rng.random() < 0.2:
+            assigned = [cell for cell in cells if csp.assignments[cell] is not None]
+            if assigned:
+                csp.un_assign([], rng.choice(assigned))
+            continue
+        cell = rng.choice(free)
+        value = rng.choice(csp.domains.values(cell))
+        csp.assign(cell, value)
+        consistent = csp.is_consistent(cell, value)
+        yield cell, consistent
+        if not consistent:
+            csp.un_assign([], cell)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_compiled_checks_match_the_constraints(seed):
+    rng = random.Random(seed)
+    n = rng.choice((4, 5, 6))
+    clues, givens = random_puzzle(rng, n, keep=0.7)
+    csp = build_csp(clues, givens)
+    for cell, consistent in random_walk(csp, rng, 300):
+        assert consistent == reference_consistent(csp, cell), cell
+
+
+def test_other_constraints_are_checked_once_complete():
+    clues, givens = random_puzzle(random.Random(0), 4, keep=0.0)
+    csp = build_csp(clues, givens)
+    # The corners must add up to 10, a constraint with neither a compiled form nor check_partial.
+    corners = [(0, 0), (0, 3), (3, 0), (3, 3)]
+    csp.add_constraint(lambda *values: sum(values) == 10, corners)
+    for corner, value in zip(corners[:3], (1, 2, 3)):
+        csp.assign(corner, value)
+        assert csp.is_consistent(corner, value)
+    csp.assign((3, 3), 3)
+    assert not csp.is_consistent((3, 3), 3)
+    csp.un_assign([], (3, 3))
+    csp.assign((3, 3), 4)
+    assert csp.is_consistent((3, 3), 4)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_instrumented_checks_match_plain_checks(seed):
+    clues, givens = random_puzzle(random.Random(seed), 5, keep=0.7)
+    plain = build_csp(clues, givens)
+    csp = build_csp(clues, givens)
+    solver = Solver(csp, instrumented=True)
+    plain_walk = list(random_walk(plain, random.Random(seed), 200))
+    assert list(random_walk(csp, random.Random(seed), 200)) == plain_walk
+    # The compiled AllDifferent and Visibility checks stay counted under instrumentation.
+    assert solver.stats.constraint_evaluations == csp.checks_number > 0
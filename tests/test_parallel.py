@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from helpers import as_grid, brute_solutions, fits, random_puzzle
+import parallel_search
+from parallel_search import ParallelSolver
+from portfolio import PortfolioSolver
+from skyscraper import build_csp
+
+
+def puzzle(seed):
+    rng = random.Random(seed)
+    clues, givens = random_puzzle(rng, 4, keep=0.5, given_count=rng.randint(0, 1))
+    if seed % 2:
+        clues[rng.randrange(4)][rng.randrange(4)] = rng.randint(1, 4)
+    return clues, givens
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_portfolio_agrees_with_brute_force(seed):
+    clues, givens = puzzle(seed)
+    csp = build_csp(clues, givens)
+    solver = PortfolioSolver(csp, clues=clues, workers=2)
+    solution = solver.solve()
+    assert solver.winner in solver.configurations
+    if brute_solutions(clues, givens):
+        assert fits(as_grid(solution, 4), clues, givens)
+        assert all(csp.assignments[cell] == height for cell, height in solution.items())
+    else:
+        assert solution is None
+
+
+@pytest.mark.parametrize("options", [{'MAC': True}, {'forward_checking': True}, {'MAC': True, 'line_search': True},
+                                     {'backjumping': True}, {'backjumping': True, 'variable_heuristics': True}],
+                         ids=str)
+@pytest.mark.parametrize("seed", range(4))
+def test_parallel_search_agrees_with_brute_force(options, seed):
+    clues, givens = puzzle(seed)
+    expected = brute_solutions(clues, givens)
+    solution = ParallelSolver(build_csp(clues, givens), clues=clues, workers=2, **options).solve()
+    if expected:
+        assert fits(as_grid(solution, 4), clues, givens)
+    else:
+        assert solution is None
+
+    # The CSP is solved and counted by fresh solvers, since solve() leaves its solution assigned.
+    for limit in (None, 1, 3):
+        count = ParallelSolver(build_csp(clues, givens), clues=clues, workers=2, **options).count_solutions(limit)
+        assert count == (len(expected) if limit is None else min(len(expected), limit))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_one_worker_solves_every_subproblem_with_backjumping(seed):
+    # A single worker solves all the subproblems in turn, so nothing it learned on one may prune the next.
+    clues, givens = puzzle(seed)
+    expected = brute_solutions(clues, givens)
+    solver = ParallelSolver(build_csp(clues, givens), clues=clues, workers=1, tasks_per_worker=4, backjumping=True)
+    solution = solver.solve()
+    if expected:
+        assert fits(as_grid(solution, 4), clues, givens)
+    else:
+        assert solution is None
+
+
+def test_worker_forgets_nogoods_between_subproblems():
+    seed = next(seed for seed in range(20) if brute_solutions(*puzzle(seed)))
+    clues, givens = puzzle(seed)
+    parallel_search._init_worker(build_csp(clues, givens), clues, {'backjumping': True})
+    # Nogoods left over from another subproblem that rule out every height of a cell.
+    for height in range(1, 5):
+        parallel_search._solver.nogoods.add([((0, 0), height)])
+    solution, _ = parallel_search._solve_cells([])
+    assert fits(as_grid(solution, 4), clues, givens)
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_split_leaves_the_domains_of_the_csp_unchanged(seed):
+    clues, givens = puzzle(seed)
+    csp = build_csp(clues, givens)
+    masks = dict(csp.domains.masks)
+    ParallelSolver(csp, clues=clues, workers=2, MAC=True).split()
+    assert csp.domains.masks == masks
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from helpers import random_puzzle
+from map_reader import parse_puzzle, read_puzzle
+from puzzle_store import PuzzleStore, pack_puzzle, unpack_puzzle, write_store
+
+
+def format_puzzle(clues, givens, n):
+    """Writes a puzzle in the map format, with '.' for missing clues and empty cells."""
+    def token(value):
+        return str(value) if value else '.'
+
+    top, bottom, left, right = clues
+    lines = [' '.join(map(token, top))]
+    for i in range(n):
+        cells = [token(givens.get((i, j), 0)) for j in range(n)] if givens else []
+        lines.append(' '.join([token(left[i])] + cells + [token(right[i])]))
+    lines.append(' '.join(map(token, bottom)))
+    return '\n'.join(lines) + '\n'
+
+
+def large_puzzle(rng, n):
+    clues = tuple([rng.choice([0] + list(range(1, n + 1))) for _ in range(n)] for _ in range(4))
+    givens = {(rng.randrange(n), rng.randrange(n)): rng.randint(1, n) for _ in range(n)}
+    return clues, givens
+
+
+@pytest.mark.parametrize("n", [4, 5, 10, 12, 16])
+def test_map_format_round_trips(n):
+    rng = random.Random(n)
+    clues, givens = random_puzzle(rng, n, given_count=2) if n <= 5 else large_puzzle(rng, n)
+    assert parse_puzzle(format_puzzle(clues, givens, n)) == (clues, givens)
+    assert parse_puzzle(format_puzzle(clues, {}, n)) == (clues, {})
+
+
+def test_map_with_solution_has_no_givens(tmp_path):
+    path = tmp_path / 'map.txt'
+    path.write_bytes(b"3 2 1 2\r\n3 [1, 3, 4, 2] 2\r\n2 [3, 1, 2, 4] 1\r\n"
+                     b"2 [2, 4, 1, 3] 2\r\n1 [4, 2, 3, 1] 3\r\n1 2 2 3\r\n")
+    assert read_puzzle(str(path)) == (([3, 2, 1, 2], [1, 2, 2, 3], [3, 2, 2, 1], [2, 1, 2, 3]), {})
+
+
+@pytest.mark.parametrize("text", [
+    "1 2\n1 2\n",
+    "1 2\n1 . 2\n. 1\n2 1\n",
+    "1 2\n1 1\n2 1\n1 2 3\n",
+    "3 .\n1 .\n. 1\n1 .\n",
+    "1 .\n1 3 . 2\n. . . 1\n1 .\n",
+])
+def test_malformed_maps_are_rejected(text):
+    with pytest.raises(ValueError):
+        parse_puzzle(text)
+
+
+def test_store_round_trips(tmp_path):
+    rng = random.Random(0)
+    puzzles = [random_puzzle(rng, 4, given_count=rng.randint(0, 3)) for _ in range(20)]
+    puzzles += [large_puzzle(rng, n) for n in (9, 10, 25)]
+    for clues, givens in puzzles:
+        assert unpack_puzzle(pack_puzzle(clues, givens), 0) == (tuple(clues), givens)
+
+    path = str(tmp_path / 'puzzles.skyb')
+    assert write_store(path, puzzles) == len(puzzles)
+    with PuzzleStore(path) as store:
+        assert len(store) == len(puzzles)
+        assert list(store) == [(tuple(clues), givens) for clues, givens in puzzles]
+        assert store[len(puzzles) - 1] == (tuple(puzzles[-1][0]), puzzles[-1][1])
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from helpers import brute_solutions
+from line_solver import MAX_LINE_SIZE
+from puzzle_generator import DIFFICULTY_LEVELS, first_solutions, generate_puzzle, generate_puzzles
+from test_case_generator import sample_latin_squares, square_clues
+
+
+def unique(clues, givens):
+    return len(brute_solutions(clues, givens)) == 1
+
+
+@pytest.mark.parametrize("index", range(6))
+def test_puzzles_are_unique_and_minimal(index):
+    seed = np.random.SeedSequence(11).spawn(6)[index]
+    record = generate_puzzle((index, 4, seed))
+    clues = tuple(record['clues'])
+    givens = {(i, j): height for i, j, height in record['givens']}
+    assert record['id'] == f"n4-{index}"
+    assert record['clue_count'] == sum(1 for side in clues for clue in side if clue)
+    assert unique(clues, givens)
+
+    # Removing any clue or any given lets a second solution in.
+    for side in range(4):
+        for k, clue in enumerate(clues[side]):
+            if clue:
+                clues[side][k] = 0
+                assert not unique(clues, givens)
+                clues[side][k] = clue
+    for cell in list(givens):
+        height = givens.pop(cell)
+        assert not unique(clues, givens)
+        givens[cell] = height
+
+    labels = [label for _, label in DIFFICULTY_LEVELS] + ['expert']
+    assert record['difficulty'] in labels
+    assert record['effort'] > 0
+
+
+def test_generation_depends_only_on_the_seed():
+    first = list(generate_puzzles(4, 4, seed=5, workers=1))
+    second = list(generate_puzzles(4, 4, seed=5, workers=2))
+    assert first == second
+
+
+def test_first_solutions_above_the_line_search_size():
+    # The line search does not support this size, so the cells are searched instead.
+    n = MAX_LINE_SIZE + 1
+    square = sample_latin_squares(n, 1, np.random.default_rng(3))[0].tolist()
+    clues = square_clues(square)
+    givens = {(i, j): square[i][j] for i in range(n) for j in range(n) if (i + j) % 3}
+    solutions = first_solutions(clues, givens)
+    assert solutions[0] == {(i, j): square[i][j] for i in range(n) for j in range(n)}
@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+from helpers import as_grid, brute_solutions, fits, random_puzzle
+from line_solver import LineSolver
+from nogoods import NogoodStore
+from skyscraper import build_csp
+from Solver import Solver
+
+CONFIGS = [
+    {},
+    {'variable_heuristics': True, 'domain_heuristics': True},
+    {'forward_checking': True},
+    {'forward_checking': True, 'variable_heuristics': True},
+    {'MAC': True},
+    {'MAC': True, 'variable_heuristics': True, 'domain_heuristics': True},
+    {'MAC': True, 'dom_wdeg': True},
+    {'MAC': True, 'dom_wdeg': True, 'restarts': 'luby', 'seed': 1},
+    {'forward_checking': True, 'dom_wdeg': True, 'restarts': 'geometric', 'seed': 2},
+    {'backjumping': True},
+    {'backjumping': True, 'variable_heuristics': True},
+    {'backjumping': True, 'nogood_capacity': 1},
+    {'line_search': True},
+]
+
+
+def puzzle(seed):
+    rng = random.Random(seed)
+    clues, givens = random_puzzle(rng, 4, keep=0.5, given_count=rng.randint(0, 2))
+    if seed % 2:
+        # Clue sets of no square make some of the puzzles unsolvable.
+        clues[rng.randrange(4)][rng.randrange(4)] = rng.randint(1, 4)
+    return clues, givens
+
+
+@pytest.mark.parametrize("options", CONFIGS, ids=str)
+@pytest.mark.parametrize("seed", range(12))
+def test_solve_agrees_with_brute_force(options, seed):
+    clues, givens = puzzle(seed)
+    csp = build_csp(clues, givens)
+    masks = dict(csp.domains.masks)
+    solver = Solver(csp, clues=clues, **options)
+    solution = solver.solve()
+    if brute_solutions(clues, givens):
+        assert solver.status == 'solved'
+        assert fits(as_grid(solution, 4), clues, givens)
+    else:
+        assert solution is None
+        assert solver.status == 'unsolvable'
+        # A failed search undoes every assignment and domain change, except the root propagation of MAC.
+        assert all(value is None for value in csp.assignments.values())
+        if not options.get('MAC'):
+            assert csp.domains.masks == masks
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_line_search_assigns_its_solution_to_the_csp(seed):
+    clues, givens = puzzle(seed)
+    csp = build_csp(clues, givens)
+    network = csp.compile()
+    solution = Solver(csp, clues=clues, line_search=True).solve()
+    if solution is not None:
+        assert not csp.unassigned_var
+        assert csp.values == [solution[var] for var in network.variables]
+        assert all(csp.domains.values(var) == [value] for var, value in solution.items())
+
+
+@pytest.mark.parametrize("restarts", ['luby', 'geometric'])
+def test_seeded_restarts_are_reproducible(restarts):
+    clues, givens = puzzle(4)
+    runs = []
+    for _ in range(2):
+        csp = build_csp(clues, givens)
+        solution = Solver(csp, MAC=True, dom_wdeg=True, restarts=restarts, seed=7).solve()
+        runs.append((solution, csp.assignments_number))
+    assert runs[0] == runs[1]
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_backjumping_on_larger_puzzles(seed):
+    rng = random.Random(seed)
+    clues, givens = random_puzzle(rng, 5, keep=0.6)
+    if seed % 2:
+        clues[rng.randrange(4)][rng.randrange(5)] = rng.randint(1, 5)
+    expected = LineSolver(clues, givens).solve()
+    solution = Solver(build_csp(clues, givens), backjumping=True, variable_heuristics=True).solve()
+    if expected is None:
+        assert solution is None
+    else:
+        assert fits(as_grid(solution, 5), clues, givens)
+
+
+@pytest.mark.parametrize("look_ahead", ['forward_checking', 'MAC'])
+def test_backjumping_rejects_look_ahead(look_ahead):
+    clues, givens = puzzle(0)
+    with pytest.raises(ValueError):
+        Solver(build_csp(clues, givens), backjumping=True, **{look_ahead: True})
+
+
+def test_nogood_store_evicts_least_recently_used():
+    store = NogoodStore(capacity=2)
+    store.add([('a', 1), ('b', 2)])
+    store.add([('c', 3)])
+    assignments = {'a': 1, 'b': None, 'c': None}
+    # Using a nogood makes it the most recently used one.
+    assert store.violated('b', 2, assignments) == frozenset([('a', 1), ('b', 2)])
+    store.add([('d', 4)])
+    assert len(store) == 2
+    assert store.violated('c', 3, assignments) is None
+    assert store.violated('b', 2, assignments) is not None
+    assert store.violated('b', 2, {'a': 5, 'b': None}) is None
+    assert store.violated('d', 4, assignments) == frozenset([('d', 4)])
+
+
+def test_nogood_store_without_capacity_keeps_nothing():
+    store = NogoodStore(capacity=0)
+    store.add([('a', 1)])
+    assert len(store) == 0
+    assert store.violated('a', 1, {'a': None}) is None
@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from helpers import brute_solutions, fits, grid_clues, latin_squares, random_puzzle
+from solution_cache import SolutionCache, canonical_form
+
+
+def board(clues, cells, n):
+    """Places the clues around a grid of cells (0 for empty ones), in an (n + 2) x (n + 2) board."""
+    top, bottom, left, right = clues
+    result = [[0] * (n + 2) for _ in range(n + 2)]
+    for k in range(n):
+        result[0][k + 1], result[n + 1][k + 1] = top[k], bottom[k]
+        result[k + 1][0], result[k + 1][n + 1] = left[k], right[k]
+        for j in range(n):
+            result[k + 1][j + 1] = cells[k][j]
+    return result
+
+
+def unboard(result, n):
+    clues = ([result[0][k + 1] for k in range(n)], [result[n + 1][k + 1] for k in range(n)],
+             [result[k + 1][0] for k in range(n)], [result[k + 1][n + 1] for k in range(n)])
+    return clues, tuple(tuple(result[i + 1][j + 1] for j in range(n)) for i in range(n))
+
+
+def orientations(result):
+    """Yields the 8 rotations and reflections of a square array."""
+    for flip in (False, True):
+        current = [list(row) for row in (zip(*result) if flip else result)]
+        for _ in range(4):
+            yield current
+            current = [list(row) for row in zip(*current[::-1])]
+
+
+def oriented_puzzles(clues, givens, solution, n):
+    """Returns the (clues, givens, solution) of a puzzle in each of its 8 orientations."""
+    given_cells = [[givens.get((i, j), 0) for j in range(n)] for i in range(n)]
+    result = []
+    for clue_board, given_board in zip(orientations(board(clues, solution, n)),
+                                       orientations(board(clues, given_cells, n))):
+        oriented_clues, oriented_solution = unboard(clue_board, n)
+        _, oriented_cells = unboard(given_board, n)
+        oriented_givens = {(i, j): height for i, row in enumerate(oriented_cells)
+                           for j, height in enumerate(row) if height}
+        result.append((oriented_clues, oriented_givens, oriented_solution))
+    return result
+
+
+def test_orientations_are_puzzles_of_their_solution():
+    rng = random.Random(0)
+    clues, givens = random_puzzle(rng, 4, keep=1.0)
+    grid = next(grid for grid in latin_squares(4) if grid_clues(grid) == clues)
+    for oriented_clues, _, solution in oriented_puzzles(clues, givens, grid, 4):
+        assert tuple(grid_clues(solution)) == tuple(oriented_clues)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_cache_round_trips_across_orientations(seed):
+    rng = random.Random(seed)
+    n = 4
+    clues, givens = random_puzzle(rng, n, keep=0.6, given_count=rng.randint(0, 2))
+    solution = brute_solutions(clues, givens)[0]
+    oriented = oriented_puzzles(clues, givens, solution, n)
+    forms = {canonical_form(oriented_clues, oriented_givens)[0] for oriented_clues, oriented_givens, _ in oriented}
+    assert len(forms) == 1
+
+    for stored_clues, stored_givens, stored_solution in oriented:
+        cache = SolutionCache()
+        cache.store(stored_clues, stored_givens, [list(row) for row in stored_solution])
+        for oriented_clues, oriented_givens, oriented_solution in oriented:
+            found, grid = cache.lookup(oriented_clues, oriented_givens)
+            assert found
+            grid = tuple(map(tuple, grid))
+            assert fits(grid, oriented_clues, oriented_givens)
+            # A puzzle with symmetries may map the stored solution onto another one, not onto this orientation.
+            if len(brute_solutions(oriented_clues, oriented_givens)) == 1:
+                assert grid == oriented_solution
+        assert cache.hits == 8
+
+
+def test_unsolvable_puzzles_are_cached():
+    cache = SolutionCache()
+    clues = ([4, 4, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0])
+    cache.store(clues, None, None)
+    for oriented_clues, oriented_givens, _ in oriented_puzzles(clues, {}, [[0] * 4] * 4, 4):
+        assert cache.lookup(oriented_clues, oriented_givens) == (True, None)
+    assert cache.lookup(([1, 0, 0, 0], [0] * 4, [0] * 4, [0] * 4)) == (False, None)
+    assert cache.misses == 1
+
+
+def test_cache_keeps_the_most_recently_used_entries(tmp_path):
+    rng = random.Random(3)
+    puzzles = []
+    for _ in range(3):
+        clues, givens = random_puzzle(rng, 4, keep=1.0)
+        puzzles.append((clues, [list(row) for row in brute_solutions(clues)[0]]))
+
+    cache = SolutionCache(capacity=2)
+    for clues, solution in puzzles:
+        cache.store(clues, None, solution)
+    assert len(cache) == 2
+    assert not cache.lookup(puzzles[0][0])[0]
+    assert cache.lookup(puzzles[2][0]) == (True, puzzles[2][1])
+
+    path = str(tmp_path / 'cache')
+    with SolutionCache(capacity=1, path=path) as cache:
+        for clues, solution in puzzles:
+            cache.store(clues, None, solution)
+    with SolutionCache(capacity=1, path=path) as cache:
+        for clues, solution in puzzles:
+            assert cache.lookup(clues) == (True, solution)
@@ -0,0 +1,57 @@
+import random
+import time
+
+import pytest
+
+from helpers import as_grid, fits, random_puzzle
+from limits import CancellationToken
+from skyscraper import build_csp
+from solve_worker import SolveWorker
+from Solver import Solver
+
+
+def wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_worker_reports_the_solution():
+    clues, givens = random_puzzle(random.Random(0), 4)
+    worker = SolveWorker(Solver(build_csp(clues, givens), MAC=True))
+    worker.start()
+    worker.join(30)
+    assert not worker.running and worker.error is None
+    assert fits(as_grid(worker.solution, 4), clues, givens)
+    assert worker.assignments > 0 and worker.elapsed > 0
+
+
+def test_cancel_stops_a_running_search():
+    # The last column is seen as 7 from the top and 2 from the bottom, which no column can show,
+    # and plain backtracking only notices once it reaches the bottom cell.
+    clues = ([0] * 6 + [7], [0] * 6 + [2], [0] * 7, [0] * 7)
+    csp = build_csp(clues)
+    solver = Solver(csp, cancel_token=CancellationToken())
+    worker = SolveWorker(solver)
+    worker.start()
+    wait_for(lambda: worker.assignments > 1000)
+    assert worker.running and worker.depth > 0
+    worker.cancel()
+    worker.join(30)
+    assert not worker.running and worker.cancelled
+    assert worker.solution is None
+    assert (solver.status, solver.limit_reason) == ('unknown', 'cancelled')
+    assert all(value is None for value in csp.assignments.values())
+
+
+@pytest.mark.parametrize("options", [{}, {'MAC': True}, {'line_search': True}, {'backjumping': True}], ids=str)
+def test_cancelled_token_stops_every_search(options):
+    clues, givens = random_puzzle(random.Random(1), 5, keep=0.3)
+    token = CancellationToken()
+    token.cancel()
+    csp = build_csp(clues, givens)
+    solver = Solver(csp, clues=clues, cancel_token=token, **options)
+    assert solver.solve() is None
+    assert (solver.status, solver.limit_reason) == ('unknown', 'cancelled')
+    assert all(value is None for value in csp.assignments.values())
@@ -0,0 +1,86 @@
+import random
+
+import numpy as np
+import pytest
+
+from helpers import random_puzzle
+from skyscraper import build_csp
+from Solver import Solver
+from trace_replay import TraceReplay
+from tracing import ASSIGN, FAILURE, PRUNE, SOLVED, UNASSIGN, read_trace
+
+
+def traced_solve(seed, **options):
+    clues, givens = random_puzzle(random.Random(seed), 4, keep=0.4)
+    csp = build_csp(clues, givens)
+    solver = Solver(csp, **options)
+    solution = solver.solve()
+    return csp, solver, solution
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_trace_records_every_decision(seed):
+    csp, solver, solution = traced_solve(seed, forward_checking=True, trace='decisions')
+    events = list(solver.tracer)
+    kinds = [event.kind for event in events]
+    assert kinds.count(ASSIGN) == csp.assignments_number
+    assert PRUNE not in kinds
+    assert events[-1].kind == SOLVED and events[-1].value == int(solution is not None)
+    assert solver.tracer.total == len(events)
+
+    # Replaying the assignments and unassignments ends on the solution.
+    grid = {}
+    for event in events:
+        if event.kind == ASSIGN:
+            grid[event.variable] = event.value
+        elif event.kind == UNASSIGN:
+            del grid[event.variable]
+    assert all(solution[cell] == value for cell, value in grid.items())
+
+
+def test_ring_buffer_keeps_the_latest_events(tmp_path):
+    _, full, _ = traced_solve(1, MAC=True, trace='all')
+    _, ring, _ = traced_solve(1, MAC=True, trace='all', trace_capacity=16)
+    events = list(full.tracer)
+    assert len(events) > 16
+    assert ring.tracer.total == len(events)
+    # The last event holds the solve time, which differs between the runs.
+    assert list(ring.tracer)[:-1] == events[-16:-1]
+
+    path = str(tmp_path / 'trace.bin')
+    ring.tracer.dump(path)
+    total, read = read_trace(path)
+    assert total == len(events)
+    assert list(read) == list(ring.tracer)
+
+
+def test_failures_level_only_records_failures():
+    _, solver, _ = traced_solve(2, trace='failures')
+    assert {event.kind for event in solver.tracer} <= {FAILURE, SOLVED}
+
+
+@pytest.mark.parametrize("interval", [1, 7, 64, 4096])
+def test_replay_matches_the_events(tmp_path, interval):
+    path = str(tmp_path / 'trace.bin')
+    csp, solver, solution = traced_solve(3, forward_checking=True, trace='all', trace_capacity=32, trace_file=path)
+    solver.tracer.close()
+    total, events = read_trace(path)
+    events = list(events)
+    assert total == len(events) > 32
+
+    replay = TraceReplay(path, keyframe_interval=interval)
+    assert len(replay) == len(events)
+    grid = np.zeros(16, dtype=np.int16)
+    assignments = 0
+    for position in range(len(events) + 1):
+        assert (replay.state_at(position) == grid).all(), position
+        assert replay.assignments(position) == assignments
+        if position < len(events):
+            event = events[position]
+            if event.kind == ASSIGN:
+                grid[event.variable[0] * 4 + event.variable[1]] = event.value
+                assignments += 1
+            elif event.kind == UNASSIGN:
+                grid[event.variable[0] * 4 + event.variable[1]] = 0
+    assert assignments == csp.assignments_number
+    assert all(solution[divmod(int(k), 4)] == value for k, value in enumerate(grid) if value)
@@ -0,0 +1,55 @@
+from itertools import permutations, product
+
+import pytest
+
+from constraints import Visibility, visibility_prefix_check
+from helpers import visible
+
+DIRECTIONS = ('left', 'right', 'down', 'up')
+
+
+def seen(line, direction):
+    return visible(line if direction in ('left', 'down') else line[::-1])
+
+
+def reachable_counts(n, direction):
+    """Maps every partial line (None for a free cell) to the counts its completions can show."""
+    counts = {}
+    for permutation in permutations(range(1, n + 1)):
+        count = seen(permutation, direction)
+        for free in product((False, True), repeat=n):
+            partial = tuple(None if skip else height for height, skip in zip(permutation, free))
+            counts.setdefault(partial, set()).add(count)
+    return counts
+
+
+def is_prefix(partial, direction):
+    """Whether the assigned cells come first when the line is read from the clue's side."""
+    ordered = partial if direction in ('left', 'down') else partial[::-1]
+    assigned = [height is not None for height in ordered]
+    return assigned == sorted(assigned, reverse=True)
+
+
+@pytest.mark.parametrize("n", range(1, 7))
+@pytest.mark.parametrize("direction", DIRECTIONS)
+def test_prefix_check_matches_completions(n, direction):
+    for partial, counts in reachable_counts(n, direction).items():
+        for clue in range(1, n + 1):
+            accepted = visibility_prefix_check(list(partial), clue, direction)
+            # Never rejects a line that can still be completed.
+            if clue in counts:
+                assert accepted, (partial, clue)
+            # Exact on an assigned prefix, which is what the search builds along the clue's side.
+            elif is_prefix(partial, direction):
+                assert not accepted, (partial, clue)
+
+
+@pytest.mark.parametrize("direction", DIRECTIONS)
+def test_visibility_checks_full_lines(direction):
+    n = 5
+    for permutation in permutations(range(1, n + 1)):
+        for clue in range(1, n + 1):
+            constraint = Visibility(clue, direction)
+            expected = seen(permutation, direction) == clue
+            assert constraint(*permutation) == expected
+            assert constraint.check_partial(list(permutation)) == expected
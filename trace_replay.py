@@ -0,0 +1,127 @@
+import numpy as np
+
+from tracing import ASSIGN, HEADER, MAGIC, NO_VARIABLE, PRUNE, RECORD, UNASSIGN, VERSION, TraceEvent, format_event
+
+
+# The records of tracing.RECORD as a NumPy type, so a trace file is read without decoding it record by record.
+RECORD_DTYPE = np.dtype([('kind', 'u1'), ('pad', 'u1'), ('variable', '<u2'), ('value', '<i2'), ('argument', '<i4')])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+
+class TraceReplay(object):
+    """
+    Random access to the grid of a search trace at any event, for replaying it.
+
+    The trace file is memory-mapped as an array of records. A keyframe (the
+    value of every cell, 0 for empty) is kept every `keyframe_interval` events,
+    so the grid after any event is the nearest keyframe before it plus at most
+    one interval of events. Those are applied at once: only the last
+    assignment or unassignment of each cell counts, which is how many events
+    are coalesced into one frame. A trace kept by a ring buffer starts in the
+    middle of the search, from an empty grid.
+
+    Attributes:
+        path (str): The trace file.
+        columns (int): The number of grid columns.
+        total (int): The number of events recorded by the search, including those the file does not hold.
+        events (np.ndarray): The records of the file, from the oldest to the newest.
+        keyframe_interval (int): The number of events between two keyframes.
+    """
+
+    def __init__(self, path: str, keyframe_interval: int = 4096) -> None:
+        """
+        Initializes a TraceReplay object, reading the header of the trace file and computing the keyframes.
+
+        Args:
+            path (str): A trace file written by Tracer.dump or by a Tracer with a path.
+            keyframe_interval (int, optional): The number of events between two keyframes. Defaults to 4096.
+        """
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{path} is not a trace file")
+        magic, version, record_size, self.columns, count, self.total = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{path} is not a trace file of version {VERSION}")
+        if keyframe_interval <= 0:
+            raise ValueError("The keyframe interval must be positive")
+
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        if count:
+            self.events = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER.size, shape=(count,))
+        else:
+            self.events = np.zeros(0, dtype=RECORD_DTYPE)
+
+        state = np.zeros(self.columns * self.columns, dtype=np.int16)
+        keyframes = [state.copy()]
+        # The number of assignments before every keyframe.
+        self.assignment_counts = [0]
+        for start in range(0, count, keyframe_interval):
+            self.apply(state, start, start + keyframe_interval)
+            keyframes.append(state.copy())
+            assigned = self.count_assignments(start, start + keyframe_interval)
+            self.assignment_counts.append(self.assignment_counts[-1] + assigned)
+        self.keyframes = np.array(keyframes)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def apply(self, state: np.ndarray, start: int, end: int) -> None:
+        """
+        Applies the events start..end - 1 to a grid, keeping only the last change of each cell.
+
+        Args:
+            state (np.ndarray): The flat grid, updated in place.
+            start (int): The first event.
+            end (int): The event after the last one.
+
+        Returns:
+            None
+        """
+        chunk = self.events[start:end]
+        changes = chunk[(chunk['kind'] == ASSIGN) | (chunk['kind'] == UNASSIGN)]
+        if not len(changes):
+            return
+        # np.unique gives the first occurrence, so the changes are looked at from the newest.
+        changes = changes[::-1]
+        cells, first = np.unique(changes['variable'], return_index=True)
+        latest = changes[first]
+        state[cells] = np.where(latest['kind'] == ASSIGN, latest['value'], 0)
+
+    def state_at(self, position: int) -> np.ndarray:
+        """
+        Returns the grid after the first `position` events.
+
+        Args:
+            position (int): The number of events applied, from 0 to len(self).
+
+        Returns:
+            np.ndarray: The value of every cell, row by row, 0 for empty cells.
+        """
+        position = min(max(position, 0), len(self.events))
+        keyframe = position // self.keyframe_interval
+        state = self.keyframes[keyframe].copy()
+        self.apply(state, keyframe * self.keyframe_interval, position)
+        return state
+
+    def count_assignments(self, start: int, end: int) -> int:
+        """Returns the number of assignments among the events start..end - 1."""
+        return int(np.count_nonzero(self.events['kind'][start:end] == ASSIGN))
+
+    def assignments(self, position: int) -> int:
+        """Returns the number of assignments among the first `position` events."""
+        position = min(max(position, 0), len(self.events))
+        keyframe = position // self.keyframe_interval
+        return self.assignment_counts[keyframe] + self.count_assignments(keyframe * self.keyframe_interval, position)
+
+    def pruned(self, start: int, end: int) -> np.ndarray:
+        """Returns the cells whose domain was pruned by the events start..end - 1."""
+        chunk = self.events[start:end]
+        return np.unique(chunk['variable'][chunk['kind'] == PRUNE])
+
+    def describe(self, position: int) -> str:
+        """Returns the event at a position as a line of text (see tracing.format_event)."""
+        kind, _, variable, value, argument = self.events[position].tolist()
+        cell = None if variable == NO_VARIABLE else divmod(variable, self.columns)
+        return format_event(TraceEvent(kind, cell, value, argument)).strip()
@@ -0,0 +1,249 @@
+import struct
+from collections import namedtuple
+from typing import Any, Iterator, List, Tuple
+
+from instrumentation import SolverHook
+
+
+# Trace levels, from the least to the most detailed. Each level records the events of the ones below it.
+LEVELS = {'failures': 1, 'decisions': 2, 'all': 3}
+
+# Event kinds
+ASSIGN = 1
+UNASSIGN = 2
+FAILURE = 3
+PRUNE = 4
+PROPAGATE = 5
+SOLVED = 6
+
+# The events recorded at every level, as the SolverHook methods that receive them.
+LEVEL_EVENTS = {
+    1: {'on_failure', 'on_solve'},
+    2: {'on_assign', 'on_unassign', 'on_failure', 'on_solve'},
+    3: {'on_assign', 'on_unassign', 'on_failure', 'on_prune', 'on_propagate', 'on_solve'},
+}
+
+# Every event is one fixed-width record: kind, variable index, value and an argument whose meaning
+# depends on the kind (the depth of an assignment, the constraint of a failure or a propagation, the
+# number of pruned values, or the solve time in microseconds).
+RECORD = struct.Struct('<BxHhi')
+# The header of a trace file: magic, version, record size, number of grid columns, number of records
+# in the file and number of events recorded in total (older ones were overwritten by the ring buffer).
+HEADER = struct.Struct('<4sBBHIQ')
+MAGIC = b'SKYT'
+VERSION = 1
+
+NO_VARIABLE = 0xFFFF
+MAX_ARGUMENT = 2 ** 31 - 1
+
+TraceEvent = namedtuple('TraceEvent', ['kind', 'variable', 'value', 'argument'])
+
+
+class Tracer(SolverHook):
+    """
+    Records the search events of a Solver in a ring buffer of fixed-width binary records.
+
+    Only the `capacity` most recent events are kept, so a trace never grows
+    past `capacity * RECORD.size` bytes however long the search runs. The
+    buffer can be dumped to a file and read back with read_trace. With a path,
+    the tracer writes the whole search to that file instead: the buffer is
+    appended to it each time it fills up, and close writes the rest. A tracer
+    only receives the events of its level (see `events`), and a solver created
+    without a tracer runs its plain methods, so tracing costs nothing when off.
+
+    Attributes:
+        level (int): The trace level, one of the values of LEVELS.
+        variables (list): The variables of the CSP, by index.
+        columns (int): The number of grid columns, used to turn variable indices back into cells.
+        capacity (int): The number of events kept, or buffered before they are written to `path`.
+        path (str): The file the whole trace is written to, or None to only keep the last events.
+        total (int): The number of events recorded so far, including the overwritten ones.
+    """
+
+    def __init__(self, variables: List[Any], level: str | int = 'decisions', capacity: int = 65536,
+                 path: str | None = None) -> None:
+        """
+        Initializes a Tracer object.
+
+        Args:
+            variables (list): The variables of the CSP, in the order they are indexed in the records.
+            level (str | int, optional): The trace level, a key or a value of LEVELS. Defaults to 'decisions'.
+            capacity (int, optional): The number of most recent events kept. Defaults to 65536.
+            path (str, optional): The file to write every event to. Defaults to None.
+        """
+        if isinstance(level, str):
+            if level not in LEVELS:
+                raise ValueError(f"Unknown trace level: {level}")
+            level = LEVELS[level]
+        if capacity <= 0:
+            raise ValueError("The trace capacity must be positive")
+        self.level = level
+        self.variables = variables
+        self.columns = max(int(len(variables) ** 0.5), 1)
+        self.index = {var: i for i, var in enumerate(variables)}
+        self.capacity = capacity
+        self.total = 0
+        self._buffer = bytearray(capacity * RECORD.size)
+        self._position = 0
+        self._values = [0] * len(variables)
+        self._last = NO_VARIABLE
+        self.path = path
+        self._file = None
+        if path is not None:
+            self._file = open(path, 'wb')
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, self.columns, 0, 0))
+
+    def events(self) -> set:
+        return LEVEL_EVENTS[self.level]
+
+    def record(self, kind: int, variable: int, value: int, argument: int) -> None:
+        """Appends one event to the ring buffer, overwriting the oldest one when it is full."""
+        RECORD.pack_into(self._buffer, self._position, kind, variable, value, min(argument, MAX_ARGUMENT))
+        self._position += RECORD.size
+        if self._position == len(self._buffer):
+            if self._file is not None:
+                self._file.write(self._buffer)
+            self._position = 0
+        self.total += 1
+
+    def on_assign(self, variable: Any, value: Any, depth: int) -> None:
+        index = self.index[variable]
+        self._values[index] = value
+        self._last = index
+        self.record(ASSIGN, index, value, depth)
+
+    def on_unassign(self, variable: Any) -> None:
+        index = self.index[variable]
+        self.record(UNASSIGN, index, self._values[index], 0)
+
+    def on_prune(self, variable: Any, count: int) -> None:
+        self.record(PRUNE, self.index[variable], 0, count)
+
+    def on_propagate(self, constraint_index: int) -> None:
+        self.record(PROPAGATE, NO_VARIABLE, 0, -1 if constraint_index is None else constraint_index)
+
+    def on_failure(self, constraint_index: int | None) -> None:
+        # A failure always follows the assignment it rejects.
+        value = self._values[self._last] if self._last != NO_VARIABLE else 0
+        self.record(FAILURE, self._last, value, -1 if constraint_index is None else constraint_index)
+
+    def on_solve(self, solution: None | dict, elapsed: float) -> None:
+        self.record(SOLVED, NO_VARIABLE, int(solution is not None), int(elapsed * 1e6))
+
+    def raw(self) -> bytes:
+        """Returns the records kept in the buffer (not yet written, with a path), from the oldest to the newest."""
+        if self.total < self.capacity or self.path is not None:
+            return bytes(self._buffer[:self._position])
+        return bytes(self._buffer[self._position:] + self._buffer[:self._position])
+
+    def __iter__(self) -> Iterator[TraceEvent]:
+        return decode(self.raw(), self.columns)
+
+    def dump(self, path: str) -> None:
+        """
+        Writes the events kept in the buffer to a trace file.
+
+        Args:
+            path (str): The file to write.
+
+        Returns:
+            None
+        """
+        records = self.raw()
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, self.columns, len(records) // RECORD.size,
+                                self.total))
+            f.write(records)
+
+    def close(self) -> None:
+        """
+        Writes the events left in the buffer and the final header to `path`, if the tracer has one.
+
+        Returns:
+            None
+        """
+        if self._file is None:
+            return
+        self._file.write(self._buffer[:self._position])
+        self._position = 0
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, self.columns, self.total, self.total))
+        self._file.close()
+        self._file = None
+
+
+def decode(records: bytes, columns: int) -> Iterator[TraceEvent]:
+    """
+    Decodes packed records into events, with the variable index turned back into a (row, column) cell.
+
+    Args:
+        records (bytes): Consecutive records packed with RECORD.
+        columns (int): The number of grid columns.
+
+    Returns:
+        Iterator: The decoded events.
+    """
+    for kind, variable, value, argument in RECORD.iter_unpack(records):
+        cell = None if variable == NO_VARIABLE else divmod(variable, columns)
+        yield TraceEvent(kind, cell, value, argument)
+
+
+def read_trace(path: str) -> Tuple[int, Iterator[TraceEvent]]:
+    """
+    Reads a trace file written by Tracer.dump.
+
+    Args:
+        path (str): The trace file.
+
+    Returns:
+        tuple: The number of events recorded in total, and the events of the file from the oldest to the newest.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+        records = f.read()
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not a trace file")
+    magic, version, record_size, columns, count, total = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a trace file of version {VERSION}")
+    return total, decode(records[:count * RECORD.size], columns)
+
+
+def format_event(event: TraceEvent, constraint_names: List[str] | None = None) -> str:
+    """Returns an event as a line of text, such as '(0, 1) = 3 assigned'."""
+    kind, var, value, argument = event
+    if kind in (FAILURE, PROPAGATE):
+        if argument < 0:
+            constraint = 'a nogood'
+        elif constraint_names is not None:
+            constraint = constraint_names[argument]
+        else:
+            constraint = f"constraint {argument}"
+        if kind == FAILURE:
+            return f"{var} != {value} because of {constraint}"
+        return f"    propagating {constraint}"
+    if kind == ASSIGN:
+        return f"{'  ' * argument}{var} = {value} assigned"
+    if kind == UNASSIGN:
+        return f"{var} = {value} unassigned"
+    if kind == PRUNE:
+        return f"    {argument} values removed from {var}"
+    if kind == SOLVED:
+        return f"{'Solution found' if value else 'No solution'} in {argument / 1e6:.6f}s"
+    return f"unknown event {kind}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print the events of a search trace file")
+    parser.add_argument("trace", help="Trace file written with --trace_file")
+    parser.add_argument("--tail", type=int, help="Only print the last TAIL events")
+    args = parser.parse_args()
+
+    total, events = read_trace(args.trace)
+    events = list(events)
+    if args.tail is not None:
+        events = events[-args.tail:]
+    print('\n'.join(format_event(event) for event in events))
+    print(f"{len(events)} of {total} events")